@@ -0,0 +1,179 @@
+"""
+Autozapis gry w wątku roboczym.
+
+Wątek Tk przekazuje tylko niezmienną migawkę stanu gry (snapshot()), a
+serializacja i zapis na dysk (atomowy - plik tymczasowy + os.replace)
+odbywają się w osobnym wątku. Autozapisy krążą w pierścieniu N plików
+autosave_1.sav ... autosave_N.sav - nadpisywany jest zawsze najstarszy.
+Gdy w kolejce czeka kilka migawek, zapisywana jest tylko najnowsza.
+Obrazy żetonów bez znanego skrótu (puste pole "image") są kopiowane do
+magazynu obrazów (BlobStore) także w wątku roboczym, tuż przed zapisem.
+"""
+
+import os
+import queue
+import threading
+import time
+
+from core.save_format import SaveReader, SaveFormatError, write_save
+
+# Domyślna liczba plików autozapisu w pierścieniu
+DEFAULT_AUTOSAVE_SLOTS = 5
+
+
+def snapshot(game_state):
+    """
+    Zwraca kopię stanu gry niezależną od dalszych zmian w grze.
+
+    Stan ma płytką strukturę (słowniki heksów i żetonów z prostymi wartościami),
+    więc wystarcza skopiowanie słowników drugiego poziomu - bez deepcopy.
+    """
+    state = dict(game_state)
+    for key in ("placed_tokens", "hex_data"):
+        if key in state:
+            state[key] = {item_id: dict(data) for item_id, data in state[key].items()}
+    return state
+
+
+class AutosaveService:
+    """Zapisuje migawki stanu gry w tle, w pierścieniu plików autozapisu."""
+
+    def __init__(self, folder, slots=DEFAULT_AUTOSAVE_SLOTS, prefix="autosave", blob_store=None):
+        self.folder = folder
+        self.blob_store = blob_store  # magazyn obrazów żetonów (None - zapis bez obrazów)
+        self.slots = max(1, slots)
+        self.prefix = prefix
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.in_flight = []  # migawki przekazane do zapisu, jeszcze niezapisane
+        self.latencies = []  # (czas od przekazania migawki do zapisu, czas samego zapisu) w sekundach
+        self.saved = 0
+        self.skipped = 0
+        self.next_slot = self._oldest_slot()
+        self.thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self.thread.start()
+
+    def slot_path(self, slot):
+        """Zwraca ścieżkę pliku autozapisu o numerze slot (0..N-1)."""
+        return os.path.join(self.folder, f"{self.prefix}_{slot + 1}.sav")
+
+    def _oldest_slot(self):
+        """Wybiera slot do nadpisania: pierwszy nieistniejący lub najdawniej zapisany."""
+        oldest, oldest_mtime = 0, None
+        for slot in range(self.slots):
+            try:
+                mtime = os.stat(self.slot_path(slot)).st_mtime_ns
+            except OSError:
+                return slot
+            if oldest_mtime is None or mtime < oldest_mtime:
+                oldest, oldest_mtime = slot, mtime
+        return oldest
+
+    # ----------------------------
+    # Wątek Tk
+    # ----------------------------
+    def submit(self, game_state):
+        """Przekazuje stan gry do zapisu w tle (kopiowany od razu - gra może go dalej zmieniać)."""
+        state = snapshot(game_state)
+        with self.lock:
+            self.in_flight.append(state)
+        self.queue.put((time.perf_counter(), state))
+
+    def referenced_digests(self):
+        """Zwraca skróty obrazów używane przez autozapisy na dysku i migawki czekające na zapis."""
+        with self.lock:
+            digests = {token.get("image") for state in self.in_flight
+                       for token in state.get("placed_tokens", {}).values() if token.get("image")}
+        for slot in range(self.slots):
+            try:
+                digests.update(token["image"] for _, token in SaveReader(self.slot_path(slot)).iter_tokens()
+                               if token["image"])
+            except (OSError, SaveFormatError):
+                continue
+        return digests
+
+    def collect_garbage(self, referenced):
+        """
+        Usuwa z magazynu obrazy, do których nie odwołuje się referenced ani żaden autozapis.
+
+        Działa pod blokadą magazynu - wątek roboczy nie dodaje w tym czasie obrazów,
+        więc obraz właśnie skopiowany dla oczekującej migawki nie zostanie usunięty.
+
+        Returns:
+            Liczba usuniętych plików
+        """
+        if self.blob_store is None:
+            return 0
+        with self.blob_store.lock:
+            digests = self.referenced_digests()
+            digests.update(referenced)
+            return self.blob_store.collect_garbage(digests)
+
+    def stop(self, timeout=5.0):
+        """Kończy wątek po zapisaniu oczekujących migawek (czeka najwyżej timeout sekund)."""
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    # ----------------------------
+    # Wątek roboczy
+    # ----------------------------
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            # Zapisz tylko najnowszą z oczekujących migawek
+            stop = item is None
+            while not stop:
+                try:
+                    newer = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if newer is None:
+                    stop = True
+                else:
+                    self._done(item[1])
+                    self.skipped += 1
+                    item = newer
+            if item is not None:
+                self._write(*item)
+            if stop:
+                return
+
+    def _write(self, submitted, state):
+        path = self.slot_path(self.next_slot)
+        started = time.perf_counter()
+        try:
+            self._store_images(state)
+            os.makedirs(self.folder, exist_ok=True)
+            write_save(path, state)
+        except (OSError, ValueError) as e:
+            print(f"[BŁĄD] Autozapis do pliku {path} nie powiódł się: {e}")
+            return
+        finally:
+            self._done(state)
+
+        finished = time.perf_counter()
+        self.latencies.append((finished - submitted, finished - started))
+        self.saved += 1
+        self.next_slot = (self.next_slot + 1) % self.slots
+        print(f"[INFO] Autozapis: {path} (zapis {(finished - started) * 1000:.1f} ms, "
+              f"od końca tury {(finished - submitted) * 1000:.1f} ms)")
+
+    def _store_images(self, state):
+        """Kopiuje do magazynu obrazy żetonów, których skrót nie był znany w wątku Tk."""
+        if self.blob_store is None:
+            return
+        for token in state.get("placed_tokens", {}).values():
+            if token.get("image") or not token.get("path"):
+                continue
+            with self.blob_store.lock:
+                try:
+                    digest = self.blob_store.put_file(token["path"])
+                except OSError as e:
+                    print(f"[UWAGA] Nie udało się zapisać obrazu tokena {token.get('name')}: {e}")
+                    continue
+                with self.lock:
+                    token["image"] = digest
+
+    def _done(self, state):
+        with self.lock:
+            self.in_flight = [pending for pending in self.in_flight if pending is not state]
@@ -0,0 +1,130 @@
+"""
+Magazyn obrazów adresowanych treścią (dla zapisów gry).
+
+Każdy plik jest przechowywany raz, pod nazwą będącą skrótem SHA-256 jego
+treści (saves/blobs/ab/abcdef....png). Zapis gry odwołuje się do obrazów
+po skrócie, więc przesunięcie żetonu czy kolejny zapis nie tworzą nowych
+kopii. Skróty plików źródłowych są zapamiętywane (ścieżka, rozmiar, mtime),
+dlatego niezmieniony obraz nie wymaga przy kolejnym zapisie żadnego odczytu.
+Obrazy, do których nie odwołuje się już żaden zapis, usuwa collect_garbage().
+Magazyn jest używany z wątku Tk i z wątku autozapisu - operacje na nim
+przechodzą przez wspólną blokadę (lock).
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+# Rozmiar bloku przy liczeniu skrótu pliku
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    """Zwraca skrót SHA-256 (hex) treści pliku."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlobStore:
+    """Katalog plików nazwanych skrótem treści, z pamięcią skrótów plików źródłowych."""
+
+    def __init__(self, root, extension=".png"):
+        self.root = root
+        self.extension = extension
+        self._digests = {}  # ścieżka źródła -> (rozmiar, mtime, skrót)
+        self._known = None  # skróty obecne na dysku (wczytywane przy pierwszym użyciu)
+        self.lock = threading.RLock()  # wspólna dla wątku Tk i wątku autozapisu
+
+    def path_for(self, digest):
+        """Zwraca ścieżkę pliku o danym skrócie."""
+        return os.path.join(self.root, digest[:2], digest + self.extension)
+
+    def contains(self, digest):
+        """Sprawdza, czy plik o danym skrócie jest w magazynie."""
+        with self.lock:
+            return digest in self._known_digests()
+
+    def digest_of(self, path):
+        """Zwraca skrót pliku - liczony tylko, gdy plik zmienił się od ostatniego razu."""
+        path = os.path.abspath(path)
+        with self.lock:
+            stat = os.stat(path)
+            cached = self._digests.get(path)
+            if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                return cached[2]
+            digest = file_digest(path)
+            self._digests[path] = (stat.st_size, stat.st_mtime_ns, digest)
+            return digest
+
+    def put_file(self, path):
+        """
+        Dodaje plik do magazynu (jeśli jeszcze go tam nie ma) i zwraca jego skrót.
+
+        Raises:
+            OSError: Gdy pliku nie da się odczytać lub skopiować
+        """
+        with self.lock:
+            digest = self.digest_of(path)
+            known = self._known_digests()
+            if digest in known:
+                return digest
+
+            target = self.path_for(digest)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Kopia do unikalnego pliku tymczasowego i zamiana - przerwany zapis nie zostawi niepełnego obrazu
+            fd, temp_path = tempfile.mkstemp(prefix=".blob_", suffix=".tmp", dir=os.path.dirname(target))
+            try:
+                with os.fdopen(fd, "wb") as dst, open(path, "rb") as src:
+                    shutil.copyfileobj(src, dst)
+                os.replace(temp_path, target)
+            except BaseException:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                raise
+            known.add(digest)
+            return digest
+
+    def collect_garbage(self, referenced):
+        """
+        Usuwa pliki, których skrótów nie ma w referenced.
+
+        Returns:
+            Liczba usuniętych plików
+        """
+        referenced = set(referenced)
+        removed = 0
+        with self.lock:
+            known = self._known_digests()
+            for digest in list(known):
+                if digest in referenced:
+                    continue
+                try:
+                    os.remove(self.path_for(digest))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"[UWAGA] Nie udało się usunąć obrazu {digest}: {e}")
+                    continue
+                known.discard(digest)
+        return removed
+
+    def _known_digests(self):
+        """Zwraca zbiór skrótów plików w magazynie (katalog czytany raz, potem aktualizowany w pamięci)."""
+        if self._known is None:
+            self._known = set()
+            if os.path.isdir(self.root):
+                for bucket in os.scandir(self.root):
+                    if not bucket.is_dir():
+                        continue
+                    for entry in os.scandir(bucket.path):
+                        if entry.name.endswith(self.extension):
+                            self._known.add(entry.name[:-len(self.extension)])
+        return self._known
@@ -0,0 +1,228 @@
+"""
+Dziennik zmian edytora mapy (tylko dopisywanie).
+
+Każda zmiana terenu lub kluczowego punktu to jeden wiersz JSON dopisywany na
+koniec pliku dziennika (plik roboczy + ".journal"), zamiast przepisywania
+całego pliku roboczego. Kompaktowanie zapisuje pełne dane do pliku roboczego
+i usuwa dziennik; przy wczytywaniu dziennik jest odtwarzany na danych z pliku
+roboczego, więc zmiany sprzed awarii programu nie giną.
+
+Kompaktowanie w tle: bieżący dziennik jest przemianowywany na
+".journal.compacting", a nowe zmiany trafiają do świeżego dziennika. Po
+zapisaniu pliku roboczego przemianowany dziennik jest usuwany. Kolejność
+odtwarzania: plik roboczy, ".journal.compacting", ".journal".
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+# Liczba wpisów, po której dziennik jest kompaktowany w tle
+DEFAULT_COMPACT_THRESHOLD = 500
+
+
+def empty_map_data():
+    """Zwraca puste dane pliku roboczego edytora."""
+    return {"terrain": {}, "key_points": {}}
+
+
+def apply_record(map_data, record):
+    """Nanosi jeden wpis dziennika na dane {"terrain": ..., "key_points": ...}."""
+    section = {"terrain": "terrain", "key_point": "key_points"}.get(record.get("op"))
+    if section is None:
+        print(f"[UWAGA] Nieznany wpis dziennika edytora: {record}")
+        return
+    if record.get("value") is None:
+        map_data[section].pop(record["hex"], None)
+    else:
+        map_data[section][record["hex"]] = record["value"]
+
+
+def write_json_atomic(path, data):
+    """Zapisuje JSON do pliku tymczasowego i podmienia nim plik docelowy."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".map_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class EditJournal:
+    """Dziennik zmian pliku roboczego edytora mapy."""
+
+    def __init__(self, working_path, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        self.working_path = working_path
+        self.journal_path = working_path + ".journal"
+        self.compacting_path = working_path + ".journal.compacting"
+        self.compact_threshold = compact_threshold
+        self.records = 0  # wpisy w bieżącym dzienniku
+        self.lock = threading.Lock()
+        self._file = None
+        self._compaction = None  # wątek kompaktowania w tle
+
+    # ----------------------------
+    # Wczytywanie
+    # ----------------------------
+    def load(self):
+        """Wczytuje plik roboczy i odtwarza na nim dzienniki; zwraca {"terrain", "key_points"}."""
+        self.wait()
+        map_data = empty_map_data()
+        try:
+            with open(self.working_path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            map_data["terrain"].update(loaded.get("terrain", {}))
+            map_data["key_points"].update(loaded.get("key_points", {}))
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[BŁĄD] Nie udało się wczytać pliku roboczego {self.working_path}: {e}")
+
+        self.records = 0
+        for path in (self.compacting_path, self.journal_path):
+            replayed = self._replay(path, map_data)
+            if path == self.journal_path:
+                self.records = replayed
+            if replayed:
+                print(f"[INFO] Odtworzono {replayed} zmian z dziennika {path}")
+        return map_data
+
+    def _replay(self, path, map_data):
+        """Nanosi wpisy dziennika z pliku path; zwraca liczbę odtworzonych wpisów."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            print(f"[BŁĄD] Nie udało się odczytać dziennika {path}: {e}")
+            return 0
+
+        count = 0
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Niepełny ostatni wiersz po awarii - pomijamy tylko jego
+                print(f"[UWAGA] Pominięto uszkodzony wpis {number} w dzienniku {path}")
+                continue
+            apply_record(map_data, record)
+            count += 1
+        return count
+
+    # ----------------------------
+    # Zapisywanie zmian
+    # ----------------------------
+    def append(self, op, hex_id, value):
+        """
+        Dopisuje zmianę do dziennika.
+
+        Returns:
+            True, gdy dziennik przekroczył próg i warto go skompaktować
+        """
+        record = {"op": op, "hex": hex_id, "value": value}
+        with self.lock:
+            if self._file is None:
+                self._file = open(self.journal_path, "a", encoding="utf-8")
+                if not self._ends_with_newline():
+                    self._file.write("\n")  # odetnij niepełny wiersz pozostały po awarii
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self.records += 1
+            return self.records >= self.compact_threshold
+
+    def _ends_with_newline(self):
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return True
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) == b"\n"
+        except OSError:
+            return True
+
+    def record_terrain(self, hex_id, terrain):
+        """Zapisuje zmianę terenu heksu (None - teren domyślny)."""
+        return self.append("terrain", hex_id, terrain)
+
+    def record_key_point(self, hex_id, key_point):
+        """Zapisuje dodanie (lub usunięcie przy None) kluczowego punktu."""
+        return self.append("key_point", hex_id, key_point)
+
+    # ----------------------------
+    # Kompaktowanie
+    # ----------------------------
+    def compact(self, map_data, background=False):
+        """
+        Zapisuje pełne dane do pliku roboczego i usuwa dziennik.
+
+        Args:
+            map_data: Aktualne dane {"terrain", "key_points"} (przy pracy w tle kopiowane od razu)
+            background: Czy zapis ma się odbyć w osobnym wątku
+        """
+        self.wait()
+        snapshot = {
+            "terrain": {hex_id: dict(data) for hex_id, data in map_data["terrain"].items()},
+            "key_points": {hex_id: dict(data) for hex_id, data in map_data["key_points"].items()},
+        }
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if os.path.exists(self.journal_path):
+                if os.path.exists(self.compacting_path):
+                    # Poprzednie kompaktowanie się nie powiodło - dopisz nowe wpisy do jego dziennika
+                    with open(self.journal_path, "r", encoding="utf-8") as src, \
+                            open(self.compacting_path, "a", encoding="utf-8") as dst:
+                        dst.write(src.read())
+                    os.remove(self.journal_path)
+                else:
+                    os.replace(self.journal_path, self.compacting_path)
+            self.records = 0
+
+        if background:
+            self._compaction = threading.Thread(target=self._write_compacted, args=(snapshot,),
+                                                name="map-journal-compact", daemon=True)
+            self._compaction.start()
+        else:
+            self._write_compacted(snapshot)
+
+    def _write_compacted(self, snapshot):
+        try:
+            write_json_atomic(self.working_path, snapshot)
+        except OSError as e:
+            # Dziennik ".compacting" zostaje - zmiany zostaną odtworzone przy następnym wczytaniu
+            print(f"[BŁĄD] Kompaktowanie dziennika do {self.working_path} nie powiodło się: {e}")
+            return
+        try:
+            os.remove(self.compacting_path)
+        except FileNotFoundError:
+            pass
+        print(f"[INFO] Skompaktowano dziennik zmian do {self.working_path}")
+
+    def wait(self):
+        """Czeka na zakończenie trwającego kompaktowania w tle."""
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+    def close(self):
+        """Zamyka plik dziennika."""
+        self.wait()
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,371 @@
+"""
+Stan i reguły gry niezależne od interfejsu (bez Tk i obrazów).
+
+GameState przechowuje planszę (jednostki na heksach i dane heksów), turę,
+ekonomię i blokady żetonów. GameEngine wykonuje na nim operacje gry -
+postawienie, zdjęcie i przesunięcie jednostki oraz koniec tury - i utrzymuje
+w zgodzie silniki ruchu i widoczności. Okno gry (main.py) tylko przekłada
+zdarzenia myszy na te operacje i odrysowuje wynik, a symulacje (balans, SI)
+mogą wykonywać tysiące tur bez wyświetlacza.
+"""
+
+from core.map import NO_VALUE
+from core.units import Unit, token_stat
+from engine.combat import CombatEngine
+from engine.economy import EconomySystem
+from engine.movement import MovementEngine
+from engine.visibility import VisibilitySystem
+
+# Gracze i nacje na początku gry (gracz -> nacja)
+DEFAULT_PLAYERS = {"Gracz 1": "Polska", "Gracz 2": "Niemcy"}
+
+# Nacja tury -> nacja żetonów
+TOKEN_NATIONS = {"Polska": "polskie", "Niemcy": "niemieckie"}
+
+# Ekonomia końca tury: dochód i koszt utrzymania jednej jednostki na mapie
+TURN_INCOME = 100
+UNIT_MAINTENANCE_COST = 10
+
+
+def side_of(nation):
+    """Zwraca stronę ("Polska" / "Niemcy") dla nazwy nacji w dowolnej postaci lub None."""
+    nation_lower = nation.lower()
+    if "pol" in nation_lower:
+        return "Polska"
+    if "niem" in nation_lower or "germ" in nation_lower:
+        return "Niemcy"
+    return None
+
+
+class GameRuleError(ValueError):
+    """Operacja niedozwolona przez reguły gry (zajęty heks, zablokowane żetony, brak zasięgu...)."""
+
+
+class GameState:
+    """Dane rozgrywki: plansza, tura, ekonomia i blokady żetonów."""
+
+    def __init__(self, players=None, hex_data=None, economy=None):
+        self.players = dict(players or DEFAULT_PLAYERS)
+        self.current_turn = next(iter(self.players))
+        self.turn_number = 1
+        self.hex_data = hex_data if hex_data is not None else {}
+        self.economy = economy or EconomySystem()
+        self.units = {}  # heks -> Unit
+        # Nacje żetonów ("polskie" / "niemieckie"), którymi nie wolno ruszać - na start wszystkie poza aktywną
+        self.locked = {token_nation for side, token_nation in TOKEN_NATIONS.items()
+                       if side != side_of(self.current_turn_nation)}
+
+    @property
+    def current_turn_nation(self):
+        """Nacja gracza, który ma turę."""
+        return self.players.get(self.current_turn, "Nieznana nacja")
+
+    def next_player(self):
+        """Zwraca gracza, który ma turę po bieżącym."""
+        players = list(self.players)
+        return players[(players.index(self.current_turn) + 1) % len(players)]
+
+    def unit_at(self, hex_id):
+        """Zwraca jednostkę stojącą na heksie lub None."""
+        return self.units.get(hex_id)
+
+    def units_of(self, nation):
+        """Zwraca jednostki danej strony."""
+        side = side_of(nation)
+        return [unit for unit in self.units.values() if side_of(unit.nation) == side]
+
+
+class GameEngine:
+    """Operacje gry na GameState, z silnikami ruchu i widoczności dla wczytanej mapy."""
+
+    def __init__(self, state=None, grid=None, neighbor_table=None, seed=None):
+        """
+        Args:
+            state: Stan gry (domyślnie nowa gra)
+            grid, neighbor_table: Mapa (HexGrid, HexNeighborTable) - można podłączyć później attach_map()
+            seed: Ziarno strumienia losowego walki
+        """
+        self.state = state or GameState()
+        self.grid = None
+        self.neighbors = None
+        self.movement = None
+        self.visibility = None
+        self.combat = CombatEngine(seed)
+        if grid is not None:
+            self.attach_map(grid, neighbor_table)
+
+    def attach_map(self, grid, neighbor_table):
+        """Podłącza mapę (HexGrid + HexNeighborTable) i buduje silniki ruchu i widoczności."""
+        self.grid = grid
+        self.neighbors = neighbor_table
+        self.movement = MovementEngine(grid, neighbor_table)
+        self.visibility = VisibilitySystem(grid, neighbor_table)
+        for unit in self.state.units.values():
+            self._track(unit)
+
+    def index_of(self, hex_id):
+        """Zwraca indeks heksu w HexGrid (NO_VALUE bez mapy lub dla heksu spoza siatki)."""
+        return self.grid.index_of(hex_id) if self.grid is not None else NO_VALUE
+
+    def distance(self, a, b):
+        """Zwraca odległość w heksach między heksami (identyfikatory lub indeksy, także tablice indeksów)."""
+        if isinstance(a, str):
+            a = self.index_of(a)
+        if isinstance(b, str):
+            b = self.index_of(b)
+        return self.neighbors.distance(a, b)
+
+    # ----------------------------
+    # Tura i blokady
+    # ----------------------------
+    def is_turn_active(self, nation):
+        """Sprawdza, czy nacja (w dowolnej postaci) należy do gracza, który ma turę."""
+        side = side_of(nation)
+        return side is not None and side == side_of(self.state.current_turn_nation)
+
+    def is_nation_locked(self, nation):
+        """Sprawdza, czy żetony danej nacji są zablokowane."""
+        side = side_of(nation)
+        return side is not None and TOKEN_NATIONS[side] in self.state.locked
+
+    def lock_nation(self, nation):
+        """Blokuje żetony danej nacji."""
+        side = side_of(nation)
+        if side is not None:
+            self.state.locked.add(TOKEN_NATIONS[side])
+
+    def unlock_nation(self, nation):
+        """Odblokowuje żetony danej nacji."""
+        side = side_of(nation)
+        if side is not None:
+            self.state.locked.discard(TOKEN_NATIONS[side])
+
+    def update_locks(self):
+        """Odblokowuje żetony nacji, która ma turę, i blokuje pozostałe."""
+        self.state.locked = {
+            token_nation for side, token_nation in TOKEN_NATIONS.items()
+            if side != side_of(self.state.current_turn_nation)
+        }
+
+    def process_supply(self):
+        """Rozlicza ekonomię nacji, która ma turę (dochód i utrzymanie jednostek na mapie)."""
+        state = self.state
+        state.economy.process_turn(
+            nation=state.current_turn_nation,
+            income=TURN_INCOME,
+            cost_per_unit=UNIT_MAINTENANCE_COST,
+            unit_count=len(state.units)
+        )
+
+    def advance_turn(self):
+        """Przekazuje turę kolejnemu graczowi, odnawia punkty ruchu i ustawia blokady żetonów; zwraca jego nację."""
+        state = self.state
+        state.current_turn = state.next_player()
+        state.turn_number += 1
+        for unit in state.units.values():
+            unit.movement_left = unit.movement_points
+        self.update_locks()
+        return state.current_turn_nation
+
+    def end_turn(self):
+        """
+        Kończy turę bez harmonogramu faz: rozstrzyga walkę, rozlicza ekonomię
+        i przekazuje turę kolejnemu graczowi (pełną turę z fazami wykonuje
+        engine.turns.TurnManager).
+
+        Returns:
+            Nacja, która ma teraz turę
+        """
+        self.resolve_combat()
+        self.process_supply()
+        return self.advance_turn()
+
+    # ----------------------------
+    # Jednostki
+    # ----------------------------
+    def place_unit(self, hex_id, token_data):
+        """
+        Stawia żeton na heksie.
+
+        Returns:
+            Utworzona jednostka (Unit)
+
+        Raises:
+            GameRuleError: Gdy heks jest zajęty lub nie należy do mapy
+        """
+        if hex_id in self.state.units:
+            raise GameRuleError(f"Heks {hex_id} jest zajęty")
+        if self.grid is not None and not self.grid.contains(hex_id):
+            raise GameRuleError(f"Heks {hex_id} nie należy do mapy")
+        unit = Unit.from_token_data(token_data, hex_id)
+        self.state.units[hex_id] = unit
+        self.state.hex_data.setdefault(hex_id, {})["jednostki"] = unit.name
+        self._track(unit)
+        return unit
+
+    def purchase_unit(self, hex_id, token_data):
+        """
+        Kupuje żeton za punkty ekonomiczne jego nacji (purchase_value) i stawia go na heksie.
+
+        Returns:
+            Utworzona jednostka (Unit)
+
+        Raises:
+            GameRuleError: Gdy brakuje punktów, żetony nacji są zablokowane lub heksu nie można zająć
+        """
+        side = side_of(token_data["nation"])
+        cost = token_stat(token_data.get("data") or {}, "purchase_value")
+        if self.is_nation_locked(token_data["nation"]):
+            raise GameRuleError(f"Żetony {token_data['nation']} są zablokowane")
+        points = self.state.economy.get_nation_data(side).get("economic_points", 0)
+        if cost > points:
+            raise GameRuleError(f"Za mało punktów ekonomicznych na {token_data['name']} ({cost} > {points})")
+        unit = self.place_unit(hex_id, token_data)
+        self.state.economy.spend_economic_points(side, cost, f"Zakup {token_data['name']}")
+        return unit
+
+    def remove_unit(self, hex_id):
+        """Zdejmuje jednostkę z heksu; zwraca ją lub None, gdy heks był pusty."""
+        unit = self.state.units.pop(hex_id, None)
+        if unit is None:
+            return None
+        self._clear_hex_unit(hex_id)
+        self._untrack(unit)
+        unit.hex_id = None
+        return unit
+
+    def move_unit(self, from_hex, to_hex, check_range=True):
+        """
+        Przesuwa jednostkę między heksami.
+
+        Args:
+            from_hex: Heks, na którym stoi jednostka
+            to_hex: Heks docelowy
+            check_range: Czy sprawdzić zasięg ruchu jednostki w tej turze (wymaga podłączonej mapy);
+                koszt ruchu jest odejmowany od punktów ruchu pozostałych jednostce do końca tury
+
+        Returns:
+            Przesunięta jednostka (Unit)
+
+        Raises:
+            GameRuleError: Gdy ruch jest niedozwolony
+        """
+        units = self.state.units
+        unit = units.get(from_hex)
+        if unit is None:
+            raise GameRuleError(f"Na heksie {from_hex} nie ma jednostki")
+        if self.is_nation_locked(unit.nation):
+            raise GameRuleError(f"Żetony {unit.nation} są zablokowane")
+        if to_hex in units:
+            raise GameRuleError(f"Heks {to_hex} jest zajęty")
+        if self.grid is not None and not self.grid.contains(to_hex):
+            raise GameRuleError(f"Heks {to_hex} nie należy do mapy")
+        cost = None
+        if self.movement is not None:
+            result = self.reachable(from_hex)
+            target = self.index_of(to_hex)
+            if result is not None and result.can_reach(target):
+                cost = result.costs[target]
+            elif check_range:
+                raise GameRuleError(f"Heks {to_hex} jest poza zasięgiem ruchu jednostki {unit.name}")
+        self.relocate_unit(from_hex, to_hex)
+        # Ruch bez sprawdzania zasięgu do heksu spoza niego zużywa wszystkie punkty ruchu
+        unit.movement_left = max(0, unit.movement_left - cost) if cost is not None else 0
+        return unit
+
+    def relocate_unit(self, from_hex, to_hex):
+        """Przestawia jednostkę na wolny heks bez sprawdzania reguł (ruch, odwrót po walce)."""
+        units = self.state.units
+        unit = units.pop(from_hex)
+        units[to_hex] = unit
+        unit.hex_id = to_hex
+        self._clear_hex_unit(from_hex)
+        self.state.hex_data.setdefault(to_hex, {})["jednostki"] = unit.name
+        if self.grid is not None:
+            target = self.index_of(to_hex)
+            self.movement.vacate(self.index_of(from_hex))
+            self.movement.occupy(target, unit.nation)
+            self.visibility.move_unit(unit.name, target)
+        return unit
+
+    def retreat_hex(self, hex_id, attacker_idx):
+        """Wybiera wolny sąsiedni heks najdalej od atakującego (indeks attacker_idx) lub None."""
+        best, best_distance = None, self.distance(hex_id, attacker_idx)
+        for neighbor in self.neighbors.neighbors_of(self.index_of(hex_id)).tolist():
+            if not self.grid.valid[neighbor]:
+                continue
+            neighbor_id = self.grid.hex_id_of(neighbor)
+            if neighbor_id in self.state.units:
+                continue
+            distance = self.distance(neighbor, attacker_idx)
+            if distance > best_distance:
+                best, best_distance = neighbor_id, distance
+        return best
+
+    # ----------------------------
+    # Walka
+    # ----------------------------
+    def declare_attack(self, attacker_hex, defender_hex):
+        """
+        Deklaruje atak na fazę walki (rozstrzygany razem z pozostałymi w resolve_combat).
+
+        Raises:
+            GameRuleError: Gdy atak jest niedozwolony
+        """
+        attacker = self.state.unit_at(attacker_hex)
+        defender = self.state.unit_at(defender_hex)
+        if attacker is None or defender is None:
+            raise GameRuleError(f"Na heksie {attacker_hex if attacker is None else defender_hex} nie ma jednostki")
+        if side_of(attacker.nation) == side_of(defender.nation):
+            raise GameRuleError(f"Jednostka {attacker.name} nie może atakować własnych wojsk")
+        if self.is_nation_locked(attacker.nation):
+            raise GameRuleError(f"Żetony {attacker.nation} są zablokowane")
+        if attacker.attack_value <= 0:
+            raise GameRuleError(f"Jednostka {attacker.name} nie ma wartości ataku")
+        if self.neighbors is None:
+            raise GameRuleError("Walka wymaga wczytanej mapy")
+        if self.distance(attacker_hex, defender_hex) > max(1, attacker.attack_range):
+            raise GameRuleError(f"Heks {defender_hex} jest poza zasięgiem ataku jednostki {attacker.name}")
+        self.combat.declare(attacker_hex, defender_hex)
+
+    def resolve_combat(self):
+        """Rozstrzyga zadeklarowane ataki (faza walki); zwraca tabelę wyników (engine.combat.RESULT_DTYPE)."""
+        return self.combat.resolve_declared(self)
+
+    def clear_units(self):
+        """Zdejmuje z planszy wszystkie jednostki (dane heksów zostają bez zmian)."""
+        self.state.units.clear()
+        if self.grid is not None:
+            self.movement.clear_occupancy()
+            self.visibility.clear()
+
+    def reachable(self, hex_id):
+        """Zwraca zasięg ruchu (MovementResult) jednostki z heksu za pozostałe w tej turze punkty ruchu lub None."""
+        unit = self.state.units.get(hex_id)
+        idx = self.index_of(hex_id)
+        if unit is None or self.movement is None or unit.movement_left <= 0 or idx == NO_VALUE:
+            return None
+        return self.movement.reachable(unit.name, idx, unit.movement_left, unit.nation,
+                                       self.state.turn_number)
+
+    def _clear_hex_unit(self, hex_id):
+        """Usuwa z danych heksu informację o jednostce (i pusty wpis heksu)."""
+        hex_info = self.state.hex_data.get(hex_id)
+        if hex_info is not None and "jednostki" in hex_info:
+            del hex_info["jednostki"]
+            if not hex_info:
+                del self.state.hex_data[hex_id]
+
+    def _track(self, unit):
+        idx = self.index_of(unit.hex_id)
+        if idx == NO_VALUE:
+            return
+        self.movement.occupy(idx, unit.nation)
+        self.visibility.add_unit(unit.name, unit.nation, idx, unit.sight_range)
+
+    def _untrack(self, unit):
+        idx = self.index_of(unit.hex_id)
+        if idx == NO_VALUE:
+            return
+        self.movement.vacate(idx)
+        self.visibility.remove_unit(unit.name)
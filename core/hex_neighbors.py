@@ -0,0 +1,165 @@
+"""
+Tablice sąsiedztwa heksów wspólne dla systemów gry (ruch, zaopatrzenie,
+strefa kontroli, linia wzroku).
+
+Tabela sąsiadów jest budowana raz na mapę: tablica N x 6 (int32) z indeksami
+heksów HexGrid, gdzie -1 oznacza brak sąsiada (poza mapą). Przesunięcia
+pierścieni i dysków (wszystkie heksy w odległości <= r) są liczone raz dla
+każdej parzystości kolumny i cache'owane do maksymalnego zasięgu jednostek.
+"""
+
+import glob
+import json
+import os
+
+import numpy as np
+
+from core.hex_picker import NEIGHBOR_OFFSETS
+from core.map import NO_VALUE
+
+
+def load_max_token_range(tokens_path, keys=("sight_range", "attack_range")):
+    """Zwraca największy zasięg (widzenia / ataku) spośród wszystkich token_data.json w katalogu żetonów."""
+    token_datas = []
+    pattern = os.path.join(tokens_path, "**", "token_data.json")
+    for token_data_path in glob.glob(pattern, recursive=True):
+        try:
+            with open(token_data_path, "r", encoding="utf-8") as f:
+                token_datas.append(json.load(f))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[UWAGA] Nie udało się odczytać {token_data_path}: {e}")
+    return max_token_range(token_datas, keys)
+
+
+def max_token_range(token_datas, keys=("sight_range", "attack_range")):
+    """Zwraca największy zasięg spośród danych żetonów (słowników w formacie token_data.json)."""
+    max_range = 0
+    for token_data in token_datas:
+        for key in keys:
+            try:
+                max_range = max(max_range, int(token_data.get(key) or 0))
+            except (TypeError, ValueError):
+                continue
+    return max_range
+
+
+def _cube_to_offset_delta(dq, dr, parity):
+    """Zamienia przesunięcie osiowe (dq, dr) na przesunięcie (kolumna, wiersz) dla danej parzystości kolumny."""
+    q = parity + dq
+    return dq, dr + (q - (q & 1)) // 2
+
+
+class HexNeighborTable:
+    """Sąsiedzi, pierścienie i dyski heksów dla jednej mapy (HexGrid)."""
+
+    def __init__(self, grid, max_radius=0):
+        self.grid = grid
+        self.max_radius = max_radius
+        self._ring_cache = {}
+        self._disk_cache = {}
+
+        idx = np.arange(grid.size)
+        self.cols = (idx // grid.grid_rows).astype(np.int32)
+        self.rows = (idx % grid.grid_rows).astype(np.int32)
+
+        # Tablica sąsiadów N x 6
+        self.neighbors = np.full((grid.size, 6), NO_VALUE, dtype=np.int32)
+        for parity in (0, 1):
+            mask = (self.cols & 1) == parity
+            for direction, (dc, dr) in enumerate(NEIGHBOR_OFFSETS[parity]):
+                self.neighbors[mask, direction] = self.offset_targets(
+                    self.cols[mask], self.rows[mask], dc, dr
+                )
+
+        # Przesunięcia dla promieni do maksymalnego zasięgu jednostek
+        for radius in range(max_radius + 1):
+            for parity in (0, 1):
+                self.disk_offsets(radius, parity)
+
+    def offset_targets(self, cols, rows, dc, dr):
+        """Zwraca indeksy heksów przesuniętych o (dc, dr) lub -1 dla heksów spoza mapy."""
+        target_cols = cols + dc
+        target_rows = rows + dr
+        inside = ((target_cols >= 0) & (target_cols < self.grid.grid_cols) &
+                  (target_rows >= 0) & (target_rows < self.grid.grid_rows))
+        targets = np.where(inside, target_cols * self.grid.grid_rows + target_rows, NO_VALUE)
+        targets[inside] = np.where(self.grid.valid[targets[inside]], targets[inside], NO_VALUE)
+        return targets.astype(np.int32)
+
+    # ----------------------------
+    # Przesunięcia pierścieni i dysków
+    # ----------------------------
+    def ring_offsets(self, radius, parity):
+        """Zwraca tablicę K x 2 przesunięć (kolumna, wiersz) heksów w odległości dokładnie radius."""
+        key = (radius, parity)
+        if key not in self._ring_cache:
+            offsets = []
+            for dq in range(-radius, radius + 1):
+                for dr in range(-radius, radius + 1):
+                    if max(abs(dq), abs(dr), abs(dq + dr)) == radius:
+                        offsets.append(_cube_to_offset_delta(dq, dr, parity))
+            self._ring_cache[key] = np.array(offsets, dtype=np.int32).reshape(-1, 2)
+        return self._ring_cache[key]
+
+    def disk_offsets(self, radius, parity):
+        """Zwraca tablicę K x 2 przesunięć heksów w odległości <= radius, uporządkowaną pierścieniami."""
+        key = (radius, parity)
+        if key not in self._disk_cache:
+            rings = [self.ring_offsets(r, parity) for r in range(radius + 1)]
+            self._disk_cache[key] = np.concatenate(rings)
+        return self._disk_cache[key]
+
+    # ----------------------------
+    # Zapytania
+    # ----------------------------
+    def neighbors_of(self, idx):
+        """Zwraca indeksy istniejących sąsiadów heksu."""
+        row = self.neighbors[idx]
+        return row[row != NO_VALUE]
+
+    def _targets(self, idx, offsets_for):
+        """Zwraca indeksy heksów wskazanych przez przesunięcia względem heksu idx (bez heksów spoza mapy)."""
+        col = int(self.cols[idx])
+        offsets = offsets_for(col & 1)
+        targets = self.offset_targets(col, int(self.rows[idx]), offsets[:, 0], offsets[:, 1])
+        return targets[targets != NO_VALUE]
+
+    def ring(self, idx, radius):
+        """Zwraca indeksy heksów w odległości dokładnie radius od heksu idx."""
+        return self._targets(idx, lambda parity: self.ring_offsets(radius, parity))
+
+    def disk(self, idx, radius):
+        """Zwraca indeksy heksów w odległości <= radius od heksu idx (włącznie z nim)."""
+        return self._targets(idx, lambda parity: self.disk_offsets(radius, parity))
+
+    def disk_many(self, indices, radius):
+        """Zwraca tablicę M x K indeksów dysków wokół wielu heksów naraz (-1 dla heksów spoza mapy)."""
+        indices = np.asarray(indices, dtype=np.int64)
+        size = len(self.disk_offsets(radius, 0))
+        result = np.full((len(indices), size), NO_VALUE, dtype=np.int32)
+        cols = self.cols[indices]
+        rows = self.rows[indices]
+        for parity in (0, 1):
+            mask = (cols & 1) == parity
+            if not mask.any():
+                continue
+            offsets = self.disk_offsets(radius, parity)
+            result[mask] = self.offset_targets(
+                cols[mask, None], rows[mask, None], offsets[None, :, 0], offsets[None, :, 1]
+            )
+        return result
+
+    def cube(self, indices):
+        """Zwraca współrzędne sześcienne (x, y, z) heksów jako trzy tablice."""
+        indices = np.asarray(indices)
+        cols = self.cols[indices].astype(np.int64)
+        rows = self.rows[indices].astype(np.int64)
+        x = cols
+        z = rows - (cols - (cols & 1)) // 2
+        return x, -x - z, z
+
+    def distance(self, a, b):
+        """Zwraca odległość w heksach między heksami a i b (działa też na tablicach indeksów)."""
+        ax, ay, az = self.cube(a)
+        bx, by, bz = self.cube(b)
+        return np.maximum(np.maximum(np.abs(ax - bx), np.abs(ay - by)), np.abs(az - bz))
@@ -0,0 +1,216 @@
+"""
+Moduł do szybkiego wyznaczania heksu pod kursorem (pixel -> heks).
+
+Siatka gry jest "flat-topped" z nieparzystymi kolumnami przesuniętymi w dół
+o pół heksu (układ generowany przez generate_hex_positions). Dla takiej siatki
+heks pod punktem wyliczamy arytmetycznie w czasie stałym. Mapy nieregularne
+(np. pozycje heksów wczytane z mapa_dane.json po ręcznej edycji) obsługuje
+kubełkowy indeks przestrzenny, który również odpowiada w czasie stałym.
+Ten sam indeks służy edytorowi mapy do testowania trafienia w wielokąt heksu.
+"""
+
+import math
+
+SQRT3 = math.sqrt(3)
+
+# Przesunięcia sąsiadów (kolumna, wiersz) dla kolumn parzystych i nieparzystych
+NEIGHBOR_OFFSETS = (
+    ((1, -1), (1, 0), (0, 1), (-1, 0), (-1, -1), (0, -1)),  # kolumna parzysta
+    ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (0, -1)),    # kolumna nieparzysta
+)
+
+
+def hex_center(col, row, s):
+    """Zwraca środek heksu (col, row) dla siatki o rozmiarze heksu s."""
+    center_x = s + col * 1.5 * s
+    center_y = (s * SQRT3 / 2) + row * SQRT3 * s
+    if col % 2 == 1:
+        center_y += SQRT3 * s / 2
+    return center_x, center_y
+
+
+def get_hex_vertices(center_x, center_y, s):
+    """Zwraca listę wierzchołków heksagonu (flat-topped)."""
+    return [
+        (center_x - s, center_y),
+        (center_x - s/2, center_y - (SQRT3/2)*s),
+        (center_x + s/2, center_y - (SQRT3/2)*s),
+        (center_x + s, center_y),
+        (center_x + s/2, center_y + (SQRT3/2)*s),
+        (center_x - s/2, center_y + (SQRT3/2)*s)
+    ]
+
+
+def point_in_polygon(x, y, poly):
+    """Zwraca True, jeśli punkt (x, y) leży wewnątrz wielokąta poly (lista krotek (x, y))."""
+    num = len(poly)
+    j = num - 1
+    c = False
+    for i in range(num):
+        if ((poly[i][1] > y) != (poly[j][1] > y)) and \
+           (x < (poly[j][0] - poly[i][0]) * (y - poly[i][1]) / (poly[j][1] - poly[i][1] + 1e-10) + poly[i][0]):
+            c = not c
+        j = i
+    return c
+
+
+def pixel_to_offset(x, y, s):
+    """Zamienia punkt (x, y) na współrzędne (kolumna, wiersz) heksu, którego środek jest najbliżej."""
+    # Przesunięcie tak, aby środek heksu 0_0 wypadał w początku układu
+    px = x - s
+    py = y - s * SQRT3 / 2
+
+    # Współrzędne osiowe dla heksów flat-topped
+    q = (2.0 / 3.0 * px) / s
+    r = (-1.0 / 3.0 * px + SQRT3 / 3.0 * py) / s
+
+    # Zaokrąglenie we współrzędnych sześciennych
+    cx, cz = q, r
+    cy = -cx - cz
+    rx, ry, rz = round(cx), round(cy), round(cz)
+    dx, dy, dz = abs(rx - cx), abs(ry - cy), abs(rz - cz)
+    if dx > dy and dx > dz:
+        rx = -ry - rz
+    elif dy <= dz:
+        rz = -rx - ry
+
+    col = int(rx)
+    row = int(rz + (rx - (rx & 1)) // 2)
+    return col, row
+
+
+class HexBucketIndex:
+    """
+    Jednolita siatka kubełków nad środkami heksów.
+
+    Każdy heks trafia do wszystkich kubełków, które przecina jego prostokąt
+    otaczający, razem z gotową listą wierzchołków. Przy kubełku o boku równym
+    rozmiarowi heksu test trafienia sprawdza zwykle 2-3 wielokąty.
+    """
+
+    def __init__(self, hex_centers, hex_size, cell_size=None):
+        self.hex_size = hex_size
+        self.cell_size = cell_size or hex_size
+        self.buckets = {}
+        half_height = SQRT3 / 2 * hex_size
+        for hex_id, (center_x, center_y) in hex_centers.items():
+            entry = (hex_id, center_x, center_y, get_hex_vertices(center_x, center_y, hex_size))
+            min_bx = int((center_x - hex_size) // self.cell_size)
+            max_bx = int((center_x + hex_size) // self.cell_size)
+            min_by = int((center_y - half_height) // self.cell_size)
+            max_by = int((center_y + half_height) // self.cell_size)
+            for bx in range(min_bx, max_bx + 1):
+                for by in range(min_by, max_by + 1):
+                    self.buckets.setdefault((bx, by), []).append(entry)
+
+    def hex_at(self, x, y):
+        """Zwraca identyfikator heksu, którego wielokąt zawiera punkt (x, y), lub None."""
+        key = (int(x // self.cell_size), int(y // self.cell_size))
+        for hex_id, _, _, vertices in self.buckets.get(key, ()):
+            if point_in_polygon(x, y, vertices):
+                return hex_id
+        return None
+
+    def nearest(self, x, y, max_distance=None):
+        """Zwraca (hex_id, odległość) najbliższego środka heksu lub (None, inf)."""
+        bx = int(x // self.cell_size)
+        by = int(y // self.cell_size)
+        if max_distance is not None:
+            max_ring = int(max_distance // self.cell_size) + 1
+        else:
+            max_ring = None
+
+        best_hex = None
+        best_dist_sq = float('inf')
+        ring = 0
+        while self.buckets:
+            for key in self._ring_keys(bx, by, ring):
+                for hex_id, center_x, center_y, _ in self.buckets.get(key, ()):
+                    dist_sq = (center_x - x) ** 2 + (center_y - y) ** 2
+                    if dist_sq < best_dist_sq:
+                        best_dist_sq = dist_sq
+                        best_hex = hex_id
+            # Kubełki spoza sprawdzonych pierścieni leżą dalej niż ring * cell_size
+            if best_hex is not None and best_dist_sq <= (ring * self.cell_size) ** 2:
+                break
+            if max_ring is not None and ring >= max_ring:
+                break
+            ring += 1
+
+        if best_hex is None:
+            return None, float('inf')
+        return best_hex, math.sqrt(best_dist_sq)
+
+    @staticmethod
+    def _ring_keys(bx, by, ring):
+        """Zwraca klucze kubełków leżących na obwodzie kwadratu o promieniu ring."""
+        if ring == 0:
+            return [(bx, by)]
+        keys = []
+        for i in range(-ring, ring + 1):
+            keys.append((bx + i, by - ring))
+            keys.append((bx + i, by + ring))
+        for j in range(-ring + 1, ring):
+            keys.append((bx - ring, by + j))
+            keys.append((bx + ring, by + j))
+        return keys
+
+
+class HexPicker:
+    """Wyznacza heks pod punktem mapy w czasie stałym, niezależnie od rozmiaru mapy."""
+
+    def __init__(self, hex_centers, hex_size):
+        self.hex_centers = hex_centers
+        self.hex_size = hex_size
+        self.regular = self._is_regular_layout()
+        self.bucket_index = None
+        if not self.regular:
+            print("[INFO] Nieregularny układ heksów - używam indeksu kubełkowego")
+            self.bucket_index = HexBucketIndex(hex_centers, hex_size)
+
+    def _is_regular_layout(self):
+        """Sprawdza, czy wszystkie środki heksów zgadzają się z wzorem generate_hex_positions."""
+        s = self.hex_size
+        for hex_id, (center_x, center_y) in self.hex_centers.items():
+            try:
+                col, row = map(int, hex_id.split('_'))
+            except ValueError:
+                return False
+            expected_x, expected_y = hex_center(col, row, s)
+            if abs(expected_x - center_x) > 0.01 or abs(expected_y - center_y) > 0.01:
+                return False
+        return True
+
+    def nearest(self, x, y, max_distance=None):
+        """Zwraca (hex_id, odległość) heksu o środku najbliższym punktowi (x, y) we współrzędnych mapy."""
+        if not self.regular:
+            return self.bucket_index.nearest(x, y, max_distance)
+
+        col, row = pixel_to_offset(x, y, self.hex_size)
+        hex_id = f"{col}_{row}"
+        if hex_id in self.hex_centers:
+            # W regularnej siatce heks zawierający punkt ma najbliższy środek
+            center_x, center_y = self.hex_centers[hex_id]
+            return hex_id, math.hypot(center_x - x, center_y - y)
+
+        # Punkt poza mapą (lub w heksie pominiętym) - sprawdź istniejących sąsiadów
+        best_hex = None
+        best_dist = float('inf')
+        for dc, dr in NEIGHBOR_OFFSETS[col & 1]:
+            neighbor_id = f"{col + dc}_{row + dr}"
+            if neighbor_id in self.hex_centers:
+                center_x, center_y = self.hex_centers[neighbor_id]
+                dist = math.hypot(center_x - x, center_y - y)
+                if dist < best_dist:
+                    best_dist = dist
+                    best_hex = neighbor_id
+        return best_hex, best_dist
+
+    def pick(self, x, y, max_distance=None):
+        """Zwraca identyfikator heksu pod punktem (x, y) lub None, jeśli punkt jest zbyt daleko."""
+        hex_id, distance = self.nearest(x, y, max_distance)
+        if hex_id is None:
+            return None
+        if max_distance is not None and distance > max_distance:
+            return None
+        return hex_id
@@ -0,0 +1,322 @@
+"""
+Model mapy heksagonalnej oparty na tablicach NumPy.
+
+Każdy heks ma całkowity indeks idx = kolumna * grid_rows + wiersz, a wszystkie
+jego dane (środek, modyfikatory terenu, typ terenu, kluczowy punkt) leżą
+w ciągłych tablicach. Identyfikatory tekstowe "kolumna_wiersz" pojawiają się
+tylko na styku z plikami JSON i interfejsem użytkownika.
+
+Plik mapy nie przechowuje środków heksów - wynikają one z konfiguracji
+(hex_size, grid_cols, grid_rows). Zapisywana jest tylko maska heksów
+należących do mapy ("hex_mask": bity upakowane np.packbits w base64) oraz,
+dla ręcznie przesuniętych heksów, ich środki w "hex_centers". Starsze pliki
+z pełnym "hex_centers" są nadal obsługiwane.
+"""
+
+import base64
+import math
+
+import numpy as np
+
+SQRT3 = math.sqrt(3)
+
+# Kod oznaczający brak wartości (np. heks bez kluczowego punktu)
+NO_VALUE = -1
+
+
+class HexGrid:
+    """Prostokątna siatka heksów (flat-topped, nieparzyste kolumny przesunięte w dół)."""
+
+    def __init__(self, grid_cols, grid_rows, hex_size=30, hex_defaults=None, terrain_types=None):
+        self.grid_cols = int(grid_cols)
+        self.grid_rows = int(grid_rows)
+        self.hex_size = hex_size
+        self.hex_defaults = dict(hex_defaults or {"defense_mod": 0, "move_mod": 0})
+        self.size = self.grid_cols * self.grid_rows
+
+        # Nazwy typów terenu i kluczowych punktów - tablice trzymają tylko ich kody
+        self.terrain_types = dict(terrain_types or {})
+        self.terrain_names = list(self.terrain_types.keys())
+        self.key_point_type_names = []
+
+        default_move = self.hex_defaults.get("move_mod", 0)
+        default_defense = self.hex_defaults.get("defense_mod", 0)
+
+        self.valid = np.zeros(self.size, dtype=bool)
+        self.centers = np.zeros((self.size, 2), dtype=np.float64)
+        self.move_mod = np.full(self.size, default_move, dtype=np.int16)
+        self.defense_mod = np.full(self.size, default_defense, dtype=np.int16)
+        self.terrain = np.full(self.size, NO_VALUE, dtype=np.int16)
+        self.key_point_type = np.full(self.size, NO_VALUE, dtype=np.int16)
+        self.key_point_value = np.zeros(self.size, dtype=np.int32)
+
+    # ----------------------------
+    # Tworzenie siatki
+    # ----------------------------
+    @classmethod
+    def from_map_data(cls, map_data):
+        """Buduje siatkę z danych w formacie mapa_dane.json."""
+        config = map_data.get("config", {})
+        hex_centers = map_data.get("hex_centers", {})
+        hex_mask = map_data.get("hex_mask")
+        grid_cols = config.get("grid_cols", 56)
+        grid_rows = config.get("grid_rows", 40)
+        if hex_mask:
+            grid_cols = max(grid_cols, hex_mask["cols"])
+            grid_rows = max(grid_rows, hex_mask["rows"])
+
+        # Mapy z heksami spoza konfiguracji - powiększ siatkę tak, aby je objęła
+        centers = {}
+        for hex_id, coords in hex_centers.items():
+            try:
+                col, row = parse_hex_id(hex_id)
+            except ValueError:
+                print(f"[UWAGA] Pominięto środek heksu o niepoprawnym identyfikatorze: {hex_id!r}")
+                continue
+            centers[hex_id] = coords
+            grid_cols = max(grid_cols, col + 1)
+            grid_rows = max(grid_rows, row + 1)
+
+        grid = cls(
+            grid_cols, grid_rows,
+            hex_size=config.get("hex_size", 30),
+            hex_defaults=map_data.get("defaults", {}).get("hex"),
+            terrain_types=map_data.get("terrain_types"),
+        )
+
+        grid.centers[:] = grid.generated_centers()
+        if hex_mask:
+            grid.valid[:] = decode_hex_mask(hex_mask, grid.grid_cols, grid.grid_rows)
+        elif not hex_centers:
+            grid.valid[:] = True
+        # Środki zapisane w pliku: wszystkie (stary format) lub tylko przesunięte ręcznie
+        for hex_id, coords in centers.items():
+            if isinstance(coords, (list, tuple)) and len(coords) == 2:
+                idx = grid.index_of(hex_id)
+                if idx == NO_VALUE:
+                    print(f"[UWAGA] Pominięto środek heksu spoza siatki: {hex_id}")
+                    continue
+                grid.valid[idx] = True
+                grid.centers[idx] = coords
+
+        grid.load_hex_data(map_data.get("hex_data", {}))
+        grid.load_key_points(map_data.get("key_points", {}))
+        return grid
+
+    def generated_centers(self):
+        """Zwraca środki wszystkich heksów siatki wyliczone wektorowo (tablica N x 2)."""
+        s = self.hex_size
+        idx = np.arange(self.size)
+        cols = idx // self.grid_rows
+        rows = idx % self.grid_rows
+        centers = np.empty((self.size, 2), dtype=np.float64)
+        centers[:, 0] = s + cols * 1.5 * s
+        centers[:, 1] = (s * SQRT3 / 2) + rows * SQRT3 * s + (cols & 1) * (SQRT3 * s / 2)
+        return centers
+
+    def load_hex_data(self, hex_data):
+        """Wczytuje modyfikatory terenu z rzadkiego słownika hex_data."""
+        for hex_id, terrain in hex_data.items():
+            idx = self.index_of(hex_id)
+            if idx == NO_VALUE:
+                continue
+            if "move_mod" in terrain:
+                self.move_mod[idx] = terrain["move_mod"]
+            if "defense_mod" in terrain:
+                self.defense_mod[idx] = terrain["defense_mod"]
+            self.terrain[idx] = self.terrain_code(terrain)
+
+    def load_key_points(self, key_points):
+        """Wczytuje kluczowe punkty z danych mapy."""
+        for hex_id, key_point in key_points.items():
+            idx = self.index_of(hex_id)
+            if idx == NO_VALUE:
+                continue
+            self.set_key_point(idx, key_point.get("type"), key_point.get("value", 0))
+
+    # ----------------------------
+    # Tłumaczenie identyfikatorów
+    # ----------------------------
+    def index(self, col, row):
+        """Zwraca indeks heksu (col, row) lub NO_VALUE, jeśli heks leży poza siatką."""
+        if 0 <= col < self.grid_cols and 0 <= row < self.grid_rows:
+            return col * self.grid_rows + row
+        return NO_VALUE
+
+    def index_of(self, hex_id):
+        """Zamienia identyfikator "kolumna_wiersz" na indeks heksu."""
+        try:
+            col, row = parse_hex_id(hex_id)
+        except ValueError:
+            return NO_VALUE
+        return self.index(col, row)
+
+    def hex_id_of(self, idx):
+        """Zamienia indeks heksu na identyfikator "kolumna_wiersz"."""
+        col, row = divmod(int(idx), self.grid_rows)
+        return f"{col}_{row}"
+
+    def col_row(self, idx):
+        """Zwraca (kolumna, wiersz) heksu o podanym indeksie."""
+        return divmod(int(idx), self.grid_rows)
+
+    def valid_indices(self):
+        """Zwraca tablicę indeksów heksów należących do mapy."""
+        return np.flatnonzero(self.valid)
+
+    def contains(self, hex_id):
+        """Sprawdza, czy heks o podanym identyfikatorze należy do mapy."""
+        idx = self.index_of(hex_id)
+        return idx != NO_VALUE and bool(self.valid[idx])
+
+    # ----------------------------
+    # Dane heksów
+    # ----------------------------
+    def terrain_code(self, terrain):
+        """Zwraca kod typu terenu pasującego do modyfikatorów (pierwszy pasujący typ)."""
+        name = terrain.get("terrain")
+        if name in self.terrain_types:
+            return self.terrain_names.index(name)
+        for code, terrain_name in enumerate(self.terrain_names):
+            mods = self.terrain_types[terrain_name]
+            if (mods.get("move_mod") == terrain.get("move_mod") and
+                    mods.get("defense_mod") == terrain.get("defense_mod")):
+                return code
+        return NO_VALUE
+
+    def terrain_name(self, idx):
+        """Zwraca nazwę typu terenu heksu lub None."""
+        code = int(self.terrain[idx])
+        return self.terrain_names[code] if code != NO_VALUE else None
+
+    def set_terrain(self, idx, terrain_name, move_mod, defense_mod):
+        """Ustawia teren heksu."""
+        if terrain_name is not None and terrain_name not in self.terrain_types:
+            self.terrain_types[terrain_name] = {"move_mod": move_mod, "defense_mod": defense_mod}
+            self.terrain_names.append(terrain_name)
+        self.terrain[idx] = self.terrain_names.index(terrain_name) if terrain_name is not None else NO_VALUE
+        self.move_mod[idx] = move_mod
+        self.defense_mod[idx] = defense_mod
+
+    def set_key_point(self, idx, point_type, value):
+        """Ustawia kluczowy punkt na heksie (point_type None usuwa punkt)."""
+        if point_type is None:
+            self.key_point_type[idx] = NO_VALUE
+            self.key_point_value[idx] = 0
+            return
+        if point_type not in self.key_point_type_names:
+            self.key_point_type_names.append(point_type)
+        self.key_point_type[idx] = self.key_point_type_names.index(point_type)
+        self.key_point_value[idx] = value
+
+    def key_point(self, idx):
+        """Zwraca kluczowy punkt heksu w formacie JSON ({"type", "value"}) lub None."""
+        code = int(self.key_point_type[idx])
+        if code == NO_VALUE:
+            return None
+        return {"type": self.key_point_type_names[code], "value": int(self.key_point_value[idx])}
+
+    def center(self, idx):
+        """Zwraca środek heksu jako krotkę (x, y)."""
+        x, y = self.centers[idx]
+        return float(x), float(y)
+
+    def modified_mask(self):
+        """Zwraca maskę heksów o modyfikatorach innych niż domyślne."""
+        return ((self.move_mod != self.hex_defaults.get("move_mod", 0)) |
+                (self.defense_mod != self.hex_defaults.get("defense_mod", 0))) & self.valid
+
+    # ----------------------------
+    # Eksport na styku z JSON / UI
+    # ----------------------------
+    def hex_info(self, idx):
+        """Zwraca dane terenu heksu w formacie używanym przez interfejs."""
+        info = {
+            "move_mod": int(self.move_mod[idx]),
+            "defense_mod": int(self.defense_mod[idx]),
+        }
+        name = self.terrain_name(idx)
+        if name is not None:
+            info["teren"] = name
+        key_point = self.key_point(idx)
+        if key_point is not None:
+            info["kluczowy_punkt"] = f"{key_point['type']} ({key_point['value']})"
+        return info
+
+    def to_hex_data(self):
+        """Zwraca rzadki słownik hex_data (tylko heksy niestandardowe) do zapisu w JSON."""
+        hex_data = {}
+        for idx in np.flatnonzero(self.modified_mask()):
+            hex_data[self.hex_id_of(idx)] = {
+                "move_mod": int(self.move_mod[idx]),
+                "defense_mod": int(self.defense_mod[idx]),
+            }
+        return hex_data
+
+    def to_key_points(self):
+        """Zwraca słownik kluczowych punktów do zapisu w JSON."""
+        return {
+            self.hex_id_of(idx): self.key_point(idx)
+            for idx in np.flatnonzero(self.key_point_type != NO_VALUE)
+        }
+
+    def clip_to_image(self, width, height):
+        """Ogranicza mapę do heksów mieszczących się w całości na obrazie width x height."""
+        s = self.hex_size
+        inside = ((self.centers[:, 0] + s <= width) &
+                  (self.centers[:, 1] + s * SQRT3 / 2 <= height))
+        self.valid &= inside
+
+    def moved_centers(self, tolerance=0.01):
+        """Zwraca środki heksów przesuniętych względem układu wynikającego z konfiguracji."""
+        offset = np.abs(self.centers - self.generated_centers()).max(axis=1)
+        indices = np.flatnonzero((offset > tolerance) & self.valid)
+        return {self.hex_id_of(idx): [float(x), float(y)] for idx, (x, y) in zip(indices, self.centers[indices])}
+
+    def centers_dict(self):
+        """Zwraca słownik "kolumna_wiersz" -> (x, y) dla kodu operującego na identyfikatorach."""
+        indices = self.valid_indices()
+        return {
+            self.hex_id_of(idx): (float(x), float(y))
+            for idx, (x, y) in zip(indices, self.centers[indices])
+        }
+
+
+def encode_hex_mask(valid, grid_cols, grid_rows):
+    """Koduje maskę heksów mapy (tablica bool o długości cols * rows) do zapisu w JSON."""
+    bits = np.packbits(np.asarray(valid, dtype=bool))
+    return {"cols": int(grid_cols), "rows": int(grid_rows), "bits": base64.b64encode(bits.tobytes()).decode("ascii")}
+
+
+def decode_hex_mask(hex_mask, grid_cols, grid_rows):
+    """Dekoduje maskę z encode_hex_mask do siatki grid_cols x grid_rows (może być większa niż zapisana)."""
+    cols, rows = hex_mask["cols"], hex_mask["rows"]
+    bits = np.frombuffer(base64.b64decode(hex_mask["bits"]), dtype=np.uint8)
+    stored = np.unpackbits(bits, count=cols * rows).astype(bool).reshape(cols, rows)
+    valid = np.zeros((grid_cols, grid_rows), dtype=bool)
+    valid[:cols, :rows] = stored
+    return valid.ravel()
+
+
+def compact_map_data(map_data):
+    """
+    Zamienia dane mapy z pełnym "hex_centers" na format z maską heksów.
+
+    Zachowywane są tylko środki heksów przesuniętych ręcznie.
+    """
+    grid = HexGrid.from_map_data(map_data)
+    compact = {key: value for key, value in map_data.items() if key != "hex_centers"}
+    config = dict(compact.get("config", {}))
+    config["grid_cols"], config["grid_rows"] = grid.grid_cols, grid.grid_rows
+    compact["config"] = config
+    compact["hex_mask"] = encode_hex_mask(grid.valid, grid.grid_cols, grid.grid_rows)
+    moved = grid.moved_centers()
+    if moved:
+        compact["hex_centers"] = moved
+    return compact
+
+
+def parse_hex_id(hex_id):
+    """Zamienia identyfikator "kolumna_wiersz" na krotkę (kolumna, wiersz)."""
+    col, row = hex_id.split('_')
+    return int(col), int(row)
@@ -0,0 +1,386 @@
+"""
+Binarny format zapisu gry (.sav) z wczytywaniem częściowym i strumieniowym.
+
+Układ pliku (little-endian):
+    nagłówek:  b"KSAV", wersja (u16), flagi (u16), liczba sekcji (u16)
+    sekcje:    znacznik (4 bajty), długość (u32), zawartość
+
+Sekcje:
+    STRS - tablica napisów: liczba (u32), potem długość (u16) i UTF-8 każdego
+           napisu; indeks 0 to zawsze pusty napis
+    META - pozostałe pola stanu gry (np. current_turn) jako JSON
+    HEXS - stan heksów jako spakowane kolumny: liczba heksów (u32), liczba pól
+           (u16), indeksy identyfikatorów heksów (u32[n]), a dla każdego pola:
+           nazwa (u32), typ (u8), maska obecności (u8[n]), wartości
+           (i4/f8/indeks napisu u32/indeks napisu z JSON-em)
+    TOKS - żetony jako rekordy stałej długości (TOKEN_DTYPE): indeksy napisów
+           heksu, nazwy, nacji, ścieżki i ścieżki oryginału oraz 32-bajtowy
+           skrót SHA-256 obrazu (zera, gdy brak)
+
+Sekcje są poprzedzone długością, więc czytelnik może pominąć niepotrzebne
+(np. wczytać stan planszy bez żetonów), a żetony czytać porcjami.
+Format słownikowy (taki jak dotychczasowy save_game.json) jest formatem
+wymiany: read_save()/write_save() oraz funkcje import_json()/export_json().
+
+Konwersja z wiersza poleceń:
+    python -m core.save_format saves/save_game.json saves/save_game.sav
+"""
+
+import json
+import os
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+SAVE_MAGIC = b"KSAV"
+SAVE_VERSION = 1
+
+# Liczba żetonów czytanych naraz przy wczytywaniu strumieniowym
+TOKEN_CHUNK_SIZE = 16
+
+_HEADER = struct.Struct("<4sHHH")
+_SECTION = struct.Struct("<4sI")
+
+# Typy kolumn stanu heksów
+_COLUMN_INT = 1
+_COLUMN_FLOAT = 2
+_COLUMN_STRING = 3
+_COLUMN_JSON = 4
+
+_COLUMN_DTYPES = {
+    _COLUMN_INT: np.dtype("<i4"),
+    _COLUMN_FLOAT: np.dtype("<f8"),
+    _COLUMN_STRING: np.dtype("<u4"),
+    _COLUMN_JSON: np.dtype("<u4"),
+}
+
+TOKEN_DTYPE = np.dtype([
+    ("hex", "<u4"),
+    ("name", "<u4"),
+    ("nation", "<u4"),
+    ("path", "<u4"),
+    ("original_path", "<u4"),
+    ("image", "V32"),
+])
+
+_EMPTY_DIGEST = bytes(32)
+
+
+class SaveFormatError(ValueError):
+    """Plik nie jest poprawnym zapisem gry w formacie binarnym."""
+
+
+def is_binary_save(path):
+    """Sprawdza po nagłówku, czy plik jest zapisem binarnym."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(SAVE_MAGIC)) == SAVE_MAGIC
+    except OSError:
+        return False
+
+
+# ----------------------------
+# Zapis
+# ----------------------------
+class _StringTable:
+    """Tablica napisów budowana przy zapisie (każdy napis zapisany raz)."""
+
+    def __init__(self):
+        self.strings = [""]
+        self.index = {"": 0}
+
+    def add(self, text):
+        text = "" if text is None else str(text)
+        idx = self.index.get(text)
+        if idx is None:
+            idx = self.index[text] = len(self.strings)
+            self.strings.append(text)
+        return idx
+
+    def pack(self):
+        parts = [struct.pack("<I", len(self.strings))]
+        for text in self.strings:
+            data = text.encode("utf-8")
+            if len(data) > 0xFFFF:
+                raise SaveFormatError(f"Napis zbyt długi do zapisu ({len(data)} bajtów)")
+            parts.append(struct.pack("<H", len(data)))
+            parts.append(data)
+        return b"".join(parts)
+
+
+def _column_type(values):
+    """Dobiera typ kolumny do wartości pola (pomijając brakujące)."""
+    present = [value for value in values if value is not None]
+    if all(isinstance(value, int) and not isinstance(value, bool) and -2**31 <= value < 2**31
+           for value in present):
+        return _COLUMN_INT
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return _COLUMN_FLOAT
+    if all(isinstance(value, str) for value in present):
+        return _COLUMN_STRING
+    return _COLUMN_JSON
+
+
+def _pack_hex_data(hex_data, strings):
+    hex_ids = list(hex_data)
+    fields = []
+    for data in hex_data.values():
+        for field in data:
+            if field not in fields:
+                fields.append(field)
+
+    parts = [
+        struct.pack("<IH", len(hex_ids), len(fields)),
+        np.array([strings.add(hex_id) for hex_id in hex_ids], dtype="<u4").tobytes(),
+    ]
+    for field in fields:
+        values = [hex_data[hex_id].get(field) for hex_id in hex_ids]
+        column_type = _column_type(values)
+        present = np.array([value is not None for value in values], dtype=np.uint8)
+        if column_type == _COLUMN_STRING:
+            values = [strings.add(value) if value is not None else 0 for value in values]
+        elif column_type == _COLUMN_JSON:
+            values = [strings.add(json.dumps(value, ensure_ascii=False)) if value is not None else 0
+                      for value in values]
+        else:
+            values = [value if value is not None else 0 for value in values]
+        parts.append(struct.pack("<IB", strings.add(field), column_type))
+        parts.append(present.tobytes())
+        parts.append(np.array(values, dtype=_COLUMN_DTYPES[column_type]).tobytes())
+    return b"".join(parts)
+
+
+def _pack_tokens(placed_tokens, strings):
+    records = np.zeros(len(placed_tokens), dtype=TOKEN_DTYPE)
+    for i, (hex_id, token) in enumerate(placed_tokens.items()):
+        digest = token.get("image") or ""
+        records[i] = (
+            strings.add(hex_id),
+            strings.add(token.get("name")),
+            strings.add(token.get("nation")),
+            strings.add(token.get("path")),
+            strings.add(token.get("original_path")),
+            bytes.fromhex(digest) if digest else _EMPTY_DIGEST,
+        )
+    return records.tobytes()
+
+
+def write_save(path, game_state):
+    """
+    Zapisuje stan gry (słownik w formacie save_game.json) do pliku binarnego.
+
+    Plik jest podmieniany atomowo (plik tymczasowy w tym samym katalogu + os.replace).
+
+    Args:
+        path: Ścieżka pliku .sav
+        game_state: {"placed_tokens": {...}, "hex_data": {...}, pozostałe pola...}
+    """
+    strings = _StringTable()
+    meta = {key: value for key, value in game_state.items() if key not in ("placed_tokens", "hex_data")}
+    # Kolejność budowy ma znaczenie - tablica napisów musi zawierać napisy pozostałych sekcji
+    sections = [
+        (b"META", json.dumps(meta, ensure_ascii=False).encode("utf-8")),
+        (b"HEXS", _pack_hex_data(game_state.get("hex_data", {}), strings)),
+        (b"TOKS", _pack_tokens(game_state.get("placed_tokens", {}), strings)),
+    ]
+    sections.insert(0, (b"STRS", strings.pack()))
+
+    # Zapis do pliku tymczasowego i zamiana - przerwany zapis nie uszkodzi poprzedniego pliku
+    fd, temp_path = tempfile.mkstemp(prefix=".save_", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, 0, len(sections)))
+            for tag, payload in sections:
+                f.write(_SECTION.pack(tag, len(payload)))
+                f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+# ----------------------------
+# Odczyt
+# ----------------------------
+class SaveReader:
+    """
+    Czytelnik zapisu binarnego.
+
+    Przy otwarciu czytany jest tylko nagłówek, spis sekcji i tablica napisów;
+    stan heksów i żetony wczytywane są dopiero na żądanie.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.sections = {}  # znacznik -> (przesunięcie zawartości, długość)
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise SaveFormatError(f"Plik {path} jest zbyt krótki")
+            magic, self.version, self.flags, count = _HEADER.unpack(header)
+            if magic != SAVE_MAGIC:
+                raise SaveFormatError(f"Plik {path} nie jest zapisem gry")
+            if self.version > SAVE_VERSION:
+                raise SaveFormatError(f"Nieobsługiwana wersja zapisu: {self.version}")
+
+            for _ in range(count):
+                section = f.read(_SECTION.size)
+                if len(section) < _SECTION.size:
+                    raise SaveFormatError(f"Uszkodzony spis sekcji w pliku {path}")
+                tag, length = _SECTION.unpack(section)
+                self.sections[tag] = (f.tell(), length)
+                f.seek(length, os.SEEK_CUR)
+
+            self.strings = self._read_strings(f)
+            self.meta = json.loads(self._read_section(f, b"META").decode("utf-8") or "{}")
+
+    def _read_section(self, f, tag):
+        if tag not in self.sections:
+            return b""
+        offset, length = self.sections[tag]
+        f.seek(offset)
+        data = f.read(length)
+        if len(data) < length:
+            raise SaveFormatError(f"Sekcja {tag.decode()} jest niepełna")
+        return data
+
+    def _read_strings(self, f):
+        data = self._read_section(f, b"STRS")
+        if not data:
+            return [""]
+        count, = struct.unpack_from("<I", data, 0)
+        pos = 4
+        strings = []
+        for _ in range(count):
+            length, = struct.unpack_from("<H", data, pos)
+            pos += 2
+            strings.append(data[pos:pos + length].decode("utf-8"))
+            pos += length
+        return strings
+
+    @property
+    def token_count(self):
+        """Liczba żetonów w zapisie (bez ich wczytywania)."""
+        return self.sections.get(b"TOKS", (0, 0))[1] // TOKEN_DTYPE.itemsize
+
+    def read_hex_data(self):
+        """Wczytuje stan heksów jako słownik {hex_id: {pole: wartość}}."""
+        with open(self.path, "rb") as f:
+            data = self._read_section(f, b"HEXS")
+        if not data:
+            return {}
+
+        count, field_count = struct.unpack_from("<IH", data, 0)
+        pos = 6
+        hex_ids = np.frombuffer(data, dtype="<u4", count=count, offset=pos)
+        pos += hex_ids.nbytes
+        hex_data = {self.strings[idx]: {} for idx in hex_ids}
+        keys = [self.strings[idx] for idx in hex_ids]
+
+        for _ in range(field_count):
+            name_idx, column_type = struct.unpack_from("<IB", data, pos)
+            pos += 5
+            present = np.frombuffer(data, dtype=np.uint8, count=count, offset=pos)
+            pos += count
+            values = np.frombuffer(data, dtype=_COLUMN_DTYPES[column_type], count=count, offset=pos)
+            pos += values.nbytes
+
+            field = self.strings[name_idx]
+            for i in np.flatnonzero(present):
+                value = values[i]
+                if column_type == _COLUMN_STRING:
+                    value = self.strings[value]
+                elif column_type == _COLUMN_JSON:
+                    value = json.loads(self.strings[value])
+                else:
+                    value = value.item()
+                hex_data[keys[i]][field] = value
+        return hex_data
+
+    def iter_token_chunks(self, chunk_size=TOKEN_CHUNK_SIZE):
+        """Zwraca kolejne porcje żetonów - listy par (hex_id, dane żetonu)."""
+        if b"TOKS" not in self.sections:
+            return
+        offset, length = self.sections[b"TOKS"]
+        record_size = TOKEN_DTYPE.itemsize
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            remaining = length // record_size
+            while remaining:
+                count = min(chunk_size, remaining)
+                records = np.frombuffer(f.read(count * record_size), dtype=TOKEN_DTYPE)
+                remaining -= count
+                yield [self._token(record) for record in records]
+
+    def iter_tokens(self):
+        """Zwraca kolejno pary (hex_id, dane żetonu)."""
+        for chunk in self.iter_token_chunks():
+            yield from chunk
+
+    def _token(self, record):
+        digest = bytes(record["image"])
+        strings = self.strings
+        return strings[record["hex"]], {
+            "name": strings[record["name"]],
+            "nation": strings[record["nation"]],
+            "image": digest.hex() if digest != _EMPTY_DIGEST else "",
+            "path": strings[record["path"]],
+            "original_path": strings[record["original_path"]],
+        }
+
+
+def read_save(path):
+    """Wczytuje cały zapis binarny jako słownik w formacie save_game.json."""
+    reader = SaveReader(path)
+    game_state = dict(reader.meta)
+    game_state["placed_tokens"] = dict(reader.iter_tokens())
+    game_state["hex_data"] = reader.read_hex_data()
+    return game_state
+
+
+# ----------------------------
+# Import / eksport JSON
+# ----------------------------
+def export_json(save_path, json_path):
+    """Zapisuje zapis binarny jako JSON (format dawnego save_game.json)."""
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(read_save(save_path), f, indent=4, ensure_ascii=False)
+
+
+def import_json(json_path, save_path):
+    """Zamienia zapis JSON na zapis binarny."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        write_save(save_path, json.load(f))
+
+
+def convert(source, target):
+    """Konwertuje zapis w dowolną stronę - kierunek wynika z formatu pliku źródłowego."""
+    if is_binary_save(source):
+        export_json(source, target)
+    else:
+        import_json(source, target)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Użycie: python -m core.save_format <plik źródłowy> <plik docelowy>")
+        return 2
+    try:
+        convert(argv[0], argv[1])
+    except (OSError, ValueError) as e:
+        print(f"[BŁĄD] Konwersja zapisu nie powiodła się: {e}")
+        return 1
+    print(f"[INFO] Zapisano {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Katalog żetonów z folderu tokeny/ z manifestem przyspieszającym start gry.
+
+Manifest (catalog_manifest.json w katalogu żetonów) zapamiętuje dla każdego
+żetonu ścieżkę PNG, nację, dane z token_data.json oraz czasy modyfikacji
+katalogu żetonu i pliku token_data.json. Przy starcie wystarczy jeden odczyt
+manifestu i sprawdzenie czasów modyfikacji (os.stat, bez otwierania plików).
+Ponownie skanowane są tylko katalogi, które się zmieniły.
+"""
+
+import json
+import os
+
+MANIFEST_FILENAME = "catalog_manifest.json"
+
+# Zmiana formatu manifestu wymaga zmiany wersji (stary manifest zostanie przebudowany)
+MANIFEST_VERSION = 1
+
+
+def resolve_nation(token_name, token_data, dirpath):
+    """Ustala nację żetonu ("polskie" / "niemieckie") z nazwy, danych lub ścieżki katalogu."""
+    nation = token_data.get("nation", "")
+    if "Polska" in token_name or "polska" in token_name or nation == "Polska":
+        return "polskie"
+    if "Niemcy" in token_name or "niemieck" in token_name or nation == "Niemcy":
+        return "niemieckie"
+    if "polskie" in dirpath.lower():
+        return "polskie"
+    if "niemieckie" in dirpath.lower() or "niemcy" in dirpath.lower():
+        return "niemieckie"
+    return None
+
+
+def _mtime(path):
+    """Zwraca czas modyfikacji (ns) lub None, gdy ścieżka nie istnieje."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def load_indexed_tokens(tokens_path):
+    """
+    Zwraca żetony wymienione w plikach token_index.json nacji (format paneli gry).
+
+    Nie skanuje katalogów i nie wymaga obrazów PNG - wystarcza symulacjom bez
+    wyświetlacza (balans, SI).
+    """
+    tokens = []
+    for nation_dir in sorted(os.listdir(tokens_path)):
+        index_path = os.path.join(tokens_path, nation_dir, "token_index.json")
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[UWAGA] Nie udało się odczytać {index_path}: {e}")
+            continue
+        for name, entry in index.items():
+            token_dir = os.path.join(tokens_path, nation_dir, entry["directory"])
+            data_path = os.path.join(token_dir, "token_data.json")
+            try:
+                with open(data_path, "r", encoding="utf-8") as f:
+                    token_data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[UWAGA] Nie udało się odczytać {data_path}: {e}")
+                continue
+            tokens.append({
+                "name": name,
+                "path": os.path.join(token_dir, token_data.get("png_file") or f"{name}.png"),
+                "nation": resolve_nation(name, token_data, token_dir),
+                "data": token_data,
+            })
+    return tokens
+
+
+class TokenCatalog:
+    """Lista żetonów z katalogu tokeny/ odświeżana przyrostowo na podstawie manifestu."""
+
+    def __init__(self, tokens_path, manifest_path=None):
+        self.tokens_path = tokens_path
+        self.manifest_path = manifest_path or os.path.join(tokens_path, MANIFEST_FILENAME)
+        self.containers = {}  # katalog bez PNG (względna ścieżka) -> mtime
+        self.entries = {}     # katalog żetonu (względna ścieżka) -> dane żetonu
+        self.scanned = 0      # liczba katalogów przeskanowanych przy ostatnim load()
+
+    # ----------------------------
+    # Wczytywanie
+    # ----------------------------
+    def load(self):
+        """Wczytuje katalog (manifest + przeskanowanie zmienionych katalogów) i zwraca listę żetonów."""
+        self.scanned = 0
+        if self._read_manifest():
+            changed = self._refresh()
+        else:
+            self.containers.clear()
+            self.entries.clear()
+            self._scan_dir("")
+            changed = True
+
+        if changed:
+            self._write_manifest()
+        return self.tokens()
+
+    def tokens(self):
+        """Zwraca żetony w formacie paneli gry: {"name", "path", "nation", "data"}."""
+        tokens = []
+        for rel_dir in sorted(self.entries):
+            entry = self.entries[rel_dir]
+            tokens.append({
+                "name": entry["name"],
+                "path": self._abs(entry["png"]),
+                "nation": entry["nation"],
+                "data": entry["data"],
+            })
+        return tokens
+
+    def _abs(self, rel_path):
+        return os.path.join(self.tokens_path, *rel_path.split("/")) if rel_path else self.tokens_path
+
+    # ----------------------------
+    # Manifest
+    # ----------------------------
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if manifest.get("version") != MANIFEST_VERSION:
+            return False
+        self.containers = manifest.get("containers", {})
+        self.entries = manifest.get("tokens", {})
+        return True
+
+    def _write_manifest(self):
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "containers": self.containers,
+            "tokens": self.entries,
+        }
+        # Zapis w miejscu (bez pliku tymczasowego), aby nie zmieniać mtime katalogu żetonów,
+        # w którym leży manifest; uszkodzony manifest i tak zostanie po prostu przebudowany
+        try:
+            with open(self.manifest_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"[UWAGA] Nie udało się zapisać manifestu żetonów: {e}")
+            return
+
+        # Utworzenie manifestu w katalogu żetonów zmienia mtime tego katalogu (zapisany już
+        # w containers) - bez ponownego zapamiętania kolejny load() skanowałby go od nowa
+        manifest_dir = os.path.dirname(os.path.abspath(self.manifest_path))
+        if "" in self.containers and manifest_dir == os.path.abspath(self.tokens_path):
+            root_mtime = _mtime(self.tokens_path)
+            if root_mtime != self.containers[""]:
+                self.containers[""] = root_mtime
+                try:
+                    with open(self.manifest_path, "w", encoding="utf-8") as f:
+                        json.dump(manifest, f, ensure_ascii=False)
+                except OSError as e:
+                    print(f"[UWAGA] Nie udało się zapisać manifestu żetonów: {e}")
+
+    # ----------------------------
+    # Skanowanie
+    # ----------------------------
+    def _refresh(self):
+        """Porównuje czasy modyfikacji z manifestem i skanuje ponownie tylko zmienione katalogi."""
+        changed = False
+
+        # Katalogi nadrzędne: zmiana mtime oznacza dodany, usunięty lub przemianowany podkatalog
+        for rel_dir, mtime in list(self.containers.items()):
+            if rel_dir not in self.containers:
+                continue  # usunięty razem z katalogiem nadrzędnym
+            current = _mtime(self._abs(rel_dir))
+            if current is None:
+                self._forget(rel_dir)
+                changed = True
+            elif current != mtime:
+                self._scan_dir(rel_dir)
+                changed = True
+
+        # Katalogi żetonów: zmiana listy plików lub treści token_data.json
+        for rel_dir, entry in list(self.entries.items()):
+            dir_mtime = _mtime(self._abs(rel_dir))
+            if dir_mtime is None:
+                self.entries.pop(rel_dir, None)
+                changed = True
+            elif (dir_mtime != entry["dir_mtime"] or
+                    _mtime(os.path.join(self._abs(rel_dir), "token_data.json")) != entry["data_mtime"]):
+                self._scan_dir(rel_dir)
+                changed = True
+        return changed
+
+    def _forget(self, rel_dir):
+        """Usuwa z katalogu wpisy leżące w rel_dir i jego podkatalogach."""
+        prefix = rel_dir + "/"
+        for mapping in (self.containers, self.entries):
+            for key in [key for key in mapping if key == rel_dir or key.startswith(prefix)]:
+                del mapping[key]
+
+    def _scan_dir(self, rel_dir):
+        """Skanuje katalog jako katalog żetonu (gdy zawiera PNG) lub katalog nadrzędny."""
+        if rel_dir and self._scan_token_dir(rel_dir) is not None:
+            return
+        self._scan_container(rel_dir)
+
+    def _scan_container(self, rel_dir):
+        """Skanuje katalog nadrzędny: nowe podkatalogi dodaje, zniknięte usuwa."""
+        path = self._abs(rel_dir)
+        self.scanned += 1
+        try:
+            children = sorted(e.name for e in os.scandir(path) if e.is_dir())
+        except OSError:
+            self._forget(rel_dir)
+            return
+        self.containers[rel_dir] = _mtime(path)
+        self.entries.pop(rel_dir, None)
+
+        prefix = rel_dir + "/" if rel_dir else ""
+        known = {key for mapping in (self.containers, self.entries) for key in mapping
+                 if key.startswith(prefix) and key != rel_dir and "/" not in key[len(prefix):]}
+        current = {prefix + name for name in children}
+        for missing in known - current:
+            self._forget(missing)
+        for child in sorted(current - known):
+            self._scan_dir(child)
+
+    def _scan_token_dir(self, rel_dir):
+        """Wczytuje katalog żetonu (PNG + token_data.json); zwraca wpis lub None, gdy brak PNG."""
+        path = self._abs(rel_dir)
+        self.scanned += 1
+        try:
+            png_files = sorted(name for name in os.listdir(path) if name.lower().endswith(".png"))
+        except OSError:
+            png_files = []
+        if not png_files:
+            self.entries.pop(rel_dir, None)
+            return None
+
+        token_name = os.path.basename(path)
+        token_data_path = os.path.join(path, "token_data.json")
+        token_data = {}
+        if os.path.exists(token_data_path):
+            try:
+                with open(token_data_path, "r", encoding="utf-8") as f:
+                    token_data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[BŁĄD] Podczas wczytywania danych tokena {token_name}: {e}")
+
+        entry = {
+            "name": token_name,
+            "png": f"{rel_dir}/{png_files[0]}",
+            "nation": resolve_nation(token_name, token_data, path),
+            "data": token_data,
+            "dir_mtime": _mtime(path),
+            "data_mtime": _mtime(token_data_path),
+        }
+        self.entries[rel_dir] = entry
+        self.containers.pop(rel_dir, None)
+        return entry
@@ -0,0 +1,66 @@
+"""
+Jednostki na planszy - dane żetonu potrzebne regułom gry, bez obrazów i Tk.
+"""
+
+
+def token_stat(data, key):
+    """Zwraca parametr żetonu jako liczbę całkowitą (0, gdy brak lub niepoprawny)."""
+    try:
+        return int(data.get(key) or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class Unit:
+    """Jednostka postawiona na heksie."""
+
+    __slots__ = ("name", "nation", "hex_id", "unit_type", "movement_points", "sight_range",
+                 "attack_range", "attack_value", "combat_value", "strength", "movement_left", "token_data")
+
+    def __init__(self, name, nation, hex_id=None, unit_type="", movement_points=0, sight_range=0,
+                 attack_range=0, attack_value=0, combat_value=0, token_data=None):
+        """
+        Args:
+            name: Nazwa żetonu (identyfikator jednostki)
+            nation: Nacja żetonu ("polskie" / "niemieckie")
+            hex_id: Heks "kolumna_wiersz", na którym stoi jednostka (None - poza planszą)
+            unit_type: Rodzaj jednostki (P, K, TC, ... jak w edytorze żetonów)
+            movement_points: Punkty ruchu na turę
+            sight_range: Zasięg widzenia w heksach
+            attack_range: Zasięg ataku w heksach
+            attack_value: Wartość ataku
+            combat_value: Wartość bojowa (pełna siła jednostki)
+            token_data: Pełne dane żetonu (słownik z panelu lub zapisu gry)
+        """
+        self.name = name
+        self.nation = nation
+        self.hex_id = hex_id
+        self.unit_type = unit_type
+        self.movement_points = movement_points
+        self.sight_range = sight_range
+        self.attack_range = attack_range
+        self.attack_value = attack_value
+        self.combat_value = combat_value
+        self.strength = combat_value  # pozostała siła - maleje ze stratami w walce
+        self.movement_left = movement_points  # punkty ruchu pozostałe w bieżącej turze
+        self.token_data = token_data if token_data is not None else {"name": name, "nation": nation}
+
+    @classmethod
+    def from_token_data(cls, token_data, hex_id=None):
+        """Tworzy jednostkę z danych żetonu ({"name", "nation", "data": {...}})."""
+        stats = token_data.get("data") or {}
+        return cls(
+            token_data["name"],
+            token_data["nation"],
+            hex_id,
+            unit_type=stats.get("unit_type", ""),
+            movement_points=token_stat(stats, "movement_points"),
+            sight_range=token_stat(stats, "sight_range"),
+            attack_range=token_stat(stats, "attack_range"),
+            attack_value=token_stat(stats, "attack_value"),
+            combat_value=token_stat(stats, "combat_value"),
+            token_data=token_data,
+        )
+
+    def __repr__(self):
+        return f"Unit({self.name!r}, {self.nation!r}, hex={self.hex_id!r})"
@@ -0,0 +1,524 @@
+"""
+Przeciwnik sterowany przez komputer - plan tury wybierany przeszukiwaniem z limitem czasu.
+
+Z migawki pozycji (bez Tk, do przesłania do innych procesów) losowa polityka
+zachłanna generuje kilkanaście różnych planów tury: zakupy i wystawienie
+żetonów z rezerwy, ruchy i ataki. Plany są korzeniem drzewa Monte Carlo
+z wyborem UCB1 - każda rozgrywka próbna (playout) wykonuje plan na
+bezgłowym GameEngine, a potem kilka kolejnych tur obu stron tą samą
+polityką i ocenia pozycję (siła jednostek, kluczowe punkty, ekonomia).
+Rozgrywki próbne działają w puli procesów (każdy proces buduje mapę raz,
+w inicjalizatorze). Ich głębokość rośnie z liczbą rdzeni, a przeszukiwanie
+kończy się po limicie czasu tury lub liczby rozgrywek.
+
+Przeszukiwanie może działać w wątku w tle (start()) - postęp i wybrany plan
+trafiają do wątku Tk przez kolejkę sprawdzaną w after(), więc okno gry nie
+zamarza, gdy SI myśli.
+"""
+
+import math
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from core.game_state import TOKEN_NATIONS, GameEngine, GameRuleError, GameState, side_of
+from core.hex_neighbors import HexNeighborTable
+from core.map import HexGrid
+from core.units import token_stat
+from engine.combat import CombatEngine
+from engine.combat_odds import CombatOdds
+from engine.economy import EconomySystem
+
+# Domyślny limit czasu przeszukiwania na turę (s)
+DEFAULT_TIME_LIMIT = 5.0
+
+# Głębokość rozgrywek próbnych (tury po planowanej): podstawa + 1 na każde CORES_PER_DEPTH rdzeni
+BASE_DEPTH = 2
+CORES_PER_DEPTH = 4
+MAX_DEPTH = 8
+
+# Liczba różnych planów tury rozważanych w korzeniu
+CANDIDATE_PLANS = 16
+
+# Stała eksploracji UCB1
+EXPLORATION = math.sqrt(2)
+
+# Zakupy: najwięcej żetonów wystawianych w jednej turze i promień strefy wystawienia
+MAX_DEPLOY_PER_TURN = 2
+DEPLOY_RADIUS = 2
+
+# Ocena pozycji: waga kluczowego punktu (za punkt jego wartości) i punktu ekonomicznego
+KEY_POINT_WEIGHT = 0.05
+ECONOMY_WEIGHT = 0.01
+
+# Skala zamiany zmiany oceny na wynik rozgrywki 0..1 (funkcja logistyczna)
+REWARD_SCALE = 5.0
+
+# Odstęp sprawdzania postępu przeszukiwania w tle (ms)
+PROGRESS_POLL_MS = 100
+
+# Silnik gry i szanse walki procesu roboczego (budowane raz, w inicjalizatorze)
+_engine = None
+_odds = None
+
+
+def search_depth(cores=None):
+    """Zwraca głębokość rozgrywek próbnych dla liczby rdzeni."""
+    cores = cores or os.cpu_count() or 1
+    return min(MAX_DEPTH, BASE_DEPTH + cores // CORES_PER_DEPTH)
+
+
+def build_map(map_data, max_range=0):
+    """Buduje siatkę heksów i tablice sąsiedztwa z danych mapy (mapa_dane.json)."""
+    grid = HexGrid.from_map_data(map_data)
+    return grid, HexNeighborTable(grid, max_range)
+
+
+# ----------------------------
+# Pozycja
+# ----------------------------
+def snapshot(engine, side, reserve=(), fog_of_war=True):
+    """
+    Zapisuje pozycję do przeszukiwania w postaci prostych danych (do przesłania do procesów).
+
+    Args:
+        engine: GameEngine z bieżącą grą
+        side: Strona, dla której SI planuje turę ("Polska" / "Niemcy")
+        reserve: Żetony strony, które można kupić i wystawić (dane żetonów z panelu)
+        fog_of_war: Czy pominąć jednostki przeciwnika, których strona nie widzi
+
+    Returns:
+        Słownik pozycji
+    """
+    state = engine.state
+    viewer = TOKEN_NATIONS.get(side)
+    units = []
+    for hex_id, unit in state.units.items():
+        if fog_of_war and engine.visibility is not None and side_of(unit.nation) != side:
+            if not engine.visibility.is_visible(viewer, engine.index_of(hex_id)):
+                continue
+        units.append((hex_id, unit.token_data, unit.strength))
+    return {
+        "side": side,
+        "players": dict(state.players),
+        "current_turn": state.current_turn,
+        "turn_number": state.turn_number,
+        "economy": {nation: data["economic_points"] for nation, data in state.economy.nations.items()},
+        "bases": {nation: [tuple(base["coords"]) for base in data["bases"]]
+                  for nation, data in state.economy.nations.items()},
+        "units": units,
+        "reserve": [token for token in reserve if side_of(token["nation"]) == side],
+    }
+
+
+def load_position(engine, position, seed=None):
+    """Ustawia na silniku gry (z podłączoną mapą) pozycję z migawki, z nowym strumieniem losowym."""
+    engine.clear_units()
+    economy = EconomySystem(rng=random.Random(seed), verbose=False)
+    for nation, points in position["economy"].items():
+        economy.nations[nation]["economic_points"] = points
+    state = GameState(position["players"], economy=economy)
+    state.current_turn = position["current_turn"]
+    state.turn_number = position["turn_number"]
+    engine.state = state
+    engine.combat = CombatEngine(seed)
+    engine.update_locks()
+    for hex_id, token_data, strength in position["units"]:
+        engine.place_unit(hex_id, token_data).strength = strength
+
+
+def evaluate(engine, side):
+    """Ocenia pozycję z punktu widzenia strony (dodatnia - przewaga strony)."""
+    grid = engine.grid
+    score = 0.0
+    for hex_id, unit in engine.state.units.items():
+        value = unit.strength + KEY_POINT_WEIGHT * int(grid.key_point_value[engine.index_of(hex_id)])
+        score += value if side_of(unit.nation) == side else -value
+    for nation, data in engine.state.economy.nations.items():
+        points = ECONOMY_WEIGHT * data["economic_points"] / 100
+        score += points if nation == side else -points
+    return score
+
+
+# ----------------------------
+# Polityka tury
+# ----------------------------
+def deploy_hexes(engine, side, bases=()):
+    """Zwraca wolne heksy w promieniu DEPLOY_RADIUS od jednostek i baz strony."""
+    anchors = [engine.index_of(unit.hex_id) for unit in engine.state.units_of(side)]
+    anchors += [engine.index_of(f"{x}_{y}") for x, y in bases]
+    anchors = [idx for idx in anchors if idx >= 0]
+    if not anchors:
+        return []
+    cells = engine.neighbors.disk_many(anchors, DEPLOY_RADIUS)
+    occupied = {engine.index_of(hex_id) for hex_id in engine.state.units}
+    return [idx for idx in np.unique(cells).tolist()
+            if idx >= 0 and engine.grid.valid[idx] and idx not in occupied]
+
+
+def objectives(engine, side):
+    """Zwraca indeksy celów strony: jednostki przeciwnika i kluczowe punkty, których nie zajmuje."""
+    grid = engine.grid
+    own = {engine.index_of(unit.hex_id) for unit in engine.state.units_of(side)}
+    targets = [engine.index_of(hex_id) for hex_id, unit in engine.state.units.items()
+               if side_of(unit.nation) != side]
+    targets += [idx for idx in np.flatnonzero(grid.key_point_value > 0).tolist() if idx not in own]
+    return np.array(targets, dtype=np.int64)
+
+
+def best_attack(engine, unit, odds, aggression):
+    """Zwraca (wartość, heks celu) najlepszego ataku jednostki lub None, gdy nie ma celu w zasięgu."""
+    if unit.attack_value <= 0:
+        return None
+    side = side_of(unit.nation)
+    enemies = [enemy for enemy in engine.state.units.values() if side_of(enemy.nation) != side]
+    if not enemies:
+        return None
+    origin = engine.index_of(unit.hex_id)
+    targets = np.array([engine.index_of(enemy.hex_id) for enemy in enemies], dtype=np.int64)
+    distances = engine.distance(origin, targets)
+    best = None
+    for enemy, idx, distance in zip(enemies, targets.tolist(), distances.tolist()):
+        if distance > max(1, unit.attack_range):
+            continue
+        result = odds.odds(unit.attack_value, enemy.strength, engine.grid.defense_mod[idx], distance)
+        value = aggression * result.defender_loss - result.attacker_loss
+        if best is None or value > best[0]:
+            best = (value, enemy.hex_id)
+    return best
+
+
+def play_turn(engine, side, rng, odds, reserve=(), bases=(), aggression=1.0, explore=0.2,
+              max_deploy=MAX_DEPLOY_PER_TURN):
+    """
+    Rozgrywa turę strony losową polityką zachłanną i zwraca wykonane akcje (plan tury).
+
+    Kolejno: zakup i wystawienie do max_deploy żetonów z rezerwy, potem dla
+    każdej jednostki (w losowej kolejności) atak na najkorzystniejszy cel
+    w zasięgu albo ruch w stronę najbliższego celu i atak z nowego heksu.
+    Ataki są tylko deklarowane - rozstrzyga je koniec tury.
+
+    Args:
+        engine: GameEngine z podłączoną mapą; strona side musi mieć turę
+        rng: numpy.random.Generator
+        odds: CombatOdds
+        aggression: Waga strat zadanych względem własnych przy wyborze ataku
+        explore: Prawdopodobieństwo losowego wyboru heksu zamiast najlepszego
+
+    Returns:
+        Lista akcji ("deploy", nazwa żetonu, heks) / ("move", z, do) / ("attack", z, cel)
+    """
+    actions = []
+    targets = objectives(engine, side)
+
+    if reserve and max_deploy > 0:
+        points = engine.state.economy.get_nation_data(side).get("economic_points", 0)
+        free = deploy_hexes(engine, side, bases)
+        for i in rng.permutation(len(reserve)).tolist():
+            if len(actions) >= max_deploy or not free:
+                break
+            token = reserve[i]
+            cost = token_stat(token.get("data") or {}, "purchase_value")
+            if cost > points:
+                continue
+            idx = _choose_hex(engine, free, targets, 1, rng, explore)
+            hex_id = engine.grid.hex_id_of(idx)
+            try:
+                engine.purchase_unit(hex_id, token)
+            except GameRuleError:
+                continue
+            free.remove(idx)
+            points -= cost
+            actions.append(("deploy", token["name"], hex_id))
+
+    units = engine.state.units_of(side)
+    for i in rng.permutation(len(units)).tolist():
+        unit = units[i]
+        attack = best_attack(engine, unit, odds, aggression)
+        if attack is None or attack[0] <= 0:
+            result = engine.reachable(unit.hex_id)
+            if result is not None and len(result.reachable) > 1:
+                idx = _choose_hex(engine, list(result.reachable), targets, max(1, unit.attack_range),
+                                  rng, explore)
+                to_hex = engine.grid.hex_id_of(idx)
+                if to_hex != unit.hex_id:
+                    actions.append(("move", unit.hex_id, to_hex))
+                    engine.relocate_unit(unit.hex_id, to_hex)
+                attack = best_attack(engine, unit, odds, aggression)
+        if attack is not None and attack[0] > 0:
+            engine.declare_attack(unit.hex_id, attack[1])
+            actions.append(("attack", unit.hex_id, attack[1]))
+    return actions
+
+
+def _choose_hex(engine, candidates, targets, desired, rng, explore):
+    """Wybiera heks, z którego najbliższy cel jest najbliżej odległości desired (lub losowy)."""
+    if not len(targets) or rng.random() < explore:
+        return candidates[int(rng.integers(len(candidates)))]
+    cells = np.array(candidates, dtype=np.int64)
+    distances = engine.distance(cells[:, None], targets[None, :]).min(axis=1)
+    misfit = np.abs(distances - desired)
+    best = np.flatnonzero(misfit == misfit.min())
+    return candidates[int(best[rng.integers(len(best))])]
+
+
+def apply_plan(engine, plan, reserve=(), check_range=True, verbose=True):
+    """
+    Wykonuje plan tury na silniku gry przez zwykłe operacje z kontrolą reguł.
+
+    Akcje, które w rzeczywistej pozycji są niedozwolone (np. heks zajęty przez
+    jednostkę ukrytą we mgle wojny), są pomijane.
+
+    Args:
+        check_range: Czy sprawdzać zasięg ruchu (rozgrywki próbne wykonują plany
+            wygenerowane na tej samej pozycji, więc go nie sprawdzają)
+        verbose: Czy wypisywać pominięte akcje
+
+    Returns:
+        Lista wykonanych akcji
+    """
+    tokens = {token["name"]: token for token in reserve}
+    applied = []
+    for action in plan:
+        kind, first, second = action
+        try:
+            if kind == "deploy":
+                engine.purchase_unit(second, tokens[first])
+            elif kind == "move":
+                engine.move_unit(first, second, check_range=check_range)
+            elif kind == "attack":
+                engine.declare_attack(first, second)
+        except (GameRuleError, KeyError) as e:
+            if verbose:
+                print(f"[UWAGA] SI: pominięto akcję {action}: {e}")
+            continue
+        applied.append(action)
+    return applied
+
+
+# ----------------------------
+# Rozgrywki próbne (proces roboczy)
+# ----------------------------
+def _init_worker(map_data, max_range):
+    """Inicjalizator procesu roboczego: buduje mapę i silnik gry do rozgrywek próbnych."""
+    global _engine, _odds
+    grid, neighbors = build_map(map_data, max_range)
+    _engine = GameEngine(GameState(economy=EconomySystem(verbose=False)), grid, neighbors)
+    _odds = CombatOdds()
+
+
+def _playout(task):
+    """Wykonuje plan i depth kolejnych tur polityką zachłanną; zwraca zmianę oceny pozycji dla strony SI."""
+    position, plan, seed, depth = task
+    engine = _engine
+    load_position(engine, position, seed)
+    rng = np.random.default_rng(seed)
+    side = position["side"]
+    baseline = evaluate(engine, side)
+    apply_plan(engine, plan, position["reserve"], check_range=False, verbose=False)
+    engine.end_turn()
+    for _ in range(depth):
+        turn_side = side_of(engine.state.current_turn_nation)
+        if turn_side is None or not engine.state.units_of(turn_side):
+            break
+        play_turn(engine, turn_side, rng, _odds)
+        engine.end_turn()
+    return evaluate(engine, side) - baseline
+
+
+class AIPlayer:
+    """Gracz komputerowy: wybiera plan tury przeszukiwaniem Monte Carlo z limitem czasu."""
+
+    def __init__(self, map_data, max_range=0, time_limit=DEFAULT_TIME_LIMIT, max_playouts=None,
+                 max_workers=None, depth=None, seed=None):
+        """
+        Args:
+            map_data: Dane mapy w formacie mapa_dane.json (przekazywane procesom roboczym)
+            max_range: Maksymalny zasięg jednostek (dla tablic sąsiedztwa)
+            time_limit: Limit czasu przeszukiwania na turę w sekundach (None - bez limitu)
+            max_playouts: Limit liczby rozgrywek próbnych na turę (None - bez limitu)
+            max_workers: Liczba procesów roboczych (domyślnie liczba rdzeni; 1 - bez puli procesów)
+            depth: Liczba tur rozgrywki próbnej po planowanej (domyślnie zależna od liczby rdzeni)
+            seed: Ziarno losowania planów i rozgrywek próbnych
+        """
+        if time_limit is None and max_playouts is None:
+            raise ValueError("Przeszukiwanie wymaga limitu czasu lub liczby rozgrywek")
+        self.map_data = map_data
+        self.max_range = max_range
+        self.time_limit = time_limit
+        self.max_playouts = max_playouts
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.depth = depth if depth is not None else search_depth(self.max_workers)
+        self.rng = np.random.default_rng(seed)
+        grid, neighbors = build_map(map_data, max_range)
+        self.engine = GameEngine(GameState(economy=EconomySystem(verbose=False)), grid, neighbors)
+        self.odds = CombatOdds()
+        self._executor = None
+        self.last_stats = {}  # podsumowanie ostatniego przeszukiwania
+
+    # ----------------------------
+    # Plan tury
+    # ----------------------------
+    def candidate_plans(self, position, count=CANDIDATE_PLANS):
+        """Generuje różne plany tury losową polityką z różną agresywnością i liczbą zakupów."""
+        plans = []
+        seen = set()
+        side = position["side"]
+        bases = position["bases"].get(side, ())
+        for i in range(count):
+            load_position(self.engine, position, int(self.rng.integers(2 ** 63)))
+            plan = tuple(play_turn(
+                self.engine, side, self.rng, self.odds,
+                reserve=position["reserve"], bases=bases,
+                aggression=0.5 + 1.5 * self.rng.random(),
+                explore=0.0 if i == 0 else 0.3,
+                max_deploy=int(self.rng.integers(MAX_DEPLOY_PER_TURN + 1)),
+            ))
+            if plan not in seen:
+                seen.add(plan)
+                plans.append(plan)
+        return plans
+
+    def plan_turn(self, position, progress=None):
+        """
+        Wybiera plan tury dla pozycji (migawka snapshot()).
+
+        Args:
+            progress: Opcjonalna funkcja progress(liczba rozgrywek, najlepsza średnia)
+
+        Returns:
+            Lista akcji planu (do wykonania przez apply_plan)
+        """
+        started = time.perf_counter()
+        deadline = started + self.time_limit if self.time_limit is not None else None
+        plans = self.candidate_plans(position)
+        visits = [0] * len(plans)
+        totals = [0.0] * len(plans)
+        playouts = 0
+        if len(plans) > 1:
+            playouts = self._search(position, plans, visits, totals, deadline, progress)
+        best = max(range(len(plans)), key=lambda i: (visits[i], totals[i]))
+        self.last_stats = {
+            "plans": len(plans),
+            "playouts": playouts,
+            "depth": self.depth,
+            "seconds": time.perf_counter() - started,
+            "value": totals[best] / visits[best] if visits[best] else None,
+        }
+        return list(plans[best])
+
+    def _search(self, position, plans, visits, totals, deadline, progress):
+        """Rozgrywki próbne z wyborem planów UCB1 do limitu czasu lub liczby rozgrywek."""
+        def limit_reached(started_playouts):
+            if deadline is not None and time.perf_counter() >= deadline:
+                return True
+            return self.max_playouts is not None and started_playouts >= self.max_playouts
+
+        def record(i, score):
+            visits[i] += 1
+            totals[i] += 1.0 / (1.0 + math.exp(-score / REWARD_SCALE))
+
+        started = 0
+        if self.max_workers == 1:
+            if _engine is None:
+                _init_worker(self.map_data, self.max_range)
+            while not limit_reached(started):
+                i = self._select(visits, totals, [0] * len(plans))
+                record(i, _playout(self._task(position, plans[i])))
+                started += 1
+                if progress:
+                    progress(started, max(totals[j] / visits[j] for j in range(len(plans)) if visits[j]))
+            return started
+
+        pool = self._pool()
+        pending = {}
+        in_flight = [0] * len(plans)
+        while pending or not limit_reached(started):
+            # Kolejka zadań - dwa na proces, a wybór UCB1 liczy zadania w toku jako odwiedziny
+            while len(pending) < 2 * self.max_workers and not limit_reached(started):
+                i = self._select(visits, totals, in_flight)
+                pending[pool.submit(_playout, self._task(position, plans[i]))] = i
+                in_flight[i] += 1
+                started += 1
+            timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done and limit_reached(started):
+                for future in pending:
+                    future.cancel()
+                break
+            for future in done:
+                i = pending.pop(future)
+                in_flight[i] -= 1
+                record(i, future.result())
+            if progress:
+                progress(sum(visits), max(totals[j] / visits[j] for j in range(len(plans)) if visits[j]))
+        return sum(visits)
+
+    def _select(self, visits, totals, in_flight):
+        """Wybiera plan do kolejnej rozgrywki (najpierw nieodwiedzone, potem UCB1)."""
+        counts = [v + f for v, f in zip(visits, in_flight)]
+        unvisited = [i for i, count in enumerate(counts) if count == 0]
+        if unvisited:
+            return unvisited[0]
+        log_total = math.log(sum(counts))
+        return max(range(len(counts)), key=lambda i: (
+            (totals[i] / visits[i] if visits[i] else 0.5) + EXPLORATION * math.sqrt(log_total / counts[i])))
+
+    def _task(self, position, plan):
+        return position, plan, int(self.rng.integers(2 ** 63)), self.depth
+
+    # ----------------------------
+    # Praca w tle
+    # ----------------------------
+    def start(self, widget, position, on_progress=None, on_done=None):
+        """
+        Uruchamia przeszukiwanie w wątku w tle.
+
+        on_progress(liczba rozgrywek, najlepsza średnia) i on_done(plan lub None,
+        błąd lub None) są wywoływane w wątku Tk (przez widget.after).
+        """
+        events = queue.Queue()
+
+        def work():
+            try:
+                plan = self.plan_turn(position, progress=lambda count, value: events.put(("progress", count, value)))
+                events.put(("done", plan, None))
+            except Exception as e:
+                events.put(("done", None, e))
+
+        def poll():
+            latest = None
+            while True:
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    break
+                if event[0] == "progress":
+                    latest = event  # wystarczy ostatni postęp z kolejki
+                else:
+                    if on_done:
+                        on_done(event[1], event[2])
+                    return
+            if latest and on_progress:
+                on_progress(latest[1], latest[2])
+            widget.after(PROGRESS_POLL_MS, poll)
+
+        threading.Thread(target=work, name="ai-search", daemon=True).start()
+        widget.after(PROGRESS_POLL_MS, poll)
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                                 initargs=(self.map_data, self.max_range))
+        return self._executor
+
+    def shutdown(self):
+        """Zamyka pulę procesów."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,176 @@
+"""
+Rozstrzyganie walki - wszystkie ataki fazy walki naraz, na tablicach NumPy.
+
+Zasady (kości k6):
+- atakujący rzuca tyloma kośćmi, ile wynosi jego attack_value; kość trafia
+  przy wyniku >= próg trafienia = BASE_HIT_ROLL + defense_mod heksu obrońcy
+  (+ RANGED_PENALTY przy ostrzale z odległości większej niż 1 heks), próg jest
+  ograniczony do MIN_HIT_ROLL..6,
+- każde trafienie zabiera obrońcy punkt siły (combat_value); obrońca bez siły
+  jest zniszczony, a ten, który stracił co najmniej połowę siły, wycofuje się,
+- w walce wręcz (sąsiednie heksy) obrońca odpowiada ogniem: rzuca tyloma
+  kośćmi, ile siły mu zostało, i trafia przy wyniku >= COUNTER_HIT_ROLL.
+
+Liczba trafień z n kości to rozkład dwumianowy, więc cała faza to kilka
+wywołań Generator.binomial na tablicach zamiast pętli po kościach. Ataki
+jednej fazy są rozstrzygane niezależnie, na sile jednostek sprzed fazy, a
+straty są sumowane przy nakładaniu wyników na stan gry.
+"""
+
+import numpy as np
+
+# Próg trafienia na k6 bez modyfikatorów
+BASE_HIT_ROLL = 4
+
+# Najniższy możliwy próg trafienia (najwyższy to 6 - zawsze jest szansa trafienia)
+MIN_HIT_ROLL = 2
+
+# Dodatek do progu przy ostrzale z odległości większej niż 1 heks
+RANGED_PENALTY = 1
+
+# Próg trafienia ognia odpowiedzi obrońcy
+COUNTER_HIT_ROLL = 5
+
+# Tabela wyników - jeden wiersz na atak
+RESULT_DTYPE = np.dtype([
+    ("attacker", np.int32),  # numer atakującego (pozycja w liście jednostek fazy)
+    ("defender", np.int32),  # numer obrońcy
+    ("hits", np.int16),  # trafienia atakującego
+    ("defender_loss", np.int16),
+    ("attacker_loss", np.int16),
+    ("destroyed", np.bool_),
+    ("retreat", np.bool_),
+])
+
+
+def hit_threshold(defense_mod, distance):
+    """Zwraca próg trafienia (2..6) dla modyfikatora obrony heksu i odległości (także dla tablic)."""
+    threshold = BASE_HIT_ROLL + np.asarray(defense_mod) + RANGED_PENALTY * (np.asarray(distance) > 1)
+    return np.clip(threshold, MIN_HIT_ROLL, 6)
+
+
+def hit_probability(defense_mod, distance):
+    """Zwraca prawdopodobieństwo trafienia jedną kością (także dla tablic)."""
+    return (7 - hit_threshold(defense_mod, distance)) / 6.0
+
+
+def counter_probability():
+    """Zwraca prawdopodobieństwo trafienia jedną kością ognia odpowiedzi."""
+    return (7 - COUNTER_HIT_ROLL) / 6.0
+
+
+def resolve_batch(rng, attack_value, defender_strength, defense_mod, distance,
+                  attacker=None, defender=None):
+    """
+    Rozstrzyga wiele ataków naraz.
+
+    Args:
+        rng: numpy.random.Generator
+        attack_value: Tablica wartości ataku atakujących
+        defender_strength: Tablica pozostałej siły obrońców
+        defense_mod: Tablica modyfikatorów obrony heksów obrońców
+        distance: Tablica odległości atakujący - obrońca w heksach
+        attacker, defender: Opcjonalne numery jednostek zapisywane w tabeli wyników
+
+    Returns:
+        Tablica RESULT_DTYPE (jeden wiersz na atak)
+    """
+    attack_value = np.asarray(attack_value, dtype=np.int64)
+    strength = np.asarray(defender_strength, dtype=np.int64)
+    distance = np.asarray(distance)
+    count = len(attack_value)
+
+    hits = rng.binomial(np.maximum(attack_value, 0), hit_probability(defense_mod, distance))
+    defender_loss = np.minimum(hits, strength)
+    remaining = strength - defender_loss
+    counter = np.where(distance <= 1, remaining, 0)
+    attacker_loss = rng.binomial(counter, counter_probability())
+
+    results = np.zeros(count, dtype=RESULT_DTYPE)
+    results["attacker"] = np.arange(count) if attacker is None else attacker
+    results["defender"] = np.arange(count) if defender is None else defender
+    results["hits"] = hits
+    results["defender_loss"] = defender_loss
+    results["attacker_loss"] = attacker_loss
+    results["destroyed"] = remaining <= 0
+    results["retreat"] = (remaining > 0) & (2 * defender_loss >= strength)
+    return results
+
+
+class CombatEngine:
+    """Zbiera ataki zadeklarowane w fazie walki i rozstrzyga je jedną partią."""
+
+    def __init__(self, seed=None):
+        """
+        Args:
+            seed: Ziarno strumienia losowego (te same ziarno i ataki - te same wyniki)
+        """
+        self.rng = np.random.default_rng(seed)
+        self.declared = []  # (heks atakującego, heks obrońcy)
+        self.last_results = np.zeros(0, dtype=RESULT_DTYPE)
+        self.last_units = []  # jednostki numerowane w last_results
+
+    def declare(self, attacker_hex, defender_hex):
+        """Dopisuje atak do partii fazy walki (zasady sprawdza GameEngine.declare_attack)."""
+        self.declared.append((attacker_hex, defender_hex))
+
+    def resolve_declared(self, game):
+        """
+        Rozstrzyga zadeklarowane ataki i nakłada straty, zniszczenia i odwroty na stan gry.
+
+        Returns:
+            Tablica RESULT_DTYPE; numery jednostek odnoszą się do self.last_units
+        """
+        declared, self.declared = self.declared, []
+        positions = {}
+        units = []
+        pairs = []
+        for attacker_hex, defender_hex in declared:
+            attacker = game.state.unit_at(attacker_hex)
+            defender = game.state.unit_at(defender_hex)
+            if attacker is None or defender is None:
+                continue  # jednostka zniknęła z planszy po deklaracji
+            for unit in (attacker, defender):
+                if id(unit) not in positions:
+                    positions[id(unit)] = len(units)
+                    units.append(unit)
+            pairs.append((positions[id(attacker)], positions[id(defender)]))
+
+        self.last_units = units
+        if not pairs:
+            self.last_results = np.zeros(0, dtype=RESULT_DTYPE)
+            return self.last_results
+
+        pairs = np.array(pairs, dtype=np.int32)
+        attacker_ids, defender_ids = pairs[:, 0], pairs[:, 1]
+        hexes = np.array([game.index_of(unit.hex_id) for unit in units], dtype=np.int64)
+        attack_value = np.array([unit.attack_value for unit in units], dtype=np.int64)
+        strength = np.array([unit.strength for unit in units], dtype=np.int64)
+        defense_mod = game.grid.defense_mod[hexes[defender_ids]]
+        distance = game.distance(hexes[attacker_ids], hexes[defender_ids])
+
+        results = resolve_batch(self.rng, attack_value[attacker_ids], strength[defender_ids],
+                                defense_mod, distance, attacker_ids, defender_ids)
+        self._apply(game, units, hexes, results)
+        self.last_results = results
+        return results
+
+    def _apply(self, game, units, hexes, results):
+        """Odejmuje sumy strat, usuwa zniszczone jednostki i wycofuje obrońców."""
+        losses = np.zeros(len(units), dtype=np.int64)
+        np.add.at(losses, results["defender"], results["defender_loss"])
+        np.add.at(losses, results["attacker"], results["attacker_loss"])
+        destroyed = set(results["defender"][results["destroyed"]].tolist())
+        retreat_from = {}
+        for row in results[results["retreat"]]:
+            retreat_from.setdefault(int(row["defender"]), int(hexes[row["attacker"]]))
+
+        for number, unit in enumerate(units):
+            if losses[number]:
+                unit.strength = max(0, unit.strength - int(losses[number]))
+            if number in destroyed or (losses[number] and unit.strength <= 0):
+                game.remove_unit(unit.hex_id)
+            elif number in retreat_from:
+                target = game.retreat_hex(unit.hex_id, retreat_from[number])
+                if target is not None:
+                    game.relocate_unit(unit.hex_id, target)
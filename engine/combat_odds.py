@@ -0,0 +1,152 @@
+"""
+Szanse w walce liczone dokładnie (wyliczenie rozkładu trafień), z pamięcią wyników.
+
+Wynik ataku według zasad z engine/combat.py zależy tylko od kilku małych
+liczb całkowitych: wartości ataku, pozostałej siły obrońcy, progu trafienia
+(z defense_mod heksu i odległości) oraz tego, czy to walka wręcz. Dla każdej
+takiej krotki rozkład liczony jest raz - wyniki dla par rodzajów jednostek z
+katalogu żetonów (core.token_catalog.TokenCatalog - dane token_data.json
+żetonów z folderu tokeny/) są liczone z góry, a pozostałe trafiają
+do ograniczonej pamięci LRU. Podgląd szans nad celem to odczyt ze słownika.
+"""
+
+from collections import OrderedDict
+from math import comb
+
+import numpy as np
+
+from core.units import token_stat
+from engine.combat import BASE_HIT_ROLL, MIN_HIT_ROLL, RANGED_PENALTY, counter_probability, hit_threshold
+
+# Liczba wyników trzymanych w pamięci LRU (poza tablicą liczoną z góry)
+DEFAULT_CACHE_SIZE = 4096
+
+
+class Odds:
+    """Rozkład wyniku jednego ataku."""
+
+    __slots__ = ("destroyed", "retreat", "defender_loss", "attacker_loss", "loss_pmf")
+
+    def __init__(self, destroyed, retreat, defender_loss, attacker_loss, loss_pmf):
+        self.destroyed = destroyed  # prawdopodobieństwo zniszczenia obrońcy
+        self.retreat = retreat  # prawdopodobieństwo odwrotu obrońcy
+        self.defender_loss = defender_loss  # oczekiwane straty obrońcy
+        self.attacker_loss = attacker_loss  # oczekiwane straty atakującego (ogień odpowiedzi)
+        self.loss_pmf = loss_pmf  # krotka P(straty obrońcy = k), k = 0..siła
+
+    def describe(self):
+        """Zwraca krótki opis szans do wyświetlenia nad celem."""
+        return (f"Zniszczenie: {self.destroyed:.0%}  Odwrót: {self.retreat:.0%}\n"
+                f"Straty wroga: {self.defender_loss:.1f}  Własne: {self.attacker_loss:.1f}")
+
+    def __repr__(self):
+        return (f"Odds(destroyed={self.destroyed:.3f}, retreat={self.retreat:.3f}, "
+                f"defender_loss={self.defender_loss:.3f}, attacker_loss={self.attacker_loss:.3f})")
+
+
+def exact_odds(attack_value, strength, threshold, melee):
+    """
+    Wylicza rozkład wyniku ataku.
+
+    Args:
+        attack_value: Liczba kości atakującego
+        strength: Pozostała siła obrońcy
+        threshold: Próg trafienia (2..6)
+        melee: Czy walka wręcz (obrońca odpowiada ogniem)
+
+    Returns:
+        Odds
+    """
+    p = (7 - threshold) / 6.0
+    q = counter_probability()
+    attack_value = max(0, attack_value)
+    strength = max(0, strength)
+    loss_pmf = [0.0] * (strength + 1)
+    destroyed = retreat = attacker_loss = 0.0
+    for hits in range(attack_value + 1):
+        chance = comb(attack_value, hits) * p ** hits * (1 - p) ** (attack_value - hits)
+        loss = min(hits, strength)
+        remaining = strength - loss
+        loss_pmf[loss] += chance
+        if remaining <= 0:
+            destroyed += chance
+        elif 2 * loss >= strength:
+            retreat += chance
+        if melee:
+            attacker_loss += chance * remaining * q
+    defender_loss = sum(k * chance for k, chance in enumerate(loss_pmf))
+    return Odds(destroyed, retreat, defender_loss, attacker_loss, tuple(loss_pmf))
+
+
+class CombatOdds:
+    """Szanse ataków: tablica liczona z góry dla katalogu żetonów + pamięć LRU dla pozostałych."""
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.table = {}  # wyniki liczone z góry (bez usuwania)
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @staticmethod
+    def key(attack_value, strength, defense_mod, distance):
+        """Zwraca klucz wyniku - krotkę liczb, od których zależy wynik ataku."""
+        # Próg jak w engine.combat.hit_threshold, ale bez NumPy - klucz liczony jest przy każdym podglądzie
+        melee = distance <= 1
+        threshold = BASE_HIT_ROLL + int(defense_mod) + (0 if melee else RANGED_PENALTY)
+        return (int(attack_value), int(strength), min(6, max(MIN_HIT_ROLL, threshold)), bool(melee))
+
+    def odds(self, attack_value, strength, defense_mod, distance):
+        """Zwraca Odds ataku o danej wartości na obrońcę o danej sile na heksie z defense_mod."""
+        key = self.key(attack_value, strength, defense_mod, distance)
+        result = self.table.get(key)
+        if result is not None:
+            self.cache_hits += 1
+            return result
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return result
+
+        self.cache_misses += 1
+        result = exact_odds(*key)
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def for_units(self, attacker, defender, defense_mod, distance):
+        """Zwraca Odds ataku jednostki attacker na defender (core.units.Unit)."""
+        return self.odds(attacker.attack_value, defender.strength, defense_mod, distance)
+
+    def precompute(self, token_datas, defense_mods):
+        """
+        Liczy z góry wyniki dla wszystkich par rodzajów jednostek z katalogu.
+
+        Args:
+            token_datas: Dane żetonów (token_data.json lub "data" z katalogu żetonów)
+            defense_mods: Modyfikatory obrony występujące na mapie
+
+        Returns:
+            Liczba wyliczonych kombinacji
+        """
+        attackers = {(token_stat(data, "attack_value"), token_stat(data, "attack_range"))
+                     for data in token_datas}
+        strengths = {token_stat(data, "combat_value") for data in token_datas}
+        defense_mods = np.unique(np.asarray(list(defense_mods) or [0]))
+        # Progi trafienia dla walki wręcz i ostrzału - różne defense_mod mogą dawać ten sam próg
+        melee_thresholds = set(hit_threshold(defense_mods, 1).tolist())
+        ranged_thresholds = set(hit_threshold(defense_mods, 2).tolist())
+        before = len(self.table)
+        for attack_value, attack_range in attackers:
+            if attack_value <= 0:
+                continue
+            for strength in strengths:
+                keys = [(attack_value, strength, threshold, True) for threshold in melee_thresholds]
+                if attack_range > 1:
+                    keys += [(attack_value, strength, threshold, False) for threshold in ranged_thresholds]
+                for key in keys:
+                    if key not in self.table:
+                        self.table[key] = exact_odds(*key)
+        return len(self.table) - before
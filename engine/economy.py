@@ -1,9 +1,4 @@
 import random
-import sys
-import os
-import tkinter as tk
-from tkinter import messagebox, simpledialog, filedialog
-from PIL import Image, ImageDraw, ImageTk, ImageFont
 import json
 
 # Stałe ograniczające zasoby
@@ -11,8 +6,16 @@ MAX_ECONOMIC_POINTS = 5000
 MAX_SUPPLY_POINTS = 2000
 
 class EconomySystem:
-    def __init__(self):
-        """Inicjalizuje system ekonomii z domyślnymi wartościami dla każdej nacji."""
+    def __init__(self, rng=None, verbose=True):
+        """
+        Inicjalizuje system ekonomii z domyślnymi wartościami dla każdej nacji.
+
+        Args:
+            rng: Generator liczb losowych dla wydarzeń (domyślnie moduł random)
+            verbose: Czy wypisywać komunikaty w konsoli (symulacje wyłączają je dla szybkości)
+        """
+        self.rng = rng or random
+        self.verbose = verbose
         self.nations = {
             "Polska": {
                 "economic_points": 1200,
@@ -34,6 +37,10 @@ class EconomySystem:
             }
         }
 
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
     def get_nation_data(self, nation):
         """Zwraca dane ekonomiczne dla danej nacji."""
         return self.nations.get(nation, {})
@@ -67,7 +74,7 @@ class EconomySystem:
             data['supply_points'] = MAX_SUPPLY_POINTS
         if data['supply_points'] < 0:
             data['supply_points'] = 0
-        print(f"Punkty zaopatrzenia zmienione o {amount}. Nowa wartość: {data['supply_points']}")
+        self._log(f"Punkty zaopatrzenia zmienione o {amount}. Nowa wartość: {data['supply_points']}")
 
     def reset_economy(self, nation):
         """Resetuje punkty ekonomiczne i zaopatrzenia do wartości początkowych dla danej nacji."""
@@ -76,7 +83,7 @@ class EconomySystem:
             return f"Brak danych dla nacji: {nation}"
         data['economic_points'] = 1000
         data['supply_points'] = 500
-        print(f"Ekonomia dla {nation} została zresetowana do wartości początkowych.")
+        self._log(f"Ekonomia dla {nation} została zresetowana do wartości początkowych.")
 
     def add_income(self, nation, amount):
         """Dodaje przychód do punktów ekonomicznych dla danej nacji."""
@@ -87,7 +94,7 @@ class EconomySystem:
         if data['economic_points'] > MAX_ECONOMIC_POINTS:
             data['economic_points'] = MAX_ECONOMIC_POINTS
         data['history'].append(f"Przychód: {amount}. Nowa wartość punktów ekonomicznych: {data['economic_points']}")
-        print(f"Przychód: {amount}. Nowa wartość punktów ekonomicznych: {data['economic_points']}")
+        self._log(f"Przychód: {amount}. Nowa wartość punktów ekonomicznych: {data['economic_points']}")
 
     def add_expense(self, nation, amount):
         """Odlicza wydatek od punktów ekonomicznych dla danej nacji."""
@@ -98,7 +105,7 @@ class EconomySystem:
         if data['economic_points'] < 0:
             data['economic_points'] = 0
         data['history'].append(f"Wydatki: {amount}. Nowa wartość punktów ekonomicznych: {data['economic_points']}")
-        print(f"Wydatki: {amount}. Nowa wartość punktów ekonomicznych: {data['economic_points']}")
+        self._log(f"Wydatki: {amount}. Nowa wartość punktów ekonomicznych: {data['economic_points']}")
 
     def produce_supply(self, nation, cost, amount):
         """Konwertuje punkty ekonomiczne na dodatkowe punkty zaopatrzenia dla danej nacji."""
@@ -110,9 +117,9 @@ class EconomySystem:
             data['supply_points'] += amount
             if data['supply_points'] > MAX_SUPPLY_POINTS:
                 data['supply_points'] = MAX_SUPPLY_POINTS
-            print(f"Wyprodukowano {amount} punktów zaopatrzenia kosztem {cost} punktów ekonomicznych dla {nation}.")
+            self._log(f"Wyprodukowano {amount} punktów zaopatrzenia kosztem {cost} punktów ekonomicznych dla {nation}.")
         else:
-            print(f"Nie wystarczająca liczba punktów ekonomicznych dla {nation}! Wymagane: {cost}, dostępne: {data['economic_points']}")
+            self._log(f"Nie wystarczająca liczba punktów ekonomicznych dla {nation}! Wymagane: {cost}, dostępne: {data['economic_points']}")
 
     def pay_unit_maintenance(self, nation, cost_per_unit, unit_count):
         """Pobiera punkty zaopatrzenia za utrzymanie określonej liczby jednostek dla danej nacji."""
@@ -123,10 +130,10 @@ class EconomySystem:
         if data['supply_points'] >= total_cost:
             data['supply_points'] -= total_cost
             data['history'].append(f"Koszt utrzymania {unit_count} jednostek: {total_cost}. Pozostałe punkty zaopatrzenia: {data['supply_points']}")
-            print(f"Koszt utrzymania {unit_count} jednostek: {total_cost}. Pozostałe punkty zaopatrzenia: {data['supply_points']}")
+            self._log(f"Koszt utrzymania {unit_count} jednostek: {total_cost}. Pozostałe punkty zaopatrzenia: {data['supply_points']}")
         else:
             data['history'].append(f"Nie wystarczająca liczba punktów zaopatrzenia dla {nation}! Wymagane: {total_cost}, dostępne: {data['supply_points']}")
-            print(f"Nie wystarczająca liczba punktów zaopatrzenia dla {nation}! Wymagane: {total_cost}, dostępne: {data['supply_points']}")
+            self._log(f"Nie wystarczająca liczba punktów zaopatrzenia dla {nation}! Wymagane: {total_cost}, dostępne: {data['supply_points']}")
 
     def calculate_maintenance(self, nation, units):
         """Symuluje pobór zaopatrzenia przez każdą jednostkę z najbliższej bazy dla danej nacji."""
@@ -153,9 +160,9 @@ class EconomySystem:
 
             if nearest_base["supply_limit"] >= distance_cost:
                 nearest_base["supply_limit"] -= distance_cost
-                print(f"Jednostka {unit['name']} (nacja: {nation}) pobrała {distance_cost} pkt zaopatrzenia z bazy {nearest_base['coords']} (odległość: {distance:.2f}).")
+                self._log(f"Jednostka {unit['name']} (nacja: {nation}) pobrała {distance_cost} pkt zaopatrzenia z bazy {nearest_base['coords']} (odległość: {distance:.2f}).")
             else:
-                print(f"Baza {nearest_base['coords']} nie ma wystarczającego zaopatrzenia dla jednostki {unit['name']} (nacja: {nation}).")
+                self._log(f"Baza {nearest_base['coords']} nie ma wystarczającego zaopatrzenia dla jednostki {unit['name']} (nacja: {nation}).")
 
     def generate_report(self, nation):
         """Generuje raport ekonomiczny dla danej nacji."""
@@ -176,7 +183,7 @@ class EconomySystem:
 
     def process_turn(self, nation, income, cost_per_unit, unit_count):
         """Przetwarza turę dla danej nacji."""
-        print(f"\n=== Przetwarzanie tury dla {nation} ===")
+        self._log(f"\n=== Przetwarzanie tury dla {nation} ===")
         self.add_income(nation, income)
         self.pay_unit_maintenance(nation, cost_per_unit, unit_count)
         self.random_event(nation)
@@ -193,9 +200,9 @@ class EconomySystem:
             ("Niedobór zaopatrzenia", 0, -200),
             ("Dostawa zaopatrzenia", 0, 200),
         ]
-        event_name, economic_change, supply_change = random.choice(events)
+        event_name, economic_change, supply_change = self.rng.choice(events)
         data['history'].append(f"Wydarzenie: {event_name}. Zmiana punktów ekonomicznych: {economic_change}, zmiana punktów zaopatrzenia: {supply_change}")
-        print(f"\n=== Wydarzenie dla {nation}: {event_name} ===")
+        self._log(f"\n=== Wydarzenie dla {nation}: {event_name} ===")
         self.modify_economic_points(nation, economic_change)
         self.modify_supply_points(nation, supply_change)
 
@@ -204,9 +211,9 @@ class EconomySystem:
         data = self.get_nation_data(nation)
         if not data:
             return f"Brak danych dla nacji: {nation}"
-        print(f"\n=== Historia Ekonomii dla {nation} ===")
+        self._log(f"\n=== Historia Ekonomii dla {nation} ===")
         for entry in data['history']:
-            print(entry)
+            self._log(entry)
 
     def add_base(self, nation, x, y, supply_limit=100):
         """Dodaje bazę zaopatrzenia dla danej nacji."""
@@ -223,7 +230,7 @@ class EconomySystem:
         if not data:
             return f"Brak danych dla nacji: {nation}"
         data['bases'].append({"coords": (x, y), "type": point_type, "value": value})
-        print(f"Dodano kluczowy punkt '{point_type}' dla {nation} na współrzędnych ({x}, {y}) o wartości {value}.")
+        self._log(f"Dodano kluczowy punkt '{point_type}' dla {nation} na współrzędnych ({x}, {y}) o wartości {value}.")
 
     def calculate_distance(self, x1, y1, x2, y2):
         """Oblicza odległość euklidesową między dwoma punktami."""
@@ -233,20 +240,20 @@ class EconomySystem:
         """Znajduje najbliższą bazę danej nacji względem pozycji jednostki."""
         data = self.get_nation_data(nation)
         if not data or not data['bases']:
-            print(f"Brak baz dla nacji {nation}.")
+            self._log(f"Brak baz dla nacji {nation}.")
             return None
         nearest_base = min(
             data['bases'],
             key=lambda base: self.calculate_distance(unit_x, unit_y, base["coords"][0], base["coords"][1])
         )
         distance = self.calculate_distance(unit_x, unit_y, nearest_base["coords"][0], nearest_base["coords"][1])
-        print(f"Najbliższa baza dla {nation} znajduje się na {nearest_base['coords']} w odległości {distance:.2f}.")
+        self._log(f"Najbliższa baza dla {nation} znajduje się na {nearest_base['coords']} w odległości {distance:.2f}.")
         return nearest_base, distance
 
     def check_supply(self, unit, nearest_base):
         """Sprawdza, czy najbliższa baza posiada zaopatrzenie dla jednostki."""
         if nearest_base['supply_limit'] < unit['supply_needed']:
-            print(f"Baza {nearest_base['coords']} nie ma wystarczającego zaopatrzenia dla jednostki {unit['name']} (nacja: {unit['nation']}).")
+            self._log(f"Baza {nearest_base['coords']} nie ma wystarczającego zaopatrzenia dla jednostki {unit['name']} (nacja: {unit['nation']}).")
             return False
         return True
 
@@ -257,10 +264,10 @@ class EconomySystem:
             return f"Brak danych dla nacji: {nation}"
         total_support = 0
         for ally, max_support in allies.items():
-            roll = random.randint(1, 100)
+            roll = self.rng.randint(1, 100)
             support = int(max_support * (roll / 100.0))
             total_support += support
-            print(f"Sojusznik {ally} przyznał {support} punktów ekonomicznych dla {nation} (rzut: {roll}).")
+            self._log(f"Sojusznik {ally} przyznał {support} punktów ekonomicznych dla {nation} (rzut: {roll}).")
         self.add_income(nation, total_support)
 
     def spend_economic_points(self, nation, amount, description=""):
@@ -269,11 +276,11 @@ class EconomySystem:
         if not data:
             return f"Brak danych dla nacji: {nation}"
         if amount > data['economic_points']:
-            print(f"Nie można wydać {amount} punktów ekonomicznych dla {nation}. Dostępne: {data['economic_points']}.")
+            self._log(f"Nie można wydać {amount} punktów ekonomicznych dla {nation}. Dostępne: {data['economic_points']}.")
             return
         data['economic_points'] -= amount
         data['history'].append(f"Wydano {amount} punktów ekonomicznych dla {nation}. Opis: {description}. Pozostało: {data['economic_points']}")
-        print(f"Wydano {amount} punktów ekonomicznych dla {nation}. Opis: {description}. Pozostało: {data['economic_points']}")
+        self._log(f"Wydano {amount} punktów ekonomicznych dla {nation}. Opis: {description}. Pozostało: {data['economic_points']}")
 
     def load_key_points(self, file_path):
         """Wczytuje kluczowe punkty z pliku JSON."""
@@ -281,12 +288,12 @@ class EconomySystem:
             with open(file_path, "r") as file:
                 data = json.load(file)
                 self.key_points = data.get("key_points", {})
-                print(f"Wczytano {len(self.key_points)} kluczowych punktów z pliku {file_path}.")
+                self._log(f"Wczytano {len(self.key_points)} kluczowych punktów z pliku {file_path}.")
         except FileNotFoundError:
-            print(f"Plik {file_path} nie został znaleziony.")
+            self._log(f"Plik {file_path} nie został znaleziony.")
             self.key_points = {}
         except json.JSONDecodeError:
-            print(f"Błąd dekodowania JSON w pliku {file_path}.")
+            self._log(f"Błąd dekodowania JSON w pliku {file_path}.")
             self.key_points = {}
 
     def capture_key_point(self, nation, hex_id):
@@ -298,10 +305,10 @@ class EconomySystem:
             key_point = self.key_points[hex_id]
             point_value = key_point["value"]
             self.add_income(nation, point_value)
-            print(f"Nacja {nation} zdobyła kluczowy punkt '{key_point['type']}' na heksie {hex_id} i otrzymała {point_value} punktów ekonomicznych.")
+            self._log(f"Nacja {nation} zdobyła kluczowy punkt '{key_point['type']}' na heksie {hex_id} i otrzymała {point_value} punktów ekonomicznych.")
             del self.key_points[hex_id]
         else:
-            print(f"Kluczowy punkt na heksie {hex_id} nie istnieje lub został już zdobyty.")
+            self._log(f"Kluczowy punkt na heksie {hex_id} nie istnieje lub został już zdobyty.")
 
 # Test podstawowych funkcji EconomySystem (do uruchomienia modułu samodzielnie)
 if __name__ == "__main__":
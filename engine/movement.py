@@ -0,0 +1,170 @@
+"""
+Moduł wyznaczający zasięg ruchu jednostek.
+
+Koszt wejścia na heks wynika z modyfikatora terenu: 1 punkt ruchu na terenie
+płaskim plus wartość bezwzględna ujemnego move_mod (np. las -2 -> koszt 3).
+Zasięg liczony jest ograniczonym algorytmem Dijkstry na grafie sąsiedztwa
+heksów. Ponieważ koszty są małymi liczbami całkowitymi, kolejka priorytetowa
+to tablica kubełków (algorytm Diala) zamiast kopca.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from core.map import NO_VALUE
+
+# Liczba wyników ruchu trzymanych w pamięci podręcznej
+DEFAULT_CACHE_SIZE = 256
+
+
+def terrain_move_costs(grid):
+    """Zwraca tablicę kosztów wejścia na każdy heks (0 dla heksów spoza mapy)."""
+    costs = np.maximum(1, 1 - grid.move_mod.astype(np.int32))
+    costs[~grid.valid] = 0
+    return costs
+
+
+class MovementResult:
+    """Wynik wyznaczenia zasięgu: koszty dojścia i poprzednicy na najtańszych ścieżkach."""
+
+    def __init__(self, origin, movement_points, costs, parents, reachable):
+        self.origin = origin
+        self.movement_points = movement_points
+        self.costs = costs          # indeks heksu -> koszt dojścia
+        self.parents = parents      # indeks heksu -> poprzedni heks na ścieżce
+        self.reachable = reachable  # zbiór heksów, na których jednostka może zakończyć ruch
+
+    def can_reach(self, idx):
+        """Sprawdza, czy jednostka może zakończyć ruch na heksie idx."""
+        return idx in self.reachable
+
+    def path_to(self, idx):
+        """Zwraca najtańszą ścieżkę (lista indeksów od heksu startowego) lub None."""
+        if idx not in self.reachable:
+            return None
+        path = [idx]
+        while path[-1] != self.origin:
+            path.append(self.parents[path[-1]])
+        path.reverse()
+        return path
+
+
+class MovementEngine:
+    """Wyznacza zasięg ruchu jednostek i cache'uje wyniki do zmiany terenu lub rozstawienia jednostek."""
+
+    def __init__(self, grid, neighbor_table, cache_size=DEFAULT_CACHE_SIZE):
+        self.grid = grid
+        self.cache_size = cache_size
+        self.neighbor_table = neighbor_table
+        self._adjacency = self._build_adjacency()
+        self.occupied = {}  # indeks heksu -> nacja jednostki
+        self.terrain_version = 0
+        self.occupancy_version = 0
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _build_adjacency(self):
+        """
+        Buduje listy sąsiedztwa [(sąsiad, koszt wejścia), ...] dla każdego heksu.
+
+        Listy krotek Pythona są w pętli Dijkstry znacznie szybsze niż indeksowanie
+        tablic NumPy, a pominięcie heksów spoza mapy oszczędza sprawdzeń.
+        """
+        costs = terrain_move_costs(self.grid).tolist()
+        return [
+            tuple((neighbor, costs[neighbor]) for neighbor in row if neighbor != NO_VALUE)
+            for row in self.neighbor_table.neighbors.tolist()
+        ]
+
+    # ----------------------------
+    # Unieważnianie danych
+    # ----------------------------
+    def terrain_changed(self):
+        """Przelicza koszty wejścia po zmianie terenu i unieważnia zapamiętane wyniki."""
+        self._adjacency = self._build_adjacency()
+        self.terrain_version += 1
+        self._cache.clear()
+
+    def occupy(self, idx, nation):
+        """Zaznacza heks jako zajęty przez jednostkę danej nacji."""
+        if self.occupied.get(idx) != nation:
+            self.occupied[idx] = nation
+            self._occupancy_changed()
+
+    def vacate(self, idx):
+        """Zwalnia heks."""
+        if self.occupied.pop(idx, None) is not None:
+            self._occupancy_changed()
+
+    def clear_occupancy(self):
+        """Zwalnia wszystkie heksy."""
+        if self.occupied:
+            self.occupied.clear()
+            self._occupancy_changed()
+
+    def _occupancy_changed(self):
+        self.occupancy_version += 1
+        self._cache.clear()
+
+    # ----------------------------
+    # Zasięg ruchu
+    # ----------------------------
+    def reachable(self, unit_id, origin, movement_points, nation, turn=0):
+        """
+        Zwraca MovementResult dla jednostki stojącej na heksie origin.
+
+        Args:
+            unit_id: Identyfikator jednostki (klucz pamięci podręcznej)
+            origin: Indeks heksu startowego
+            movement_points: Punkty ruchu pozostałe jednostce w tej turze (klucz pamięci podręcznej)
+            nation: Nacja jednostki - heksy z jednostkami innych nacji są nieprzechodnie
+            turn: Numer tury (klucz pamięci podręcznej)
+
+        Returns:
+            MovementResult
+        """
+        key = (unit_id, origin, movement_points, turn)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return cached
+
+        self.cache_misses += 1
+        result = self.compute(origin, movement_points, nation)
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def compute(self, origin, movement_points, nation):
+        """Ograniczona Dijkstra (kolejka kubełkowa) od heksu origin - bez pamięci podręcznej."""
+        adjacency = self._adjacency
+        occupied = self.occupied
+        # Przez jednostki przeciwnika nie można przejść
+        blocked = {idx for idx, owner in occupied.items() if owner != nation}
+
+        best = {origin: 0}
+        parents = {}
+        get_best = best.get
+        unreachable = movement_points + 1
+        buckets = [[] for _ in range(unreachable)]
+        buckets[0].append(origin)
+
+        for cost, bucket in enumerate(buckets):
+            for idx in bucket:
+                if best[idx] != cost:
+                    continue  # nieaktualny wpis - heks osiągnięto później taniej
+                for neighbor, step in adjacency[idx]:
+                    new_cost = cost + step
+                    if new_cost >= get_best(neighbor, unreachable) or neighbor in blocked:
+                        continue
+                    best[neighbor] = new_cost
+                    parents[neighbor] = idx
+                    buckets[new_cost].append(neighbor)
+
+        # Ruch można zakończyć tylko na wolnym heksie (lub pozostać w miejscu)
+        reachable = {idx for idx in best if idx == origin or idx not in occupied}
+        return MovementResult(origin, movement_points, best, parents, reachable)
@@ -0,0 +1,349 @@
+"""
+Turniej SI kontra SI w scenariuszu Bzura - do strojenia kosztów i parametrów jednostek.
+
+Uruchomienie (z katalogu gry):
+
+    python -m engine.tournament --games 200 --seed 1
+    python -m engine.tournament --report
+
+Każda partia toczy się na mapie Bzury (gui/mapa_cyfrowa/mapa_dane.json)
+z żetonami z katalogu tokeny/: plansza jest na początku pusta, a obie strony
+kupują i wystawiają jednostki przy swoich bazach i walczą do eliminacji
+przeciwnika lub limitu tur (wtedy wygrywa strona z lepszą oceną pozycji).
+Obie strony gra engine.ai.AIPlayer z limitem liczby rozgrywek próbnych
+zamiast limitu czasu, więc partia zależy tylko od ziarna turnieju i swojego
+numeru - wynik nie zależy od obciążenia komputera ani liczby procesów.
+
+Partie rozgrywa pula procesów (domyślnie tyle, ile rdzeni). Wynik każdej
+partii jest od razu dopisywany jako wiersz JSON do pliku wyników; ponowne
+uruchomienie z tym samym ziarnem pomija partie, które już są w pliku, więc
+przerwany turniej można dokończyć. Na koniec wypisywane są statystyki
+z 95% przedziałami ufności.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from core.game_state import GameEngine, GameState, side_of
+from core.hex_neighbors import max_token_range
+from core.token_catalog import load_indexed_tokens
+from core.units import token_stat
+from engine.ai import AIPlayer, apply_plan, build_map, evaluate, snapshot
+from engine.economy import EconomySystem
+from engine.turns import TurnManager
+
+# Ścieżki scenariusza (względem katalogu gry)
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAP_DATA_PATH = os.path.join(ROOT_PATH, "gui", "mapa_cyfrowa", "mapa_dane.json")
+TOKENS_PATH = os.path.join(ROOT_PATH, "tokeny")
+DEFAULT_OUTPUT = os.path.join(ROOT_PATH, "saves", "turnieje", "bzura.jsonl")
+
+# Domyślny limit tur partii (tura jednego gracza) i rozgrywek próbnych SI na turę
+DEFAULT_MAX_TURNS = 40
+DEFAULT_PLAYOUTS = 32
+
+# Wynik partii bez zwycięzcy
+DRAW = "remis"
+
+# Kwantyl rozkładu normalnego dla 95% przedziału ufności
+Z_95 = 1.959963984540054
+
+# Dane scenariusza procesu roboczego (wczytywane raz, w inicjalizatorze)
+_map_data = None
+_tokens = None
+
+
+def load_scenario(map_data_path=MAP_DATA_PATH, tokens_path=TOKENS_PATH):
+    """Wczytuje dane mapy i żetony scenariusza."""
+    with open(map_data_path, "r", encoding="utf-8") as f:
+        map_data = json.load(f)
+    return map_data, load_indexed_tokens(tokens_path)
+
+
+# ----------------------------
+# Partia
+# ----------------------------
+def play_game(map_data, tokens, game, seed, max_turns=DEFAULT_MAX_TURNS, playouts=DEFAULT_PLAYOUTS):
+    """
+    Rozgrywa jedną partię SI kontra SI.
+
+    Args:
+        map_data: Dane mapy (mapa_dane.json)
+        tokens: Żetony obu stron w formacie paneli gry
+        game: Numer partii w turnieju
+        seed: Ziarno turnieju (razem z numerem partii wyznacza całą partię)
+        max_turns: Limit tur
+        playouts: Liczba rozgrywek próbnych SI na turę
+
+    Returns:
+        Słownik wyniku partii (jeden wiersz pliku wyników)
+    """
+    started = time.perf_counter()
+    seeds = np.random.default_rng([seed, game]).integers(2 ** 63, size=4).tolist()
+    max_range = max_token_range([token["data"] for token in tokens])
+    grid, neighbors = build_map(map_data, max_range)
+    state = GameState(economy=EconomySystem(rng=random.Random(seeds[0]), verbose=False))
+    engine = GameEngine(state, grid, neighbors, seed=seeds[1])
+    turns = TurnManager(engine, max_workers=1)
+
+    sides = [side_of(nation) for nation in state.players.values()]
+    players = {side: AIPlayer(map_data, max_range, time_limit=None, max_playouts=playouts, max_workers=1,
+                              seed=seeds[2 + i])
+               for i, side in enumerate(sides)}
+    reserve = {side: [token for token in tokens if side_of(token["nation"]) == side] for side in sides}
+    economy = {side: [state.economy.nations[side]["economic_points"]] for side in sides}
+    losses = {side: {} for side in sides}
+    destroyed = {side: {} for side in sides}
+    purchased = {side: {} for side in sides}
+
+    winner = None
+    decided_by = "limit tur"
+    while state.turn_number <= max_turns:
+        side = side_of(state.current_turn_nation)
+        plan = players[side].plan_turn(snapshot(engine, side, reserve[side]))
+        applied = apply_plan(engine, plan, reserve[side], verbose=False)
+        bought = {name for kind, name, _ in applied if kind == "deploy"}
+        for token in reserve[side]:
+            if token["name"] in bought:
+                unit_type = token["data"].get("unit_type", "")
+                purchased[side][unit_type] = purchased[side].get(unit_type, 0) + 1
+        reserve[side] = [token for token in reserve[side] if token["name"] not in bought]
+
+        # Straty fazy walki: siła jednostek przed turą i po niej (zniszczone nie mają już heksu)
+        before = [(unit, unit.strength) for unit in state.units.values()]
+        turns.run_turn()
+        for unit, strength in before:
+            lost = strength - (unit.strength if unit.hex_id is not None else 0)
+            if lost <= 0:
+                continue
+            unit_side = side_of(unit.nation)
+            losses[unit_side][unit.unit_type] = losses[unit_side].get(unit.unit_type, 0) + lost
+            if unit.hex_id is None:
+                destroyed[unit_side][unit.unit_type] = destroyed[unit_side].get(unit.unit_type, 0) + 1
+        for curve_side in sides:
+            economy[curve_side].append(state.economy.nations[curve_side]["economic_points"])
+
+        # Eliminacja: strona bez jednostek na mapie i bez żetonów, na które ją stać (po pierwszej turze każdej)
+        if state.turn_number > len(sides):
+            defeated = [s for s in sides if not state.units_of(s) and not _can_buy(state, s, reserve[s])]
+            if defeated:
+                decided_by = "eliminacja"
+                winner = DRAW if len(defeated) == len(sides) else next(s for s in sides if s not in defeated)
+                break
+
+    score = evaluate(engine, sides[0])
+    if winner is None:
+        winner = sides[0] if score > 0 else sides[1] if score < 0 else DRAW
+    turns.shutdown()
+    return {
+        "game": game,
+        "seed": seed,
+        "max_turns": max_turns,
+        "playouts": playouts,
+        "winner": winner,
+        "decided_by": decided_by,
+        "turns": state.turn_number - 1,
+        "score": round(score, 3),
+        "economy": economy,
+        "losses": losses,
+        "destroyed": destroyed,
+        "purchased": purchased,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _can_buy(state, side, reserve):
+    points = state.economy.nations[side]["economic_points"]
+    return any(token_stat(token["data"], "purchase_value") <= points for token in reserve)
+
+
+def _init_worker(map_data, tokens):
+    """Inicjalizator procesu roboczego: zapamiętuje dane scenariusza."""
+    global _map_data, _tokens
+    _map_data, _tokens = map_data, tokens
+
+
+def _play_game_task(task):
+    game, seed, max_turns, playouts = task
+    return play_game(_map_data, _tokens, game, seed, max_turns, playouts)
+
+
+# ----------------------------
+# Plik wyników
+# ----------------------------
+def read_results(path, seed=None):
+    """
+    Wczytuje wyniki partii z pliku (wiersze JSON); pomija uszkodzone wiersze
+    (np. niedokończony zapis przerwanego turnieju).
+
+    Args:
+        seed: Zwraca tylko partie turnieju o tym ziarnie (None - wszystkie)
+    """
+    results = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if seed is None or record.get("seed") == seed:
+                    results[(record.get("seed"), record.get("game"))] = record
+    except FileNotFoundError:
+        pass
+    return list(results.values())
+
+
+def _open_for_append(path):
+    """Otwiera plik wyników do dopisywania, kończąc ewentualny urwany ostatni wiersz."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    needs_newline = False
+    try:
+        with open(path, "rb") as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+    except FileNotFoundError:
+        pass
+    f = open(path, "a", encoding="utf-8")
+    if needs_newline:
+        f.write("\n")
+    return f
+
+
+def run_tournament(games, seed, output=DEFAULT_OUTPUT, max_turns=DEFAULT_MAX_TURNS,
+                   playouts=DEFAULT_PLAYOUTS, max_workers=None):
+    """
+    Rozgrywa brakujące partie turnieju w puli procesów i dopisuje ich wyniki do pliku.
+
+    Returns:
+        Wyniki wszystkich partii turnieju (także wczytane z pliku)
+    """
+    results = [record for record in read_results(output, seed) if record["game"] < games]
+    done = {record["game"] for record in results}
+    for record in results:
+        if record.get("max_turns") != max_turns or record.get("playouts") != playouts:
+            print(f"[UWAGA] Partie w {output} rozegrano z innymi ustawieniami "
+                  f"(limit tur {record.get('max_turns')}, rozgrywki {record.get('playouts')})")
+            break
+    pending = [game for game in range(games) if game not in done]
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"[INFO] Turniej (ziarno {seed}): {len(done)} partii w pliku, do rozegrania {len(pending)}, "
+          f"procesy: {max_workers}")
+    if not pending:
+        return results
+
+    map_data, tokens = load_scenario()
+    started = time.perf_counter()
+    with _open_for_append(output) as f, ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(map_data, tokens)) as pool:
+        futures = [pool.submit(_play_game_task, (game, seed, max_turns, playouts)) for game in pending]
+        try:
+            for count, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                results.append(record)
+                print(f"[INFO] Partia {record['game']}: {record['winner']} ({record['decided_by']}, "
+                      f"{record['turns']} tur) - {count}/{len(pending)}, "
+                      f"{time.perf_counter() - started:.0f} s")
+        except KeyboardInterrupt:
+            print("[UWAGA] Turniej przerwany - uruchom go ponownie z tym samym ziarnem, aby dokończyć")
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return results
+
+
+# ----------------------------
+# Statystyki
+# ----------------------------
+def wilson_interval(successes, total, z=Z_95):
+    """Zwraca przedział ufności Wilsona (dolna, górna granica) dla odsetka sukcesów."""
+    if total == 0:
+        return 0.0, 1.0
+    p = successes / total
+    denominator = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def mean_interval(values, z=Z_95):
+    """Zwraca (średnia, połowa szerokości przedziału ufności) - przybliżenie normalne."""
+    if not values:
+        return 0.0, 0.0
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return mean, float("inf")
+    return mean, z * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def report(results):
+    """Zwraca tekstowe podsumowanie turnieju z 95% przedziałami ufności."""
+    total = len(results)
+    lines = [f"=== Turniej SI kontra SI: {total} partii ==="]
+    if not total:
+        return "\n".join(lines)
+    sides = sorted({side for record in results for side in record["economy"]})
+
+    for outcome in sides + [DRAW]:
+        wins = sum(1 for record in results if record["winner"] == outcome)
+        low, high = wilson_interval(wins, total)
+        lines.append(f"{outcome:>8}: {wins} ({wins / total:.1%}, 95% CI {low:.1%} - {high:.1%})")
+    eliminations = sum(1 for record in results if record["decided_by"] == "eliminacja")
+    lines.append(f"Rozstrzygnięte eliminacją: {eliminations} ({eliminations / total:.1%})")
+    mean, margin = mean_interval([record["turns"] for record in results])
+    lines.append(f"Długość partii: {mean:.1f} ± {margin:.1f} tur")
+
+    lines.append("Punkty ekonomiczne na koniec partii:")
+    for side in sides:
+        mean, margin = mean_interval([record["economy"][side][-1] for record in results])
+        lines.append(f"  {side}: {mean:.0f} ± {margin:.0f}")
+
+    for key, title in (("purchased", "Zakupy"), ("losses", "Straty (punkty siły)"),
+                       ("destroyed", "Zniszczone jednostki")):
+        lines.append(f"{title} na partię wg rodzaju jednostki:")
+        for side in sides:
+            unit_types = sorted({unit_type for record in results for unit_type in record[key][side]})
+            parts = []
+            for unit_type in unit_types:
+                mean, margin = mean_interval([record[key][side].get(unit_type, 0) for record in results])
+                parts.append(f"{unit_type} {mean:.2f} ± {margin:.2f}")
+            lines.append(f"  {side}: " + (", ".join(parts) if parts else "-"))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Turniej SI kontra SI w scenariuszu Bzura (strojenie balansu).")
+    parser.add_argument("--games", type=int, default=100, help="liczba partii turnieju")
+    parser.add_argument("--seed", type=int, default=1, help="ziarno turnieju")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="plik wyników (wiersze JSON, dopisywane)")
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS, help="limit tur partii")
+    parser.add_argument("--playouts", type=int, default=DEFAULT_PLAYOUTS,
+                        help="liczba rozgrywek próbnych SI na turę")
+    parser.add_argument("--workers", type=int, default=None, help="liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--report", action="store_true", help="tylko statystyki z pliku wyników")
+    args = parser.parse_args(argv)
+
+    if args.report:
+        results = read_results(args.output, args.seed)
+    else:
+        try:
+            results = run_tournament(args.games, args.seed, args.output, args.max_turns,
+                                     args.playouts, args.workers)
+        except KeyboardInterrupt:
+            return 1
+    print(report(results))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
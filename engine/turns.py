@@ -0,0 +1,178 @@
+"""
+Harmonogram faz tury.
+
+Tura składa się ze stałej sekwencji faz: zakup, wystawienie, ruch, walka,
+zaopatrzenie i koniec tury. Systemy gry rejestrują w fazach swoje funkcje
+(hooki) razem z nazwami danych, które czytają i zapisują. Hooki jednej fazy
+są dzielone na kolejne grupy tak, aby w grupie żadne dwa nie zapisywały
+wspólnych danych ani nie czytały danych zapisywanych przez inny - takie
+grupy wykonują się równolegle w puli wątków, a kolejność hooków zależnych
+zostaje zachowana. Czas każdej fazy jest mierzony.
+
+Te same fazy wykonuje okno gry (koniec tury gracza) i symulacje bez
+wyświetlacza. Hooki mogą działać w wątku roboczym, więc nie wolno w nich
+dotykać Tk - interfejs odświeża się po zakończeniu run_turn().
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Fazy tury w kolejności wykonywania
+PHASES = ("purchase", "deploy", "move", "combat", "supply", "end")
+
+
+class PhaseHook:
+    """Funkcja fazy z deklaracją czytanych i zapisywanych danych."""
+
+    __slots__ = ("name", "func", "reads", "writes")
+
+    def __init__(self, name, func, reads=(), writes=()):
+        self.name = name
+        self.func = func
+        self.reads = frozenset(reads)
+        self.writes = frozenset(writes)
+
+    def conflicts_with(self, other):
+        """Sprawdza, czy hooki nie mogą działać jednocześnie (wspólny zapis lub zapis czytanych danych)."""
+        return bool(self.writes & (other.writes | other.reads) or other.writes & self.reads)
+
+
+class TurnManager:
+    """Wykonuje fazy tury na silniku gry (GameEngine) i mierzy ich czas."""
+
+    def __init__(self, engine, max_workers=None, default_hooks=True):
+        """
+        Args:
+            engine: GameEngine, na którym działają hooki (przekazywany jako jedyny argument)
+            max_workers: Liczba wątków dla równoległych hooków (1 - wszystko po kolei)
+            default_hooks: Czy zarejestrować rozstrzyganie walki (combat), rozliczenie ekonomii
+                (supply) i zmianę gracza (end)
+        """
+        self.engine = engine
+        self.max_workers = max_workers
+        self.hooks = {phase: [] for phase in PHASES}
+        self._batches = {}  # faza -> lista grup hooków (liczona przy pierwszym użyciu)
+        self._executor = None
+        self.phase = None  # faza w trakcie wykonywania
+        self.turns_run = 0
+        self.phase_totals = {phase: 0.0 for phase in PHASES}  # łączny czas faz (s)
+        self.last_timings = {}  # czasy faz ostatniej tury (s)
+        if default_hooks:
+            engine_type = type(engine)
+            self.register("combat", engine_type.resolve_combat, name="combat",
+                          reads=("turn",), writes=("units", "hex_data"))
+            self.register("supply", engine_type.process_supply, name="economy",
+                          reads=("units", "turn"), writes=("economy",))
+            self.register("end", engine_type.advance_turn, name="next_player",
+                          writes=("turn", "locks"))
+
+    # ----------------------------
+    # Rejestracja
+    # ----------------------------
+    def register(self, phase, func, name=None, reads=(), writes=()):
+        """
+        Rejestruje hook fazy.
+
+        Args:
+            phase: Nazwa fazy z PHASES
+            func: Funkcja func(engine)
+            name: Nazwa hooka (do pomiarów i wyrejestrowania; domyślnie nazwa funkcji)
+            reads: Nazwy danych czytanych przez hook (np. "units", "economy")
+            writes: Nazwy danych zapisywanych przez hook
+
+        Raises:
+            ValueError: Gdy faza nie istnieje
+        """
+        if phase not in self.hooks:
+            raise ValueError(f"Nieznana faza tury: {phase}")
+        hook = PhaseHook(name or getattr(func, "__name__", repr(func)), func, reads, writes)
+        self.hooks[phase].append(hook)
+        self._batches.pop(phase, None)
+        return hook
+
+    def unregister(self, phase, name):
+        """Usuwa hooki fazy o podanej nazwie; zwraca liczbę usuniętych."""
+        before = len(self.hooks[phase])
+        self.hooks[phase] = [hook for hook in self.hooks[phase] if hook.name != name]
+        self._batches.pop(phase, None)
+        return before - len(self.hooks[phase])
+
+    def batches(self, phase):
+        """
+        Dzieli hooki fazy na grupy do równoległego wykonania.
+
+        Hook trafia do grupy następnej po ostatniej, w której jest hook z nim
+        sprzeczny - dzięki temu hooki zależne wykonują się w kolejności rejestracji.
+        """
+        batches = self._batches.get(phase)
+        if batches is None:
+            batches = []
+            for hook in self.hooks[phase]:
+                level = 0
+                for i, batch in enumerate(batches):
+                    if any(hook.conflicts_with(other) for other in batch):
+                        level = i + 1
+                if level == len(batches):
+                    batches.append([])
+                batches[level].append(hook)
+            self._batches[phase] = batches
+        return batches
+
+    # ----------------------------
+    # Wykonywanie
+    # ----------------------------
+    def run_phase(self, phase):
+        """Wykonuje hooki jednej fazy; zwraca czas fazy w sekundach."""
+        self.phase = phase
+        started = time.perf_counter()
+        try:
+            for batch in self.batches(phase):
+                if len(batch) == 1 or self.max_workers == 1:
+                    for hook in batch:
+                        hook.func(self.engine)
+                else:
+                    futures = [self._pool().submit(hook.func, self.engine) for hook in batch]
+                    for future in futures:
+                        future.result()  # wyjątek hooka przerywa fazę
+        finally:
+            self.phase = None
+        elapsed = time.perf_counter() - started
+        self.phase_totals[phase] += elapsed
+        self.last_timings[phase] = elapsed
+        return elapsed
+
+    def run_turn(self, phases=PHASES):
+        """
+        Wykonuje fazy tury po kolei.
+
+        Returns:
+            Słownik faza -> czas wykonania w sekundach
+        """
+        self.last_timings = {}
+        for phase in phases:
+            self.run_phase(phase)
+        self.turns_run += 1
+        return dict(self.last_timings)
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="turn-phase")
+        return self._executor
+
+    def shutdown(self):
+        """Zamyka pulę wątków."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    # ----------------------------
+    # Pomiary
+    # ----------------------------
+    def timing_report(self):
+        """Zwraca tekstowe podsumowanie średniego czasu faz na turę."""
+        turns = max(1, self.turns_run)
+        lines = [f"=== Czas faz tury (średnio z {self.turns_run} tur) ==="]
+        for phase in PHASES:
+            lines.append(f"{phase:>8}: {self.phase_totals[phase] / turns * 1000:.3f} ms "
+                         f"({len(self.hooks[phase])} hooków)")
+        return "\n".join(lines)
@@ -0,0 +1,197 @@
+"""
+Moduł mgły wojny (fog of war).
+
+Każda nacja ma licznik pokrycia (ile jej jednostek widzi dany heks) oraz
+mapę bitową widoczności upakowaną po 8 heksów w bajcie. Dodanie, usunięcie
+lub przesunięcie jednostki zmienia tylko heksy z jej dysku widzenia, więc
+koszt aktualizacji zależy od sight_range, a nie od rozmiaru mapy.
+
+Opcjonalny tryb linii wzroku: las i zabudowa zasłaniają heksy leżące za nimi.
+Linie od środka dysku do każdego heksu dysku są liczone raz dla każdej
+parzystości kolumny, a test zasłonięcia to jedno indeksowanie tablicy.
+"""
+
+import numpy as np
+
+from core.map import NO_VALUE
+
+# Typy terenu zasłaniające widok w trybie linii wzroku
+BLOCKING_TERRAIN = ("las", "mała miejscowość", "miasto")
+
+# Przesunięcie punktów na linii, aby nie trafiały dokładnie w krawędź heksu
+LINE_NUDGE = np.array([1e-6, 2e-6, -3e-6])
+
+
+def _offset_to_cube(col, row):
+    """Zamienia współrzędne (kolumna, wiersz) na sześcienne (x, y, z)."""
+    x = col
+    z = row - (col - (col & 1)) // 2
+    return x, -x - z, z
+
+
+def _cube_round(x, y, z):
+    """Zaokrągla punkt we współrzędnych sześciennych do najbliższego heksu."""
+    rx, ry, rz = round(x), round(y), round(z)
+    dx, dy, dz = abs(rx - x), abs(ry - y), abs(rz - z)
+    if dx > dy and dx > dz:
+        rx = -ry - rz
+    elif dy > dz:
+        ry = -rx - rz
+    else:
+        rz = -rx - ry
+    return rx, ry, rz
+
+
+class VisibilitySystem:
+    """Widoczność heksów dla każdej nacji, aktualizowana przyrostowo przy ruchu jednostek."""
+
+    def __init__(self, grid, neighbor_table, line_of_sight=False, blocking_terrain=BLOCKING_TERRAIN):
+        self.grid = grid
+        self.neighbor_table = neighbor_table
+        self.line_of_sight = line_of_sight
+        self.blocking_terrain = tuple(blocking_terrain)
+        self.blocking = self._build_blocking_mask()
+        self.units = {}     # id jednostki -> (nacja, indeks heksu, zasięg widzenia, widziane heksy)
+        self.coverage = {}  # nacja -> liczba jednostek widzących każdy heks
+        self.bitsets = {}   # nacja -> upakowana mapa bitowa widoczności
+        self._line_cache = {}
+
+    def _build_blocking_mask(self):
+        """Zwraca maskę heksów zasłaniających widok."""
+        codes = [code for code, name in enumerate(self.grid.terrain_names) if name in self.blocking_terrain]
+        return np.isin(self.grid.terrain, codes) & self.grid.valid
+
+    def _ensure_nation(self, nation):
+        if nation not in self.coverage:
+            self.coverage[nation] = np.zeros(self.grid.size, dtype=np.uint16)
+            self.bitsets[nation] = np.zeros((self.grid.size + 7) // 8, dtype=np.uint8)
+
+    # ----------------------------
+    # Linie wzroku
+    # ----------------------------
+    def _lines(self, radius, parity):
+        """
+        Zwraca (przesunięcia, maska) heksów pośrednich na liniach od środka dysku
+        do każdego heksu dysku (kolejność jak w HexNeighborTable.disk_offsets).
+
+        Przesunięcia mają kształt K x L x 2, gdzie L = radius - 1; maska K x L
+        oznacza, które pozycje są faktycznymi heksami pośrednimi.
+        """
+        key = (radius, parity)
+        if key not in self._line_cache:
+            disk = self.neighbor_table.disk_offsets(radius, parity)
+            length = max(radius - 1, 0)
+            offsets = np.zeros((len(disk), length, 2), dtype=np.int32)
+            mask = np.zeros((len(disk), length), dtype=bool)
+            origin = np.array(_offset_to_cube(parity, 0), dtype=np.float64) + LINE_NUDGE
+            for k, (dc, dr) in enumerate(disk):
+                target = np.array(_offset_to_cube(parity + int(dc), int(dr)), dtype=np.float64) + LINE_NUDGE
+                distance = int(max(abs(target - origin).round()))
+                for step in range(1, distance):
+                    x, _, z = _cube_round(*(origin + (target - origin) * step / distance))
+                    col = x
+                    row = z + (col - (col & 1)) // 2
+                    offsets[k, step - 1] = (col - parity, row)
+                    mask[k, step - 1] = True
+            self._line_cache[key] = (offsets, mask)
+        return self._line_cache[key]
+
+    def sight_cells(self, idx, sight_range):
+        """Zwraca indeksy heksów widzianych z heksu idx (z uwzględnieniem linii wzroku, jeśli włączona)."""
+        targets = self.neighbor_table.disk_many([idx], sight_range)[0]
+        if self.line_of_sight and sight_range > 1:
+            col = int(self.neighbor_table.cols[idx])
+            row = int(self.neighbor_table.rows[idx])
+            offsets, mask = self._lines(sight_range, col & 1)
+            between = self.neighbor_table.offset_targets(col, row, offsets[..., 0], offsets[..., 1])
+            blocked = mask & (between != NO_VALUE) & self.blocking[between]
+            targets = np.where(blocked.any(axis=1), NO_VALUE, targets)
+        return targets[targets != NO_VALUE]
+
+    # ----------------------------
+    # Jednostki
+    # ----------------------------
+    def add_unit(self, unit_id, nation, idx, sight_range):
+        """Dodaje jednostkę (lub przestawia istniejącą) i odsłania heksy w jej zasięgu widzenia."""
+        if unit_id in self.units:
+            self.remove_unit(unit_id)
+        self._ensure_nation(nation)
+        cells = self.sight_cells(idx, sight_range)
+        coverage = self.coverage[nation]
+        coverage[cells] += 1
+        self._set_bits(nation, cells[coverage[cells] == 1])
+        self.units[unit_id] = (nation, idx, sight_range, cells)
+
+    def remove_unit(self, unit_id):
+        """Usuwa jednostkę i zasłania heksy, których nie widzi już żadna jednostka tej nacji."""
+        unit = self.units.pop(unit_id, None)
+        if unit is None:
+            return
+        nation, _, _, cells = unit
+        coverage = self.coverage[nation]
+        coverage[cells] -= 1
+        self._clear_bits(nation, cells[coverage[cells] == 0])
+
+    def move_unit(self, unit_id, idx):
+        """Przesuwa jednostkę na heks idx."""
+        nation, _, sight_range, _ = self.units[unit_id]
+        self.add_unit(unit_id, nation, idx, sight_range)
+
+    def clear(self):
+        """Usuwa wszystkie jednostki - cała mapa zostaje zakryta."""
+        self.units.clear()
+        for nation in self.coverage:
+            self.coverage[nation][:] = 0
+            self.bitsets[nation][:] = 0
+
+    def _recompute_all(self):
+        units = list(self.units.items())
+        self.clear()
+        for unit_id, (nation, idx, sight_range, _) in units:
+            self.add_unit(unit_id, nation, idx, sight_range)
+
+    def set_line_of_sight(self, enabled):
+        """Włącza lub wyłącza tryb linii wzroku i przelicza widoczność."""
+        if self.line_of_sight != enabled:
+            self.line_of_sight = enabled
+            self._recompute_all()
+
+    def terrain_changed(self):
+        """Odświeża maskę terenu zasłaniającego po zmianie mapy."""
+        self.blocking = self._build_blocking_mask()
+        if self.line_of_sight:
+            self._recompute_all()
+
+    # ----------------------------
+    # Mapy bitowe
+    # ----------------------------
+    def _set_bits(self, nation, cells):
+        np.bitwise_or.at(self.bitsets[nation], cells >> 3, (0x80 >> (cells & 7)).astype(np.uint8))
+
+    def _clear_bits(self, nation, cells):
+        np.bitwise_and.at(self.bitsets[nation], cells >> 3, ~(0x80 >> (cells & 7)).astype(np.uint8))
+
+    # ----------------------------
+    # Zapytania
+    # ----------------------------
+    def is_visible(self, nation, idx):
+        """Sprawdza, czy nacja widzi heks idx."""
+        bitset = self.bitsets.get(nation)
+        if bitset is None or idx == NO_VALUE:
+            return False
+        return bool(bitset[idx >> 3] & (0x80 >> (idx & 7)))
+
+    def visible_mask(self, nation):
+        """Zwraca maskę logiczną heksów widzianych przez nację."""
+        bitset = self.bitsets.get(nation)
+        if bitset is None:
+            return np.zeros(self.grid.size, dtype=bool)
+        return np.unpackbits(bitset, count=self.grid.size).astype(bool)
+
+    def visible_indices(self, nation):
+        """Zwraca indeksy heksów widzianych przez nację."""
+        return np.flatnonzero(self.visible_mask(nation))
+
+    def visible_count(self, nation):
+        """Zwraca liczbę heksów widzianych przez nację."""
+        return int(np.count_nonzero(self.coverage.get(nation, ())))
@@ -0,0 +1,101 @@
+"""
+Podgląd przeciąganego żetonu na canvasie mapy.
+
+Element obrazu podglądu i obrys heksu docelowego są tworzone raz i przy
+kolejnych zdarzeniach <B1-Motion> tylko przesuwane (coords / itemconfig).
+Zdarzenia ruchu są łączone: zapamiętywana jest ostatnia pozycja kursora,
+a przesunięcie wykonuje się raz na cykl odświeżania (after_idle).
+"""
+
+from core.hex_picker import get_hex_vertices
+
+
+class DragController:
+    """Przesuwa podgląd żetonu i pokazuje heks, na który żeton zostanie upuszczony."""
+
+    def __init__(self, canvas, picker, hex_size, map_scale, snap_distance=None):
+        self.canvas = canvas
+        self.picker = picker
+        self.hex_size = hex_size
+        self.map_scale = map_scale
+        self.snap_distance = snap_distance if snap_distance is not None else hex_size * 1.5
+        self.preview_id = None
+        self.snap_id = None
+        self.active = False
+        self.target_hex = None
+        self._pending = None
+        self._after_id = None
+        self._origin = (0, 0)
+
+    def start(self, image, x_root, y_root):
+        """Rozpoczyna przeciąganie - pokazuje podgląd obrazu image pod kursorem (współrzędne ekranu)."""
+        # Położenie canvasa na ekranie nie zmienia się w trakcie przeciągania
+        self._origin = (self.canvas.winfo_rootx(), self.canvas.winfo_rooty())
+        x, y = self._canvas_coords(x_root, y_root)
+
+        if self.preview_id is None:
+            self.snap_id = self.canvas.create_polygon(
+                0, 0, 0, 0, 0, 0, outline="white", fill="", width=3, dash=(6, 4),
+                state="hidden", tags="drag_snap"
+            )
+            self.preview_id = self.canvas.create_image(x, y, image=image, tags="token_preview")
+        else:
+            self.canvas.itemconfig(self.preview_id, image=image, state="normal")
+            self.canvas.coords(self.preview_id, x, y)
+        self.canvas.tag_raise(self.snap_id)
+        self.canvas.tag_raise(self.preview_id)
+
+        self.active = True
+        self.target_hex = None
+        self._update_snap(x, y)
+
+    def move(self, x_root, y_root):
+        """Zapamiętuje pozycję kursora; podgląd zostanie przesunięty w najbliższym cyklu odświeżania."""
+        if not self.active:
+            return
+        self._pending = (x_root, y_root)
+        if self._after_id is None:
+            self._after_id = self.canvas.after_idle(self._flush)
+
+    def _flush(self):
+        self._after_id = None
+        if not self.active or self._pending is None:
+            return
+        x, y = self._canvas_coords(*self._pending)
+        self._pending = None
+        self.canvas.coords(self.preview_id, x, y)
+        self._update_snap(x, y)
+
+    def stop(self):
+        """Kończy przeciąganie - ukrywa podgląd i zwraca ostatni heks docelowy (lub None)."""
+        if self._after_id is not None:
+            self.canvas.after_cancel(self._after_id)
+            self._after_id = None
+        self._pending = None
+        self.active = False
+        if self.preview_id is not None:
+            self.canvas.itemconfig(self.preview_id, state="hidden")
+            self.canvas.itemconfig(self.snap_id, state="hidden")
+        return self.target_hex
+
+    def _canvas_coords(self, x_root, y_root):
+        """Zamienia współrzędne ekranu na współrzędne canvasa (z uwzględnieniem przewinięcia)."""
+        return (self.canvas.canvasx(x_root - self._origin[0]),
+                self.canvas.canvasy(y_root - self._origin[1]))
+
+    def _update_snap(self, x, y):
+        """Przesuwa obrys na heks pod kursorem (tylko gdy heks się zmienił)."""
+        if self.picker is None:
+            return
+        hex_id = self.picker.pick(x / self.map_scale, y / self.map_scale, max_distance=self.snap_distance)
+        if hex_id == self.target_hex:
+            return
+        self.target_hex = hex_id
+        if hex_id is None:
+            self.canvas.itemconfig(self.snap_id, state="hidden")
+            return
+        center_x, center_y = self.picker.hex_centers[hex_id]
+        vertices = get_hex_vertices(center_x * self.map_scale, center_y * self.map_scale,
+                                    self.hex_size * self.map_scale)
+        self.canvas.coords(self.snap_id, *[coord for point in vertices for coord in point])
+        self.canvas.itemconfig(self.snap_id, state="normal")
@@ -0,0 +1,131 @@
+"""
+Warstwa siatki heksów renderowana do jednego obrazu.
+
+Zamiast tysięcy elementów canvasa (wielokąt + etykiety na każdy heks) obrys
+siatki i etykiety są rysowane raz do przezroczystego obrazu RGBA dla danej
+skali mapy. Gotowe warstwy trafiają do katalogu cache pod kluczem będącym
+skrótem danych mapy, więc kolejne uruchomienia tylko wczytują plik PNG.
+Interaktywne podświetlenia pozostają osobnymi elementami canvasa.
+"""
+
+import hashlib
+import json
+import os
+
+from PIL import Image, ImageDraw, ImageFont
+
+from core.hex_picker import get_hex_vertices
+
+# Katalog z wyrenderowanymi warstwami
+OVERLAY_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mapa_cyfrowa", "cache")
+
+# Zmiana wyglądu warstwy wymaga zmiany wersji (unieważnia stare pliki cache)
+OVERLAY_VERSION = 1
+
+OUTLINE_COLOR = (255, 0, 0, 255)
+HEX_ID_COLOR = (0, 0, 255, 255)
+MODS_COLOR = (0, 128, 0, 255)
+LABEL_FONT_SIZE = 11  # odpowiednik ("Arial", 8) na canvasie
+
+
+def load_label_font(size=LABEL_FONT_SIZE):
+    """Zwraca czcionkę etykiet (Arial, DejaVu Sans lub wbudowaną czcionkę PIL)."""
+    for name in ("arial.ttf", "DejaVuSans.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+class HexGridOverlay:
+    """Renderuje i cache'uje warstwę siatki heksów dla kolejnych skal mapy."""
+
+    def __init__(self, grid, debug_mode=False, cache_dir=OVERLAY_CACHE_DIR):
+        self.grid = grid
+        self.debug_mode = debug_mode
+        self.cache_dir = cache_dir
+        self.layers = {}  # (skala, rozmiar) -> obraz RGBA
+        self._font = None
+
+    def cache_key(self, map_scale, size):
+        """Zwraca skrót danych mapy i parametrów rysowania, które wpływają na wygląd warstwy."""
+        grid = self.grid
+        digest = hashlib.sha1()
+        params = {
+            "version": OVERLAY_VERSION,
+            "scale": map_scale,
+            "size": list(size),
+            "debug": self.debug_mode,
+            "hex_size": grid.hex_size,
+            "defaults": grid.hex_defaults,
+        }
+        digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+        for array in (grid.valid, grid.centers, grid.move_mod, grid.defense_mod):
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+    def get_layer(self, map_scale, size):
+        """
+        Zwraca warstwę siatki (obraz RGBA o rozmiarze size) dla podanej skali.
+
+        Kolejność: pamięć -> plik w katalogu cache -> renderowanie i zapis do cache.
+        """
+        memory_key = (map_scale, tuple(size))
+        if memory_key in self.layers:
+            return self.layers[memory_key]
+
+        path = os.path.join(self.cache_dir, f"hex_overlay_{self.cache_key(map_scale, size)}.png")
+        layer = None
+        if os.path.exists(path):
+            try:
+                layer = Image.open(path)
+                layer.load()
+                print(f"[INFO] Wczytano warstwę siatki z cache: {path}")
+            except OSError as e:
+                print(f"[UWAGA] Nie udało się wczytać warstwy siatki z cache: {e}")
+                layer = None
+
+        if layer is None:
+            layer = self.render(map_scale, size)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                layer.save(path, compress_level=1)
+                print(f"[INFO] Zapisano warstwę siatki do cache: {path}")
+            except OSError as e:
+                print(f"[UWAGA] Nie udało się zapisać warstwy siatki: {e}")
+
+        self.layers[memory_key] = layer
+        return layer
+
+    def render(self, map_scale, size):
+        """Rysuje obrys heksów i etykiety do nowego przezroczystego obrazu."""
+        grid = self.grid
+        layer = Image.new("RGBA", (int(size[0]), int(size[1])), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+        if self._font is None:
+            self._font = load_label_font()
+
+        s = grid.hex_size * map_scale
+        modified = grid.modified_mask()
+        for idx in grid.valid_indices():
+            x = grid.centers[idx, 0] * map_scale
+            y = grid.centers[idx, 1] * map_scale
+            vertices = get_hex_vertices(x, y, s)
+            draw.line(vertices + vertices[:1], fill=OUTLINE_COLOR, width=2, joint="curve")
+
+            if self.debug_mode:
+                self._draw_label(draw, x, y, grid.hex_id_of(idx), HEX_ID_COLOR)
+            if modified[idx]:
+                text = f"M:{grid.move_mod[idx]} D:{grid.defense_mod[idx]}"
+                self._draw_label(draw, x, y + 15, text, MODS_COLOR)
+        return layer
+
+    def _draw_label(self, draw, x, y, text, color):
+        """Rysuje tekst wyśrodkowany w punkcie (x, y)."""
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=self._font)
+        draw.text((x - (left + right) / 2, y - (top + bottom) / 2), text, fill=color, font=self._font)
+
+    def clear(self):
+        """Czyści warstwy trzymane w pamięci (np. po zmianie danych mapy)."""
+        self.layers.clear()
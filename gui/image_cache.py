@@ -0,0 +1,113 @@
+"""
+Wspólna pamięć podręczna zdekodowanych i przeskalowanych obrazów żetonów.
+
+Kluczem jest (ścieżka, czas modyfikacji, rozmiar, metoda skalowania), więc
+zmiana pliku na dysku automatycznie daje nowy wpis. Pamięć trzyma obraz PIL
+oraz (tworzony przy pierwszym użyciu) PhotoImage, pilnuje budżetu pamięci
+i usuwa najdawniej używane wpisy. Usunięcie wpisu nie psuje obrazów już
+wyświetlonych - wywołujący trzymają własne referencje do PhotoImage.
+"""
+
+import os
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+# Budżet pamięci na obrazy (bajty) - domyślnie 64 MB
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+
+class ImageCache:
+    """Pamięć podręczna LRU obrazów PIL i PhotoImage z budżetem pamięci."""
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self.entries = OrderedDict()  # klucz -> [obraz PIL, PhotoImage lub None, zajęte bajty]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(path, size, resample=Image.Resampling.LANCZOS):
+        """Zwraca klucz wpisu; OSError, gdy plik nie istnieje."""
+        path = os.path.abspath(path)
+        return path, os.stat(path).st_mtime_ns, (int(size[0]), int(size[1])), int(resample)
+
+    @staticmethod
+    def decode(key):
+        """Dekoduje i skaluje obraz opisany kluczem (bez pamięci podręcznej - bezpieczne w innym wątku)."""
+        path, _, size, resample = key
+        with Image.open(path) as img:
+            return img.resize(size, resample)
+
+    def _entry(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        return self.put_image(key, self.decode(key))
+
+    def contains(self, key):
+        """Sprawdza, czy obraz o danym kluczu jest już w pamięci podręcznej."""
+        return key in self.entries
+
+    def put_image(self, key, image):
+        """Dodaje gotowy (np. zdekodowany w tle) obraz PIL pod kluczem key i zwraca wpis."""
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = [image, None, _image_bytes(image)]
+            self.entries[key] = entry
+            self.memory_used += entry[2]
+            self._evict()
+        return entry
+
+    def get_image(self, path, size, resample=Image.Resampling.LANCZOS):
+        """Zwraca obraz PIL pliku path przeskalowany do size."""
+        return self._entry(self.make_key(path, size, resample))[0]
+
+    def get_photo(self, path, size, resample=Image.Resampling.LANCZOS):
+        """Zwraca PhotoImage pliku path przeskalowanego do size (wymaga istniejącego okna Tk)."""
+        return self.photo_for_key(self.make_key(path, size, resample))
+
+    def photo_for_key(self, key):
+        """Zwraca PhotoImage obrazu o danym kluczu (tylko w wątku Tk)."""
+        entry = self._entry(key)
+        if entry[1] is None:
+            entry[1] = ImageTk.PhotoImage(entry[0])
+            # PhotoImage to druga kopia pikseli po stronie Tk
+            self.memory_used += entry[2]
+            entry[2] *= 2
+            self._evict()
+        return entry[1]
+
+    def _evict(self):
+        """Usuwa najdawniej używane wpisy, dopóki pamięć przekracza budżet (zostawia co najmniej jeden)."""
+        while self.memory_used > self.memory_budget and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            self.memory_used -= entry[2]
+            self.evictions += 1
+
+    def clear(self):
+        """Usuwa wszystkie wpisy."""
+        self.entries.clear()
+        self.memory_used = 0
+
+    def stats(self):
+        """Zwraca statystyki pamięci podręcznej."""
+        return {
+            "entries": len(self.entries),
+            "memory_used": self.memory_used,
+            "memory_budget": self.memory_budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _image_bytes(image):
+    """Szacuje pamięć zajmowaną przez piksele obrazu."""
+    return image.width * image.height * len(image.getbands())
@@ -0,0 +1,110 @@
+"""
+Wczytywanie obrazów żetonów w tle.
+
+Dekodowanie i skalowanie (PIL zwalnia GIL) odbywa się w puli wątków, a gotowe
+obrazy wracają do wątku Tk przez kolejkę sprawdzaną cyklicznie w after().
+PhotoImage powstaje zawsze w wątku Tk - Tkinter nie jest bezpieczny
+wielowątkowo. Obrazy trafiają do wspólnej ImageCache.
+"""
+
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from gui.image_cache import ImageCache
+
+# Liczba wątków dekodujących
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 2))
+
+# Odstęp sprawdzania kolejki wyników (ms) i czas na obsługę wyników w jednym cyklu (s)
+POLL_INTERVAL_MS = 15
+POLL_TIME_BUDGET = 0.008
+
+
+class AsyncImageLoader:
+    """Pula wątków dekodujących obrazy z przekazywaniem wyników do wątku Tk."""
+
+    def __init__(self, widget, image_cache, max_workers=DEFAULT_WORKERS):
+        self.widget = widget
+        self.image_cache = image_cache
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-loader")
+        self.results = queue.Queue()
+        self.waiting = {}  # klucz obrazu -> lista funkcji callback(photo)
+        self._polling = False
+
+    def request(self, path, size, callback=None, resample=Image.Resampling.LANCZOS):
+        """
+        Zamawia obraz pliku path w rozmiarze size.
+
+        Jeśli obraz jest już w pamięci podręcznej, callback(photo) wywoływany jest
+        od razu; w przeciwnym razie po zdekodowaniu w tle (zawsze w wątku Tk).
+
+        Returns:
+            True, gdy callback został już wywołany; False, gdy obraz wczytuje się w tle
+        """
+        try:
+            key = ImageCache.make_key(path, size, resample)
+        except OSError as e:
+            print(f"[BŁĄD] Nie znaleziono obrazu {path}: {e}")
+            return False
+
+        if self.image_cache.contains(key):
+            if callback:
+                callback(self.image_cache.photo_for_key(key))
+            return True
+
+        callbacks = self.waiting.get(key)
+        if callbacks is None:
+            self.waiting[key] = callbacks = []
+            future = self.executor.submit(ImageCache.decode, key)
+            future.add_done_callback(lambda f, k=key: self.results.put((k, f)))
+            self._ensure_polling()
+        if callback:
+            callbacks.append(callback)
+        return False
+
+    def prefetch(self, path, size, resample=Image.Resampling.LANCZOS):
+        """Wczytuje obraz do pamięci podręcznej w tle, bez tworzenia PhotoImage."""
+        self.request(path, size, None, resample)
+
+    @property
+    def pending(self):
+        """Liczba obrazów jeszcze wczytywanych."""
+        return len(self.waiting)
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.widget.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        """Przekazuje gotowe obrazy do pamięci podręcznej i wywołuje oczekujące funkcje."""
+        deadline = time.perf_counter() + POLL_TIME_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                key, future = self.results.get_nowait()
+            except queue.Empty:
+                break
+            callbacks = self.waiting.pop(key, [])
+            error = future.exception()
+            if error is not None:
+                print(f"[BŁĄD] Podczas wczytywania obrazu {key[0]}: {error}")
+                continue
+            self.image_cache.put_image(key, future.result())
+            if callbacks:
+                photo = self.image_cache.photo_for_key(key)
+                for callback in callbacks:
+                    callback(photo)
+
+        if self.waiting or not self.results.empty():
+            self.widget.after(POLL_INTERVAL_MS, self._poll)
+        else:
+            self._polling = False
+
+    def shutdown(self):
+        """Zatrzymuje pulę wątków (niewykonane zadania są anulowane)."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.waiting.clear()
@@ -3,7 +3,13 @@ from tkinter import messagebox, filedialog, simpledialog
 import json
 import math
 import os
-from PIL import Image, ImageTk, ImageDraw, ImageFont
+from PIL import Image, ImageTk
+# Funkcje geometrii heksów (wspólne z grą) i indeks przestrzenny do testów trafienia
+from core.hex_picker import HexBucketIndex, get_hex_vertices
+# Dziennik zmian (dopisywanie pojedynczych zmian zamiast przepisywania pliku roboczego)
+from core.edit_journal import EditJournal
+from core.map import HexGrid, encode_hex_mask
+from gui.map_export import MapExporter
 
 # ----------------------------
 # Konfiguracja rodzajów terenu
@@ -73,32 +79,6 @@ CONFIG = {
     }
 }
 
-# ----------------------------
-# Funkcja pomocnicza: punkt w wielokącie (ray-casting)
-# ----------------------------
-def point_in_polygon(x, y, poly):
-    """Zwraca True, jeśli punkt (x, y) leży wewnątrz wielokąta poly (lista krotek (x, y))."""
-    num = len(poly)
-    j = num - 1
-    c = False
-    for i in range(num):
-        if ((poly[i][1] > y) != (poly[j][1] > y)) and \
-           (x < (poly[j][0] - poly[i][0]) * (y - poly[i][1]) / (poly[j][1] - poly[i][1] + 1e-10) + poly[i][0]):
-            c = not c
-        j = i
-    return c
-
-def get_hex_vertices(center_x, center_y, s):
-    """Zwraca listę wierzchołków heksagonu (flat-topped)."""
-    return [
-        (center_x - s, center_y),
-        (center_x - s/2, center_y - (math.sqrt(3)/2)*s),
-        (center_x + s/2, center_y - (math.sqrt(3)/2)*s),
-        (center_x + s, center_y),
-        (center_x + s/2, center_y + (math.sqrt(3)/2)*s),
-        (center_x - s/2, center_y + (math.sqrt(3)/2)*s)
-    ]
-
 # ----------------------------
 # Klasa interaktywnego edytora mapy
 # ----------------------------
@@ -200,9 +180,15 @@ class MapEditor:
         self.create_interface()
     
     def create_interface(self):
-        # Dane terenu – domyślnie puste, później uzupełniane domyślnym terenem płaskim
-        self.hex_data = wczytaj_dane_hex()
+        # Dane terenu – plik roboczy z odtworzonym dziennikiem zmian (puste = domyślny teren płaski)
+        self.current_working_file = self.get_working_data_path()
+        self.journal = EditJournal(self.current_working_file)
+        loaded_data = self.journal.load()
+        self.hex_data = loaded_data["terrain"]
+        self.key_points = loaded_data["key_points"]
         self.hex_centers = {}  # klucz: "kolumna_wiersz" -> (center_x, center_y)
+        self.hex_index = None  # indeks kubełkowy heksów, przebudowywany w draw_grid
+        self.hovered_hex = None  # ostatnio wskazany heks (unikamy zbędnego odświeżania etykiet)
         
         # Aktualnie wybrany heks
         self.selected_hex = None
@@ -343,6 +329,9 @@ class MapEditor:
         # Dodanie obsługi zdarzenia Motion
         self.canvas.bind("<Motion>", self.on_canvas_hover)
 
+        # Przy zamknięciu okna dziennik zmian jest kompaktowany do pliku roboczego
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
         self.draw_grid()
     
     def draw_grid(self):
@@ -373,6 +362,10 @@ class MapEditor:
                 terrain = self.hex_data.get(hex_id, self.hex_defaults)
                 self.draw_hex(hex_id, center_x, center_y, s, terrain)
         
+        # Przebuduj indeks przestrzenny dla obsługi kliknięć i ruchu myszy
+        self.hex_index = HexBucketIndex(self.hex_centers, s)
+        self.hovered_hex = None
+        
         if self.selected_hex is not None:
             self.highlight_hex(self.selected_hex)
         
@@ -402,13 +395,8 @@ class MapEditor:
         # Używamy canvasx/canvasy, aby uwzględnić przesunięcie scrolla
         x = self.canvas.canvasx(event.x)
         y = self.canvas.canvasy(event.y)
-        clicked_hex = None
         # Sprawdzamy, czy kliknięty punkt leży wewnątrz któregoś heksagonu
-        for hex_id, (cx, cy) in self.hex_centers.items():
-            vertices = get_hex_vertices(cx, cy, self.hex_size)
-            if point_in_polygon(x, y, vertices):
-                clicked_hex = hex_id
-                break
+        clicked_hex = self.hex_index.hex_at(x, y)
         if clicked_hex:
             self.selected_hex = clicked_hex
             self.highlight_hex(clicked_hex)
@@ -442,14 +430,16 @@ class MapEditor:
                 # Jeśli teren jest domyślny, usuń wpis z hex_data
                 if self.selected_hex in self.hex_data:
                     del self.hex_data[self.selected_hex]
+                self.record_change(self.journal.record_terrain(self.selected_hex, None))
             else:
                 # W przeciwnym razie, dodaj/zaktualizuj wpis
                 self.hex_data[self.selected_hex] = terrain.copy()
+                self.record_change(self.journal.record_terrain(self.selected_hex, terrain.copy()))
                 
-            # Zapisz dane i odrysuj heks
-            self.save_data()
+            # Odrysuj heks (zmiana jest już w dzienniku)
             cx, cy = self.hex_centers[self.selected_hex]
             self.draw_hex(self.selected_hex, cx, cy, self.hex_size, terrain)
+            self.hovered_hex = None  # wymuś odświeżenie etykiet przy następnym ruchu myszy
             messagebox.showinfo("Zapisano", f"Dla heksu {self.selected_hex} ustawiono: {terrain_key}")
         else:
             messagebox.showerror("Błąd", "Niepoprawny rodzaj terenu.")
@@ -483,53 +473,49 @@ class MapEditor:
             # W przypadku problemów, użyj domyślnej lokalizacji
             return os.path.join(os.path.dirname(os.path.abspath(__file__)), "dane_terenow_hexow_working.json")
     
-    def save_data(self):
-        # Zoptymalizowany zapis danych - tylko niestandardowe heksy
+    def current_map_data(self):
+        """Zwraca dane pliku roboczego - tylko niestandardowe heksy i kluczowe punkty."""
         optimized_data = {}
         for hex_id, terrain in self.hex_data.items():
             if (terrain.get('move_mod', 0) != self.hex_defaults.get('move_mod', 0) or 
                 terrain.get('defense_mod', 0) != self.hex_defaults.get('defense_mod', 0)):
                 optimized_data[hex_id] = terrain
-        
-        # Dodanie kluczowych punktów do danych
-        map_data = {
-            "terrain": optimized_data,
-            "key_points": self.key_points  # Dodanie kluczowych punktów do zapisu
-        }
-
-        # Ustal ścieżkę do pliku danych w folderze mapa_cyfrowa
-        self.current_working_file = self.get_working_data_path()
-        print(f"Zapisywanie danych do: {self.current_working_file}")
-        
-        # Zapisz dane używając dynamicznej ścieżki
-        zapisz_dane_hex(map_data, self.current_working_file)
+        return {"terrain": optimized_data, "key_points": self.key_points}
+    
+    def record_change(self, compact_needed):
+        """Po dopisaniu zmiany do dziennika - kompaktuje go w tle, gdy urósł ponad próg."""
+        if compact_needed:
+            self.journal.compact(self.current_map_data(), background=True)
+    
+    def save_data(self):
+        # Pełny zapis pliku roboczego (kompaktowanie dziennika zmian)
+        print(f"Zapisywanie danych do: {self.journal.working_path}")
+        self.journal.compact(self.current_map_data())
         messagebox.showinfo("Zapisano", 
-                          f"Dane mapy zostały zapisane w: {self.current_working_file}\n" + 
+                          f"Dane mapy zostały zapisane w: {self.journal.working_path}\n" + 
                           f"Liczba kluczowych punktów: {len(self.key_points)}")
     
     def load_data(self):
-        # Ustal ścieżkę do pliku danych w folderze mapy
-        self.current_working_file = self.get_working_data_path()
-        print(f"Wczytywanie danych z: {self.current_working_file}")
+        print(f"Wczytywanie danych z: {self.journal.working_path}")
         
-        # Wczytaj dane używając dynamicznej ścieżki
-        loaded_data = wczytaj_dane_hex(self.current_working_file)
-        if loaded_data:
+        # Plik roboczy z odtworzonymi zmianami z dziennika
+        loaded_data = self.journal.load()
+        if loaded_data["terrain"] or loaded_data["key_points"]:
             self.hex_data = loaded_data.get("terrain", {})
             self.key_points = loaded_data.get("key_points", {})
             self.draw_grid()
             messagebox.showinfo("Wczytano", 
-                              f"Dane mapy zostały wczytane z: {self.current_working_file}\n" + 
+                              f"Dane mapy zostały wczytane z: {self.journal.working_path}\n" + 
                               f"Liczba kluczowych punktów: {len(self.key_points)}")
         else:
-            messagebox.showinfo("Informacja", f"Brak danych do wczytania lub plik {self.current_working_file} nie istnieje.")
+            messagebox.showinfo("Informacja", f"Brak danych do wczytania lub plik {self.journal.working_path} nie istnieje.")
     
     def clear_variables(self):
         answer = messagebox.askyesno("Potwierdzenie", "Czy na pewno chcesz zresetować mapę do domyślnego terenu płaskiego?")
         if answer:
             self.hex_data = {}  # Usunięcie wszystkich danych terrenu - będą używane domyślne wartości
             self.key_points = {}  # Usunięcie wszystkich kluczowych punktów
-            zapisz_dane_hex({"terrain": self.hex_data, "key_points": self.key_points})
+            self.journal.compact(self.current_map_data())
             self.draw_grid()
             messagebox.showinfo("Zresetowano", "Mapa została zresetowana do domyślnego terenu płaskiego.")
     
@@ -549,14 +535,7 @@ class MapEditor:
         print(f"Czy folder istnieje: {os.path.exists(save_dir)}")
         print(f"Czy można zapisywać w folderze: {os.access(save_dir, os.W_OK)}")
 
-        # Opcja zapisu etykiet na obrazie (zawsze False zgodnie z wymaganiami)
-        draw_labels = False  # Etykiety zawsze wyłączone
-        
-        img = self.bg_image.copy()
-        draw = ImageDraw.Draw(img)
         s = self.hex_size
-        hex_height = math.sqrt(3) * s
-        horizontal_spacing = 1.5 * s
         grid_cols = self.config.get("grid_cols")
         grid_rows = self.config.get("grid_rows")
         
@@ -576,69 +555,46 @@ class MapEditor:
                 terrain.get('defense_mod', 0) != self.hex_defaults.get('defense_mod', 0)):
                 map_data["hex_data"][hex_id] = terrain
         
-        # Dodanie informacji o pozycjach heksów w formacie [x, y]
-        map_data["hex_centers"] = {hex_id: list(center) for hex_id, center in self.hex_centers.items()}
+        # Środki heksów wynikają z konfiguracji - zapisujemy tylko maskę heksów mieszczących się na obrazie
+        grid = HexGrid(grid_cols, grid_rows, s)
+        for hex_id in self.hex_centers:
+            grid.valid[grid.index_of(hex_id)] = True
+        map_data["hex_mask"] = encode_hex_mask(grid.valid, grid_cols, grid_rows)
         
         # Dodanie kluczowych punktów do danych
         map_data["key_points"] = self.key_points
         
-        # Rysowanie heksów na obrazie
-        for col in range(grid_cols):
-            center_x = s + col * horizontal_spacing
-            for row in range(grid_rows):
-                center_y = (s * math.sqrt(3)/2) + row * hex_height
-                if col % 2 == 1:
-                    center_y += hex_height/2
-                if center_x + s > self.world_width or center_y + (s * math.sqrt(3)/2) > self.world_height:
-                    continue
-                
-                # Rysowanie obrysu heksu
-                points = get_hex_vertices(center_x, center_y, s)
-                draw.polygon(points, outline="red")
-                
-                hex_id = f"{col}_{row}"
-                
-                # Zbieranie danych o terenie (nadal potrzebne do JSON)
-                terrain = self.hex_data.get(hex_id, self.hex_defaults)
-                move_mod = terrain.get('move_mod', self.hex_defaults.get('move_mod', 0))
-                defense_mod = terrain.get('defense_mod', self.hex_defaults.get('defense_mod', 0))
-                
-                # Rysowanie tekstu tylko jeśli opcja draw_labels jest włączona (obecnie zawsze False)
-                if draw_labels:
-                    tekst = f"M:{move_mod} D:{defense_mod}"
-                    text_width = 6 * len(tekst)  # Przybliżona szerokość tekstu
-                    text_pos = (center_x - text_width/2, center_y - 5)  # Pozycja tekstu
-                    draw.text(text_pos, tekst, fill="blue")
-        
-        # Rysowanie kluczowych punktów na obrazie
-        try:
-            font = ImageFont.truetype("arial.ttf", 10)
-        except IOError:
-            font = ImageFont.load_default()
-
-        for hex_id, key_point in self.key_points.items():
-            if hex_id in self.hex_centers:
-                cx, cy = self.hex_centers[hex_id]
-                draw.text((cx, cy), f"{key_point['type']}\n({key_point['value']})", fill="yellow", font=font)
-        
         # Zapis plików w wybranym folderze
         image_path = os.path.join(save_dir, "mapa_hex.jpg")
         data_path = os.path.join(save_dir, "mapa_dane.json")
         
-        # Zapis obrazu bez etykiet
-        img.save(image_path)
-        
         # Zapis danych JSON (zawiera wszystkie informacje o heksach)
         with open(data_path, "w", encoding="utf-8") as f:
             json.dump(map_data, f, indent=2, ensure_ascii=False)
         
-        messagebox.showinfo("Zapisano", 
-            f"Zapisano pliki w folderze 'mapa_cyfrowa':\n" +
-            f"Mapa: {os.path.basename(image_path)} (bez etykiet tekstowych)\n" +
-            f"Dane: {os.path.basename(data_path)}\n" +
-            f"Liczba niestandardowych heksów: {len(map_data['hex_data'])}\n" +
-            f"Liczba kluczowych punktów: {len(self.key_points)}"
-        )
+        # Obraz z siatką heksów (bez etykiet terenu) renderowany kafelkami w puli procesów, w tle
+        source_path = self.map_image_path if self.map_image_path and os.path.isfile(self.map_image_path) else None
+        exporter = MapExporter(source_path, (self.world_width, self.world_height), s,
+                               self.hex_centers, self.key_points)
+        self.save_map_button.config(state=tk.DISABLED)
+        
+        def on_progress(done, total):
+            self.save_map_button.config(text=f"Zapisywanie mapy... {done * 100 // total}%")
+        
+        def on_done(path, error):
+            self.save_map_button.config(text="Zapisz Mapę", state=tk.NORMAL)
+            if error is not None:
+                messagebox.showerror("Błąd", f"Nie udało się zapisać obrazu mapy:\n{error}")
+                return
+            messagebox.showinfo("Zapisano", 
+                f"Zapisano pliki w folderze 'mapa_cyfrowa':\n" +
+                f"Mapa: {os.path.basename(path)} (bez etykiet tekstowych)\n" +
+                f"Dane: {os.path.basename(data_path)}\n" +
+                f"Liczba niestandardowych heksów: {len(map_data['hex_data'])}\n" +
+                f"Liczba kluczowych punktów: {len(self.key_points)}"
+            )
+        
+        exporter.start(self.root, image_path, on_progress, on_done)
     
     def print_extreme_hexes(self):
         if not self.hex_centers:
@@ -720,8 +676,9 @@ class MapEditor:
             point_type = selected_type.get()
             value = self.available_key_point_types[point_type]  # Automatyczne przypisanie wartości
             self.key_points[self.selected_hex] = {"type": point_type, "value": value}
-            self.save_data()
+            self.record_change(self.journal.record_key_point(self.selected_hex, self.key_points[self.selected_hex]))
             self.draw_key_point(self.selected_hex, point_type, value)
+            self.hovered_hex = None
             messagebox.showinfo("Sukces", f"Dodano kluczowy punkt '{point_type}' o wartości {value} na heksie {self.selected_hex}.")
             dialog.destroy()
 
@@ -738,18 +695,25 @@ class MapEditor:
             self.canvas.create_text(cx, cy, text=f"{point_type}\n({value})", fill="yellow", 
                                     font=("Arial", 10, "bold"), tags=f"key_point_{hex_id}")
 
+    def on_close(self):
+        """Zamyka edytor po skompaktowaniu dziennika zmian do pliku roboczego."""
+        if self.journal.records or os.path.exists(self.journal.compacting_path):
+            self.journal.compact(self.current_map_data())
+        self.journal.close()
+        self.root.destroy()
+
     def on_canvas_hover(self, event):
         """Obsługuje zdarzenie najechania myszką na heks."""
         x = self.canvas.canvasx(event.x)
         y = self.canvas.canvasy(event.y)
-        hovered_hex = None
 
         # Sprawdzamy, czy punkt znajduje się wewnątrz któregoś heksagonu
-        for hex_id, (cx, cy) in self.hex_centers.items():
-            vertices = get_hex_vertices(cx, cy, self.hex_size)
-            if point_in_polygon(x, y, vertices):
-                hovered_hex = hex_id
-                break
+        hovered_hex = self.hex_index.hex_at(x, y)
+
+        # Etykiety odświeżamy tylko przy zmianie wskazanego heksu
+        if hovered_hex == self.hovered_hex:
+            return
+        self.hovered_hex = hovered_hex
 
         if hovered_hex:
             # Pobierz dane heksu
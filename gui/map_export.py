@@ -0,0 +1,193 @@
+"""
+Równoległy eksport mapy z siatką heksów (mapa_hex.jpg) z edytora mapy.
+
+Obraz jest dzielony na kafelki, a obrysy heksów i etykiety kluczowych punktów
+każdego kafelka rysuje pula procesów (każdy proces dekoduje obraz tła raz,
+w inicjalizatorze). Gotowe kafelki są sklejane w jeden obraz i od razu
+zapisywane jako poziom skali 1 piramidy kafelków gry (gui/map_tiles.py), więc
+gra nie musi ich ponownie wycinać z dużego pliku JPEG.
+
+Eksport może działać w wątku w tle (start()) - postęp trafia do wątku Tk
+przez kolejkę sprawdzaną w after(), więc edytor nie zamarza.
+"""
+
+import math
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from core.hex_picker import get_hex_vertices
+from gui.map_tiles import TILE_SIZE, MapTilePyramid
+
+# Zapas (px) przy wyborze etykiet kluczowych punktów - tekst wychodzi w prawo i w dół od punktu
+LABEL_MARGIN = 120
+
+# Odstęp sprawdzania postępu eksportu w tle (ms)
+PROGRESS_POLL_MS = 50
+
+# Obraz tła i czcionka etykiet - wczytywane raz w każdym procesie roboczym
+_source = None
+_font = None
+
+
+def _load_label_font():
+    try:
+        return ImageFont.truetype("arial.ttf", 10)
+    except IOError:
+        return ImageFont.load_default()
+
+
+def _init_worker(source_path, size):
+    """Inicjalizator procesu roboczego: dekoduje obraz tła (lub tworzy białe tło, gdy brak pliku)."""
+    global _source, _font
+    if source_path and os.path.isfile(source_path):
+        _source = Image.open(source_path).convert("RGB")
+    else:
+        _source = Image.new("RGB", size, "white")
+    _font = _load_label_font()
+
+
+def _render_tile(task):
+    """Rysuje obrysy heksów i etykiety na fragmencie tła; zwraca (prostokąt, piksele RGB)."""
+    box, hex_size, centers, labels = task
+    # Rysowanie na fragmencie z marginesem, w którym mieszczą się wszystkie wierzchołki heksów
+    # kafelka - obcinanie linii na krawędzi zmieniałoby ich piksele względem rysowania na całej mapie
+    margin = int(math.ceil(2 * hex_size)) + 2
+    x0, y0 = box[0] - margin, box[1] - margin
+    area = _source.crop((x0, y0, box[2] + margin, box[3] + margin))
+    draw = ImageDraw.Draw(area)
+    for center_x, center_y in centers:
+        # Wierzchołki liczone we współrzędnych całej mapy i dopiero przesuwane (odejmowanie liczby
+        # całkowitej jest dokładne) - piksele obrysów zgadzają się z rysowaniem na całym obrazie
+        vertices = get_hex_vertices(center_x, center_y, hex_size)
+        draw.polygon([(x - x0, y - y0) for x, y in vertices], outline="red")
+    for center_x, center_y, text in labels:
+        draw.text((center_x - x0, center_y - y0), text, fill="yellow", font=_font)
+    tile = area.crop((margin, margin, margin + box[2] - box[0], margin + box[3] - box[1]))
+    return box, tile.tobytes()
+
+
+class MapExporter:
+    """Eksport tła mapy z siatką heksów, renderowany kafelkami w puli procesów."""
+
+    def __init__(self, source_path, image_size, hex_size, hex_centers, key_points,
+                 tile_size=TILE_SIZE, max_workers=None):
+        """
+        Args:
+            source_path: Plik obrazu tła (None lub brak pliku - białe tło)
+            image_size: Rozmiar (szerokość, wysokość) obrazu tła
+            hex_size: Rozmiar heksu
+            hex_centers: Słownik "kolumna_wiersz" -> (x, y) heksów do narysowania
+            key_points: Słownik "kolumna_wiersz" -> {"type", "value"}
+            tile_size: Bok kafelka (równy kafelkom piramidy - kafelki trafiają do niej bez przycinania)
+            max_workers: Liczba procesów (domyślnie liczba rdzeni)
+        """
+        self.source_path = source_path
+        self.image_size = tuple(image_size)
+        self.hex_size = hex_size
+        self.tile_size = tile_size
+        self.max_workers = max_workers
+        self.centers = np.array(list(hex_centers.values()), dtype=np.float64).reshape(-1, 2)
+        self.labels = [
+            (*hex_centers[hex_id], f"{key_point['type']}\n({key_point['value']})")
+            for hex_id, key_point in key_points.items() if hex_id in hex_centers
+        ]
+
+    def tasks(self):
+        """Dzieli obraz na kafelki i przypisuje każdemu heksy oraz etykiety, które go dotykają."""
+        width, height = self.image_size
+        s = self.hex_size
+        t = self.tile_size
+        tasks = []
+        for y0 in range(0, height, t):
+            for x0 in range(0, width, t):
+                x1, y1 = min(x0 + t, width), min(y0 + t, height)
+                # Heks dotyka kafelka, gdy jego środek leży nie dalej niż s od krawędzi
+                near = ((self.centers[:, 0] > x0 - s) & (self.centers[:, 0] < x1 + s) &
+                        (self.centers[:, 1] > y0 - s) & (self.centers[:, 1] < y1 + s))
+                centers = [tuple(center) for center in self.centers[near].tolist()]
+                labels = [label for label in self.labels
+                          if x0 - LABEL_MARGIN < label[0] < x1 and y0 - LABEL_MARGIN < label[1] < y1]
+                tasks.append(((x0, y0, x1, y1), s, centers, labels))
+        return tasks
+
+    def run(self, image_path, progress=None, write_pyramid=True):
+        """
+        Renderuje mapę i zapisuje ją w image_path (oraz kafelki skali 1 piramidy gry).
+
+        Args:
+            image_path: Ścieżka wynikowego pliku obrazu
+            progress: Opcjonalna funkcja progress(gotowe, wszystkie) (wywoływana w wątku eksportu)
+            write_pyramid: Czy zapisać gotowe kafelki w cache piramidy kafelków
+
+        Returns:
+            Ścieżka zapisanego obrazu
+        """
+        tasks = self.tasks()
+        result = Image.new("RGB", self.image_size)
+        tiles = []
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(self.source_path, self.image_size)) as executor:
+            futures = [executor.submit(_render_tile, task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), start=1):
+                box, data = future.result()
+                tile = Image.frombytes("RGB", (box[2] - box[0], box[3] - box[1]), data)
+                result.paste(tile, box[:2])
+                tiles.append((box, tile))
+                if progress:
+                    progress(done, len(tasks))
+
+        result.save(image_path)
+        if write_pyramid:
+            self._write_pyramid(image_path, tiles)
+        return image_path
+
+    def _write_pyramid(self, image_path, tiles):
+        """Zapisuje gotowe kafelki jako poziom skali 1 piramidy kafelków pliku image_path."""
+        pyramid = MapTilePyramid(image_path, tile_size=self.tile_size)
+        for (x0, y0, _, _), tile in tiles:
+            path = pyramid.tile_path(1, x0 // self.tile_size, y0 // self.tile_size)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tile.save(path, quality=90)
+            except OSError as e:
+                print(f"[UWAGA] Nie udało się zapisać kafelka {path}: {e}")
+                return
+
+    def start(self, widget, image_path, on_progress=None, on_done=None):
+        """
+        Uruchamia eksport w wątku w tle.
+
+        on_progress(gotowe, wszystkie) i on_done(ścieżka lub None, błąd lub None)
+        są wywoływane w wątku Tk (przez widget.after).
+        """
+        events = queue.Queue()
+
+        def work():
+            try:
+                path = self.run(image_path, progress=lambda done, total: events.put(("progress", done, total)))
+                events.put(("done", path, None))
+            except Exception as e:
+                events.put(("done", None, e))
+
+        def poll():
+            while True:
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    break
+                if event[0] == "progress":
+                    if on_progress:
+                        on_progress(event[1], event[2])
+                else:
+                    if on_done:
+                        on_done(event[1], event[2])
+                    return
+            widget.after(PROGRESS_POLL_MS, poll)
+
+        threading.Thread(target=work, name="map-export", daemon=True).start()
+        widget.after(PROGRESS_POLL_MS, poll)
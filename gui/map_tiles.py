@@ -0,0 +1,238 @@
+"""
+Wielorozdzielcza piramida kafelków mapy i strumieniowe wyświetlanie na canvasie.
+
+Obraz mapy jest cięty na kafelki 256 px dla kilku skal i zapisywany w katalogu
+cache (klucz: ścieżka, rozmiar i czas modyfikacji pliku mapy). Kafelek brakujący
+w cache jest renderowany przy pierwszym użyciu wprost z fragmentu oryginału,
+bez skalowania całej mapy; zdekodowany oryginał zostaje w pamięci, dopóki
+w cache brakuje kafelków bieżącej skali. Canvas trzyma tylko kafelki
+przecinające widoczny obszar, a ostatnio używane obrazy kafelków trzyma
+pamięć podręczna LRU.
+"""
+
+import hashlib
+import math
+import os
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+TILE_SIZE = 256
+
+# Skale, dla których budowana jest piramida
+DEFAULT_SCALES = (0.5, 1, 2)
+
+# Katalog z kafelkami (podkatalog na każdy plik mapy)
+TILE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mapa_cyfrowa", "cache", "tiles")
+
+# Liczba obrazów kafelków trzymanych w pamięci poza aktualnie widocznymi
+DEFAULT_TILE_CACHE_SIZE = 64
+
+
+class MapTilePyramid:
+    """Kafelki mapy dla kolejnych skal, zapisane na dysku."""
+
+    def __init__(self, source_path, scales=DEFAULT_SCALES, tile_size=TILE_SIZE, cache_dir=TILE_CACHE_DIR):
+        self.source_path = source_path
+        self.scales = tuple(scales)
+        self.tile_size = tile_size
+
+        stat = os.stat(source_path)  # FileNotFoundError, gdy brak pliku mapy
+        with Image.open(source_path) as img:
+            self.source_size = img.size  # odczyt samego nagłówka
+        key = f"{os.path.abspath(source_path)}|{stat.st_size}|{stat.st_mtime_ns}|{tile_size}"
+        self.cache_dir = os.path.join(cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest()[:16])
+        self._source = None
+        self._missing = {}  # skala -> zbiór (tx, ty) kafelków jeszcze niezapisanych w cache
+
+    # ----------------------------
+    # Geometria
+    # ----------------------------
+    def level_size(self, scale):
+        """Zwraca rozmiar (szerokość, wysokość) mapy w danej skali."""
+        width, height = self.source_size
+        return int(math.ceil(width * scale)), int(math.ceil(height * scale))
+
+    def tile_grid(self, scale):
+        """Zwraca liczbę kafelków (kolumny, wiersze) w danej skali."""
+        width, height = self.level_size(scale)
+        return int(math.ceil(width / self.tile_size)), int(math.ceil(height / self.tile_size))
+
+    def tiles_in_rect(self, scale, x0, y0, x1, y1):
+        """Zwraca klucze (skala, tx, ty) kafelków przecinających prostokąt we współrzędnych mapy."""
+        cols, rows = self.tile_grid(scale)
+        t = self.tile_size
+        min_tx = max(0, int(x0 // t))
+        min_ty = max(0, int(y0 // t))
+        max_tx = min(cols - 1, int(x1 // t))
+        max_ty = min(rows - 1, int(y1 // t))
+        return [(scale, tx, ty) for tx in range(min_tx, max_tx + 1) for ty in range(min_ty, max_ty + 1)]
+
+    def tile_path(self, scale, tx, ty):
+        """Zwraca ścieżkę pliku kafelka."""
+        return os.path.join(self.cache_dir, f"{scale:g}", f"{tx}_{ty}.jpg")
+
+    # ----------------------------
+    # Kafelki
+    # ----------------------------
+    def load_tile(self, scale, tx, ty):
+        """Zwraca obraz kafelka - z dysku lub wyrenderowany (i zapisany) przy pierwszym użyciu."""
+        path = self.tile_path(scale, tx, ty)
+        if os.path.exists(path):
+            try:
+                tile = Image.open(path)
+                tile.load()
+                return tile
+            except OSError as e:
+                print(f"[UWAGA] Uszkodzony kafelek {path}: {e}")
+        return self._render_tile(scale, tx, ty)
+
+    def _render_tile(self, scale, tx, ty):
+        """Wycina kafelek z oryginału mapy, skaluje go i zapisuje w cache."""
+        if self._source is None:
+            self._source = Image.open(self.source_path).convert("RGB")
+
+        t = self.tile_size
+        width, height = self.level_size(scale)
+        x0, y0 = tx * t, ty * t
+        x1, y1 = min(x0 + t, width), min(y0 + t, height)
+        box = (x0 / scale, y0 / scale, min(x1 / scale, self.source_size[0]), min(y1 / scale, self.source_size[1]))
+        tile = self._source.resize((x1 - x0, y1 - y0), Image.Resampling.LANCZOS, box=box)
+
+        path = self.tile_path(scale, tx, ty)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tile.save(path, quality=90)
+        except OSError as e:
+            print(f"[UWAGA] Nie udało się zapisać kafelka {path}: {e}")
+        else:
+            self._missing.get(scale, set()).discard((tx, ty))
+        return tile
+
+    def missing_tiles(self, scale):
+        """Zwraca zbiór (tx, ty) kafelków skali, których nie ma jeszcze w cache (katalog czytany raz)."""
+        missing = self._missing.get(scale)
+        if missing is None:
+            cols, rows = self.tile_grid(scale)
+            try:
+                existing = set(os.listdir(os.path.join(self.cache_dir, f"{scale:g}")))
+            except OSError:
+                existing = set()
+            missing = {(tx, ty) for tx in range(cols) for ty in range(rows) if f"{tx}_{ty}.jpg" not in existing}
+            self._missing[scale] = missing
+        return missing
+
+    def build(self, scales=None, progress=None):
+        """
+        Buduje brakujące kafelki wszystkich (lub podanych) skal.
+
+        Args:
+            scales: Skale do zbudowania (domyślnie wszystkie skale piramidy)
+            progress: Opcjonalna funkcja progress(gotowe, wszystkie)
+        """
+        keys = []
+        for scale in scales or self.scales:
+            cols, rows = self.tile_grid(scale)
+            keys.extend((scale, tx, ty) for tx in range(cols) for ty in range(rows))
+        for done, (scale, tx, ty) in enumerate(keys, start=1):
+            if (tx, ty) in self.missing_tiles(scale):
+                self._render_tile(scale, tx, ty)
+            if progress:
+                progress(done, len(keys))
+        self.release_source()
+
+    def release_source(self):
+        """Zwalnia zdekodowany oryginał mapy (potrzebny tylko do renderowania brakujących kafelków)."""
+        self._source = None
+
+    def release_source_if_complete(self, scale):
+        """
+        Zwalnia oryginał mapy, gdy wszystkie kafelki skali są już w cache.
+
+        Dopóki poziom jest niepełny, oryginał zostaje w pamięci - inaczej każde
+        przewinięcie do niezbudowanego kafelka dekodowałoby całą mapę od nowa.
+        """
+        if self._source is not None and not self.missing_tiles(scale):
+            self.release_source()
+
+
+class TiledMapView:
+    """Wyświetla na canvasie tylko kafelki mapy widoczne w oknie."""
+
+    def __init__(self, canvas, pyramid, scale, cache_size=DEFAULT_TILE_CACHE_SIZE):
+        self.canvas = canvas
+        self.pyramid = pyramid
+        self.scale = scale
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # klucz kafelka -> PhotoImage (LRU)
+        self.items = {}  # klucz widocznego kafelka -> (id elementu canvasa, PhotoImage)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._update_pending = False
+
+    @property
+    def size(self):
+        """Rozmiar mapy w bieżącej skali."""
+        return self.pyramid.level_size(self.scale)
+
+    def schedule_update(self, *args):
+        """Planuje odświeżenie kafelków po przewinięciu lub zmianie rozmiaru (jedno na cykl zdarzeń)."""
+        if not self._update_pending:
+            self._update_pending = True
+            self.canvas.after_idle(self.update_viewport)
+
+    def set_scale(self, scale):
+        """Zmienia skalę mapy - usuwa kafelki poprzedniej skali z canvasa."""
+        if scale == self.scale:
+            return
+        for item_id, _ in self.items.values():
+            self.canvas.delete(item_id)
+        self.items.clear()
+        self.scale = scale
+        self.schedule_update()
+
+    def update_viewport(self):
+        """Dokłada kafelki, które weszły w widoczny obszar, i usuwa te, które z niego wyszły."""
+        self._update_pending = False
+        x0 = self.canvas.canvasx(0)
+        y0 = self.canvas.canvasy(0)
+        x1 = x0 + self.canvas.winfo_width()
+        y1 = y0 + self.canvas.winfo_height()
+        visible = set(self.pyramid.tiles_in_rect(self.scale, x0, y0, x1, y1))
+
+        for key in list(self.items):
+            if key not in visible:
+                item_id, _ = self.items.pop(key)
+                self.canvas.delete(item_id)
+
+        added = False
+        t = self.pyramid.tile_size
+        for key in visible:
+            if key in self.items:
+                continue
+            photo = self._photo(key)
+            _, tx, ty = key
+            item_id = self.canvas.create_image(tx * t, ty * t, anchor="nw", image=photo, tags="map_tile")
+            self.items[key] = (item_id, photo)
+            added = True
+
+        if added:
+            # Kafelki zawsze pod siatką heksów i żetonami
+            self.canvas.tag_lower("map_tile")
+        self.pyramid.release_source_if_complete(self.scale)
+
+    def _photo(self, key):
+        """Zwraca PhotoImage kafelka z pamięci podręcznej LRU lub wczytuje go."""
+        photo = self.cache.get(key)
+        if photo is not None:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            return photo
+
+        self.cache_misses += 1
+        photo = ImageTk.PhotoImage(self.pyramid.load_tile(*key))
+        self.cache[key] = photo
+        # Widoczne kafelki mają własną referencję w self.items, więc można je usunąć z LRU
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return photo
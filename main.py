@@ -1,21 +1,38 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
+from PIL import ImageTk
 import os
 import json
 import math
-import shutil
 import glob
 import time
 from gui.map_editor import MapEditor
 from gui.token_editor import TokenEditor
-from engine.economy import EconomySystem
+from gui.hex_overlay import HexGridOverlay
+from gui.map_tiles import MapTilePyramid, TiledMapView
+from gui.image_cache import ImageCache
+from gui.image_loader import AsyncImageLoader
+from gui.drag_controller import DragController
+from core.hex_picker import HexPicker
+from core.map import HexGrid
+from core.hex_neighbors import HexNeighborTable, load_max_token_range, max_token_range
+from core.token_catalog import TokenCatalog
+from core.blob_store import BlobStore
+from core.save_format import SaveReader, SaveFormatError, TOKEN_CHUNK_SIZE, is_binary_save, write_save
+from core.autosave import AutosaveService
+from core.game_state import GameEngine, GameRuleError, GameState, side_of
+from engine.turns import TurnManager
+from engine.combat_odds import CombatOdds
+from engine.ai import AIPlayer, apply_plan, snapshot
 
 # Ścieżki do zasobów
 MAP_PATH = os.path.join("gui", "mapa_cyfrowa", "mapa_hex.jpg")
 MAP_DATA_PATH = os.path.join("gui", "mapa_cyfrowa", "mapa_dane.json")
 TOKENS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tokeny")
 
+# Wysokość wiersza żetonu w panelu (miniatura 60 px + odstępy)
+TOKEN_ROW_HEIGHT = 70
+
 # Klasa reprezentująca panel z żetonami - można go przeciągać
 class TokenPanel(ttk.Frame):
     def __init__(self, parent, title, nation, initial_x=0, initial_y=0):
@@ -26,6 +43,10 @@ class TokenPanel(ttk.Frame):
         self.title = title
         self.minimized = False
         self.tokens = []  # Lista żetonów w panelu
+        self.token_names = set()  # Nazwy żetonów w panelu (szybkie sprawdzanie duplikatów)
+        self.rows = {}  # Nazwa żetonu -> (id okna canvasa, ramka) - tylko wiersze widoczne w panelu
+        self.realize_pending = False
+        self.header_height = 0
         self.tokens_locked = False  # Flag indicating if tokens are locked (confirmed)
         
         # Ustawienie początkowej pozycji
@@ -66,7 +87,7 @@ class TokenPanel(ttk.Frame):
         # Canvas z paskiem przewijania dla zawartości - poprawiony kontrast tła
         self.canvas = tk.Canvas(self.container, background="#E1DBC5")  # Lekko beżowe tło
         self.scrollbar = ttk.Scrollbar(self.container, orient="vertical", command=self.canvas.yview)
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.configure(yscrollcommand=self.on_panel_scrolled)
         
         self.scrollbar.pack(side="right", fill="y")
         self.canvas.pack(side="left", fill="both", expand=True)
@@ -106,7 +127,7 @@ class TokenPanel(ttk.Frame):
         
         # Zmiana rozmiaru żetonów do dostosowania do heksów
         self.token_size = 60  # Dostosowany rozmiar żetonów
-        self.token_images = []  # Lista do przechowywania referencji do obrazków
+        self.placeholder_photo = None  # Szary prostokąt wyświetlany, zanim miniatura wczyta się w tle
         
         # Dodajemy flagę do wykrywania, czy panel może przyjmować żetony
         self.can_receive_tokens = True
@@ -117,12 +138,20 @@ class TokenPanel(ttk.Frame):
         self.canvas.bind("<ButtonRelease-1>", self.on_token_drop)
     
     def on_canvas_configure(self, event):
-        """Dostosowuje szerokość okna przewijania do szerokości canvasa"""
+        """Dostosowuje szerokość okna przewijania i wierszy żetonów do szerokości canvasa"""
         self.canvas.itemconfig(self.canvas_window, width=event.width)
+        for window_id, _ in self.rows.values():
+            self.canvas.itemconfig(window_id, width=event.width)
+        self.schedule_realize_rows()
     
     def on_frame_configure(self, event):
-        """Aktualizuje region przewijania na podstawie rozmiaru zawartości"""
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        """Aktualizuje region przewijania po zmianie rozmiaru nagłówka panelu"""
+        self.update_tokens_display()
+    
+    def on_panel_scrolled(self, *args):
+        """Aktualizuje pasek przewijania i tworzy wiersze, które weszły w widok"""
+        self.scrollbar.set(*args)
+        self.schedule_realize_rows()
     
     def on_mousewheel(self, event):
         """Obsługuje przewijanie myszką"""
@@ -213,77 +242,124 @@ class TokenPanel(ttk.Frame):
     
     def add_token(self, token_data):
         """Dodaje żeton do panelu"""
-        # Sprawdź czy żeton o tej samej nazwie już istnieje
-        for token in self.tokens:
-            if token["name"] == token_data["name"]:
-                # Token już istnieje, nie dodawaj ponownie
+        self.add_tokens([token_data])
+    
+    def add_tokens(self, tokens):
+        """Dodaje wiele żetonów naraz - układ panelu jest przeliczany tylko raz"""
+        added = 0
+        for token_data in tokens:
+            # Sprawdź czy żeton o tej samej nazwie już istnieje
+            if token_data["name"] in self.token_names:
                 print(f"Żeton {token_data['name']} już istnieje w panelu {self.title}, nie dodawany ponownie")
-                return
-        
-        # Dodaj żeton tylko jeśli nie istnieje
-        self.tokens.append(token_data)
-        self.update_tokens_display()
+                continue
+            self.tokens.append(token_data)
+            self.token_names.add(token_data["name"])
+            added += 1
+        
+        if added:
+            self.update_tokens_display()
+        return added
     
     def token_exists(self, token_name):
         """Sprawdza czy żeton o podanej nazwie istnieje w panelu"""
-        for token in self.tokens:
-            if token["name"] == token_name:
-                return True
-        return False
+        return token_name in self.token_names
     
     def update_tokens_display(self):
-        """Aktualizuje wyświetlanie żetonów w panelu"""
+        """Aktualizuje licznik i region przewijania, a następnie tworzy wiersze widoczne w oknie panelu"""
         # Uaktualnij liczbę żetonów w etykiecie
         self.info_label.config(text=f"Żetony {self.nation} ({len(self.tokens)})")
         
-        # Wyczyść obecne żetony z kontenera
-        for widget in self.content_frame.winfo_children():
-            if widget != self.accept_button and widget != self.info_label:
-                widget.destroy()
+        # Wiersze mają stałą wysokość, więc region przewijania wynika z liczby żetonów
+        self.header_height = self.content_frame.winfo_reqheight()
+        total_height = self.header_height + len(self.tokens) * TOKEN_ROW_HEIGHT
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), total_height))
         
-        # Wyczyść referencje do obrazków
-        self.token_images = []
+        self.realize_visible_rows()
+    
+    def schedule_realize_rows(self, *args):
+        """Planuje utworzenie wierszy, które weszły w widok (jedno przeliczenie na cykl zdarzeń)"""
+        if not self.realize_pending:
+            self.realize_pending = True
+            self.after_idle(self.realize_visible_rows)
+    
+    def realize_visible_rows(self):
+        """Tworzy wiersze żetonów widocznych w oknie panelu i usuwa wiersze, które z niego wyszły"""
+        self.realize_pending = False
+        top = self.canvas.canvasy(0) - self.header_height
+        bottom = top + self.canvas.winfo_height()
+        first = max(0, int(top // TOKEN_ROW_HEIGHT) - 1)
+        last = min(len(self.tokens) - 1, int(bottom // TOKEN_ROW_HEIGHT) + 1)
+        
+        visible = set()
+        for i in range(first, last + 1):
+            token = self.tokens[i]
+            visible.add(token["name"])
+            y = self.header_height + i * TOKEN_ROW_HEIGHT
+            if token["name"] in self.rows:
+                self.canvas.coords(self.rows[token["name"]][0], 0, y)
+            else:
+                self.rows[token["name"]] = self.create_token_row(token, y)
         
-        # Dodaj żetony jako obrazki z etykietami
-        for token in self.tokens:
-            try:
-                # Sprawdź czy jest dostępny obraz
-                if "path" in token and os.path.exists(token["path"]):
-                    # Sprawdź czy istnieje token_data.json w podfolderze tokena
-                    token_dir = os.path.dirname(token["path"])
-                    token_name = os.path.basename(token_dir)
-                    
-                    # Stwórz ramkę dla tokena - poprawione tło
-                    token_frame = ttk.Frame(self.content_frame, style="TokenItem.TFrame")
-                    token_frame.pack(fill="x", padx=5, pady=5)
-                    
-                    # Wczytaj i przeskaluj obraz
-                    img = Image.open(token["path"])
-                    img = img.resize((self.token_size, self.token_size), Image.LANCZOS)
-                    photo = ImageTk.PhotoImage(img)
-                    self.token_images.append(photo)  # Zapobiegaj garbage collection
-                    
-                    # Dodaj obraz z etykietą
-                    lbl = ttk.Label(token_frame, image=photo)
-                    lbl.image = photo  # Trzymaj referencję
-                    lbl.pack(side="left")
-                    
-                    # Dodaj etykietę z nazwą tokena - poprawiona widoczność
-                    name_lbl = ttk.Label(token_frame, text=token_name, wraplength=120,
-                                        background="#E1DBC5", foreground="#333333")
-                    name_lbl.pack(side="left", padx=5)
-                    
-                    # Dodaj obsługę przeciągania na mapę
-                    lbl.bind("<ButtonPress-1>", lambda e, t=token: self.start_token_drag(e, t))
-                    lbl.bind("<B1-Motion>", self.drag_token)
-                    lbl.bind("<ButtonRelease-1>", self.drop_token)
-                    
-            except Exception as e:
-                print(f"Błąd podczas wyświetlania tokena {token['name']} jeśli 'name' in token else 'nieznany'}}: {e}")
+        for name in list(self.rows):
+            if name not in visible:
+                self.destroy_token_row(name)
+    
+    def create_token_row(self, token, y):
+        """Tworzy wiersz żetonu (miniatura i nazwa) jako okno canvasa na wysokości y"""
+        # Nazwa żetonu to nazwa jego katalogu
+        token_name = os.path.basename(os.path.dirname(token.get("path", ""))) or token["name"]
+        
+        # Stwórz ramkę dla tokena - poprawione tło
+        token_frame = ttk.Frame(self.canvas, style="TokenItem.TFrame")
         
-        # Aktualizuj obszar przewijania
-        self.content_frame.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        try:
+            # Miniatura wczytywana w tle - do tego czasu etykieta pokazuje zaślepkę
+            lbl = ttk.Label(token_frame, image=self.get_placeholder_photo())
+            lbl.image = self.placeholder_photo  # Trzymaj referencję
+            lbl.pack(side="left", padx=5)
+            self.parent.image_loader.request(
+                token["path"], (self.token_size, self.token_size),
+                lambda photo, label=lbl: self.set_row_photo(label, photo)
+            )
+            
+            # Dodaj obsługę przeciągania na mapę
+            lbl.bind("<ButtonPress-1>", lambda e, t=token: self.start_token_drag(e, t))
+            lbl.bind("<B1-Motion>", self.drag_token)
+            lbl.bind("<ButtonRelease-1>", self.drop_token)
+        except (KeyError, OSError) as e:
+            print(f"Błąd podczas wyświetlania tokena {token.get('name', 'nieznany')}: {e}")
+        
+        # Dodaj etykietę z nazwą tokena - poprawiona widoczność
+        name_lbl = ttk.Label(token_frame, text=token_name, wraplength=120,
+                            background="#E1DBC5", foreground="#333333")
+        name_lbl.pack(side="left", padx=5)
+        
+        window_id = self.canvas.create_window(
+            (0, y), window=token_frame, anchor="nw",
+            width=self.canvas.winfo_width(), height=TOKEN_ROW_HEIGHT - 5
+        )
+        return window_id, token_frame
+    
+    def get_placeholder_photo(self):
+        """Zwraca (tworzoną raz) zaślepkę miniatury żetonu"""
+        if self.placeholder_photo is None:
+            self.placeholder_photo = tk.PhotoImage(width=self.token_size, height=self.token_size)
+            self.placeholder_photo.put("#B8B29C", to=(0, 0, self.token_size, self.token_size))
+        return self.placeholder_photo
+    
+    def set_row_photo(self, label, photo):
+        """Podmienia zaślepkę na wczytaną miniaturę (o ile wiersz nie został w międzyczasie usunięty)"""
+        if label.winfo_exists():
+            label.configure(image=photo)
+            label.image = photo  # Trzymaj referencję
+    
+    def destroy_token_row(self, name):
+        """Usuwa wiersz żetonu z canvasa"""
+        row = self.rows.pop(name, None)
+        if row:
+            window_id, token_frame = row
+            self.canvas.delete(window_id)
+            token_frame.destroy()
     
     def start_token_drag(self, event, token):
         """Rozpoczyna przeciąganie tokena"""
@@ -343,13 +419,22 @@ class TokenPanel(ttk.Frame):
     
     def remove_token_by_name(self, token_name):
         """Usuwa żeton z panelu na podstawie jego nazwy i aktualizuje wyświetlanie"""
-        for i, token in enumerate(self.tokens):
-            if token["name"] == token_name:
-                del self.tokens[i]
-                self.update_tokens_display()
-                print(f"Usunięto żeton {token_name} z panelu {self.title}")
-                return True
+        if self.remove_tokens_by_name([token_name]):
+            print(f"Usunięto żeton {token_name} z panelu {self.title}")
+            return True
         return False
+    
+    def remove_tokens_by_name(self, token_names):
+        """Usuwa wiele żetonów naraz - układ panelu jest przeliczany tylko raz"""
+        names = set(token_names) & self.token_names
+        if not names:
+            return 0
+        self.tokens = [token for token in self.tokens if token["name"] not in names]
+        self.token_names -= names
+        for name in names:
+            self.destroy_token_row(name)
+        self.update_tokens_display()
+        return len(names)
 
     def lock_tokens(self):
         """Blokuje możliwość operowania żetonami w tym panelu"""
@@ -366,8 +451,9 @@ class TokenPanel(ttk.Frame):
 class GameInterface(tk.Tk):
     def __init__(self):
         super().__init__()
-        self.economy_system = EconomySystem()  # Inicjalizacja systemu ekonomicznego
-        self.current_turn_nation = "Polska"   # Domyślnie zaczyna Polska
+        # Stan i reguły gry (bez Tk) - okno tylko przekłada na nie zdarzenia i odrysowuje wynik
+        self.game = GameEngine(GameState())
+        self.turns = TurnManager(self.game)  # Fazy tury (zakup ... koniec) z pomiarem czasu
         self.title("Wrzesień 1939 – Prototyp")
         self.geometry("1280x800")
         self.resizable(True, True)
@@ -380,7 +466,45 @@ class GameInterface(tk.Tk):
         
         # Wywołanie panelu startowego
         self.init_start_panel()
-        self.current_turn = "Gracz 1"  # Domyślnie zaczyna Gracz 1
+
+    # ----------------------------
+    # Stan gry (przechowywany w self.game)
+    # ----------------------------
+    @property
+    def economy_system(self):
+        return self.game.state.economy
+
+    @property
+    def current_turn(self):
+        return self.game.state.current_turn
+
+    @current_turn.setter
+    def current_turn(self, player):
+        self.game.state.current_turn = player
+
+    @property
+    def current_turn_nation(self):
+        return self.game.state.current_turn_nation
+
+    @property
+    def turn_number(self):
+        return self.game.state.turn_number
+
+    @property
+    def hex_data(self):
+        return self.game.state.hex_data
+
+    @hex_data.setter
+    def hex_data(self, hex_data):
+        self.game.state.hex_data = hex_data
+
+    @property
+    def polish_tokens_locked(self):
+        return self.game.is_nation_locked("polskie")
+
+    @property
+    def german_tokens_locked(self):
+        return self.game.is_nation_locked("niemieckie")
 
     def init_start_panel(self):
         """Tworzy panel startowy z opcjami wyboru nacji i przyciskiem Start"""
@@ -451,10 +575,13 @@ class GameInterface(tk.Tk):
         # Zapisanie wyboru nacji graczy
         self.player1_choice = self.player1_nation.get()
         self.player2_choice = self.player2_nation.get()
+        self.player2_is_ai = self.player2_ai.get()
+        self.game.state.players = {"Gracz 1": self.player1_choice, "Gracz 2": self.player2_choice}
+        self.game.update_locks()
 
         # Wyświetlenie wyborów w konsoli
         print(f"Gracz 1 wybrał: {self.player1_choice}")
-        print(f"Gracz 2 wybrał: {self.player2_choice}")
+        print(f"Gracz 2 wybrał: {self.player2_choice}{' (SI)' if self.player2_is_ai else ''}")
 
         # Usunięcie panelu startowego
         self.start_panel.destroy()
@@ -476,6 +603,25 @@ class GameInterface(tk.Tk):
 
         # Wczytaj dane mapy z pliku JSON jeśli istnieje
         self.hex_centers = {}
+        self.hex_picker = None  # Wyznaczanie heksu pod kursorem (budowane po wczytaniu mapy)
+        self.hex_grid = None  # Tablicowy model mapy (HexGrid) - teren i kluczowe punkty
+        self.hex_neighbors = None  # Tablice sąsiadów, pierścieni i dysków dla systemów gry
+        self.movement_engine = None  # Zasięg ruchu jednostek (silnik gry, po wczytaniu mapy)
+        self.movement_result = None  # Zasięg ruchu aktualnie przeciąganego żetonu
+        self.visibility = None  # Mgła wojny - widoczność heksów dla każdej nacji (silnik gry)
+        self.hex_overlay = None  # Warstwa siatki heksów (jeden obraz na skalę mapy)
+        self.image_cache = ImageCache()  # Zdekodowane i przeskalowane obrazy żetonów
+        self.image_loader = AsyncImageLoader(self, self.image_cache)  # Dekodowanie obrazów w puli wątków
+        self.token_catalog = TokenCatalog(TOKENS_PATH)  # Katalog żetonów z manifestem (tokeny/)
+        self.combat_odds = CombatOdds()  # Szanse ataku (liczone z góry dla katalogu żetonów)
+        self.odds_hover_hex = None  # Heks, nad którym wyświetlane są szanse ataku
+        self.ai_player = None  # Przeciwnik SI (tworzony przy pierwszej turze SI)
+        self.ai_thinking = False  # Czy SI planuje teraz turę (w tle)
+        self.pending_load = None  # Stan wczytywania żetonów z zapisu (wczytywane porcjami)
+        self.blob_store = BlobStore(os.path.join(os.getcwd(), "saves", "blobs"))  # Obrazy żetonów w zapisach (po skrócie)
+        # Autozapis na koniec tury (w tle - razem z kopiowaniem obrazów żetonów do magazynu)
+        self.autosave = AutosaveService(os.path.join(os.getcwd(), "saves", "autosave"),
+                                        blob_store=self.blob_store)
         self.map_data = None  # Przechowujemy całe dane mapy
         self.terrain_types = {}  # Typy terenu
         self.debug_mode = True  # Tryb debugowania - pokaż więcej informacji
@@ -487,10 +633,10 @@ class GameInterface(tk.Tk):
         self.hex_vert_offset = 39
         self.hex_size = 30  # Podstawowy rozmiar heksu
 
-        # Ładowanie mapy
+        # Ładowanie mapy - piramida kafelków; canvas wczytuje tylko widoczne kafelki
         try:
-            self.map_image = Image.open(MAP_PATH)
-            print(f"Mapa wczytana: {MAP_PATH}, rozmiar: {self.map_image.size}")
+            self.map_tiles = MapTilePyramid(MAP_PATH)
+            print(f"Mapa wczytana: {MAP_PATH}, rozmiar: {self.map_tiles.source_size}")
         except FileNotFoundError:
             print("[BŁD] Nie znaleziono pliku mapy:", MAP_PATH)
             messagebox.showerror("Błąd", f"Nie znaleziono pliku mapy: {MAP_PATH}")
@@ -498,12 +644,8 @@ class GameInterface(tk.Tk):
             return
 
         self.map_scale = 2
-        self.map_zoomed = self.map_image.resize(
-            (self.map_image.width * self.map_scale, self.map_image.height * self.map_scale),
-            Image.Resampling.LANCZOS
-        )
-        self.tk_map = ImageTk.PhotoImage(self.map_zoomed)
-        print(f"Mapa przeskalowana: {self.map_zoomed.size}")
+        self.map_width, self.map_height = self.map_tiles.level_size(self.map_scale)
+        print(f"Mapa przeskalowana: {(self.map_width, self.map_height)}")
 
         # Wczytaj dane mapy - po załadowaniu obrazu, przed utworzeniem interfejsu
         self.wczytaj_dane_mapy()
@@ -568,33 +710,29 @@ class GameInterface(tk.Tk):
 
         self.canvas = tk.Canvas(
             self.center_frame, bg="black",
-            scrollregion=(0, 0, self.tk_map.width(), self.tk_map.height())
+            scrollregion=(0, 0, self.map_width, self.map_height)
         )
         self.hbar = tk.Scrollbar(self.center_frame, orient="horizontal", command=self.canvas.xview)
         self.vbar = tk.Scrollbar(self.center_frame, orient="vertical", command=self.canvas.yview)
-        self.canvas.configure(xscrollcommand=self.hbar.set, yscrollcommand=self.vbar.set)
+        self.map_view = TiledMapView(self.canvas, self.map_tiles, self.map_scale)
+        self.canvas.configure(
+            xscrollcommand=lambda *args: self.on_map_scrolled(self.hbar, *args),
+            yscrollcommand=lambda *args: self.on_map_scrolled(self.vbar, *args)
+        )
+        self.canvas.bind("<Configure>", self.map_view.schedule_update)
 
         self.hbar.pack(side="bottom", fill="x")
         self.vbar.pack(side="right", fill="y")
         self.canvas.pack(side="left", fill="both", expand=True)
 
-        self.map_id = self.canvas.create_image(0, 0, anchor="nw", image=self.tk_map)
+        self.map_view.schedule_update()
 
         # Dodanie paneli dla żetonów
         self.polish_panel = TokenPanel(self, "Żetony Polskie", "polskie", 10, 500)
         self.german_panel = TokenPanel(self, "Żetony Niemieckie", "niemieckie", 1070, 500)
         
         # Ustaw początkowy stan blokady żetonów odpowiednio do pierwszej tury
-        if self.current_turn_nation == "Polska":
-            self.polish_tokens_locked = False
-            self.german_tokens_locked = True
-            self.polish_panel.unlock_tokens()
-            self.german_panel.lock_tokens()
-        else:
-            self.polish_tokens_locked = True
-            self.german_tokens_locked = False
-            self.polish_panel.lock_tokens()
-            self.german_panel.unlock_tokens()
+        self.sync_panel_locks()
 
         try:
             # Wczytaj żetony z folderu - dodajemy obsługę błędów
@@ -614,13 +752,20 @@ class GameInterface(tk.Tk):
         # Dodanie nowego atrybutu do śledzenia aktualnie przeciąganego tokena
         self.current_dragging_token = None
         self.current_dragging_map_token = None
-        self.token_preview = None
+        # Podgląd przeciąganego żetonu (jeden element canvasa przesuwany przy ruchu myszy)
+        self.drag_controller = DragController(self.canvas, self.hex_picker, self.hex_size, self.map_scale)
         self.drag_threshold = 5  # Próg ruchu myszy, aby uznać za przeciąganie
         self.placed_token_images = {}  # Słownik przechowujący umieszczone tokeny
 
         # Dodanie zdarzeń myszy do obsługi mapy
         self.canvas.bind("<ButtonPress-1>", self.on_hex_press)
         self.canvas.bind("<ButtonRelease-1>", self.on_hex_click)
+        self.canvas.bind("<Motion>", self.on_map_hover)
+
+    def on_map_scrolled(self, scrollbar, *args):
+        """Aktualizuje pasek przewijania i doczytuje kafelki mapy, które weszły w widok."""
+        scrollbar.set(*args)
+        self.map_view.schedule_update()
 
     def define_styles(self):
         """Definicja stylów dla elementów interfejsu"""
@@ -701,52 +846,125 @@ class GameInterface(tk.Tk):
 
     def get_current_turn_nation(self):
         """Zwraca nazwę nacji na podstawie aktualnej tury."""
-        if self.current_turn == "Gracz 1":
-            return self.player1_choice
-        elif self.current_turn == "Gracz 2":
-            return self.player2_choice
-        return "Nieznana nacja"
+        return self.game.state.current_turn_nation
 
     def end_turn(self):
         """Zakończenie tury i przełączenie na kolejną nację."""
-        # Przetwarzanie ekonomii
-        self.economy_system.process_turn(
-            nation=self.current_turn_nation,
-            income=100,  # Przykładowy dochód, dostosuj do logiki gry
-            cost_per_unit=10,  # Przykładowy koszt na jednostkę
-            unit_count=len(self.placed_token_images)  # Liczba jednostek na mapie
-        )
+        if self.ai_thinking:
+            print("[UWAGA] SI planuje turę - poczekaj na jej ruch")
+            return
         
-        # Określ obecną i następną nację
-        previous_nation = self.current_turn_nation
-        
-        # Zmiana tury
-        if self.current_turn_nation == "Polska":
-            self.current_turn_nation = "Niemcy"
-            self.current_turn = "Gracz 2"
-            # Odblokuj żetony niemieckie i zablokuj polskie
-            self.polish_tokens_locked = True
-            self.german_tokens_locked = False
-            # Synchronizuj stan z panelami żetonów
-            self.polish_panel.lock_tokens()
-            self.german_panel.unlock_tokens()
-            print("Zablokowano żetony polskie, odblokowano żetony niemieckie")
-        else:
-            self.current_turn_nation = "Polska"
-            self.current_turn = "Gracz 1"
-            # Odblokuj żetony polskie i zablokuj niemieckie
-            self.polish_tokens_locked = False
-            self.german_tokens_locked = True
-            # Synchronizuj stan z panelami żetonów
-            self.polish_panel.unlock_tokens()
-            self.german_panel.lock_tokens()
-            print("Zablokowano żetony niemieckie, odblokowano żetony polskie")
+        # Fazy tury (walka, ekonomia, zmiana gracza i blokady żetonów) - w silniku gry
+        timings = self.turns.run_turn()
+        if self.debug_mode:
+            print("[DEBUG] Czas faz tury: " + ", ".join(
+                f"{phase} {elapsed * 1000:.2f} ms" for phase, elapsed in timings.items()))
+        
+        # Synchronizuj stan z panelami żetonów i planszą (wyniki walki)
+        self.sync_panel_locks()
+        self.sync_tokens_with_game()
+        self.refresh_fog_of_war()
+        
+        # Autozapis - tu powstaje tylko migawka stanu, zapis na dysk odbywa się w tle
+        self.autosave.submit(self.build_game_state(store_images=False))
         
         # Aktualizacja informacji ekonomicznych dla nowej nacji
         self.update_economic_info()
         
         # Aktualizacja innych elementów interfejsu (np. tury)
         self.turn_label.config(text=f"Tura: {self.current_turn_nation}")
+        
+        # Tura gracza sterowanego przez SI - planowanie w tle
+        if self.is_ai_turn():
+            self.start_ai_turn()
+
+    def is_ai_turn(self):
+        """Sprawdza, czy turę ma gracz sterowany przez SI."""
+        return self.player2_is_ai and self.current_turn == "Gracz 2"
+
+    def start_ai_turn(self):
+        """Uruchamia w tle planowanie tury przez SI; okno gry działa w tym czasie normalnie."""
+        if self.hex_grid is None or self.map_data is None:
+            print("[UWAGA] SI wymaga wczytanej mapy - tura SI pominięta")
+            return
+        if self.ai_player is None:
+            self.ai_player = AIPlayer(self.map_data, self.hex_neighbors.max_radius)
+        side = side_of(self.current_turn_nation)
+        panel = self.polish_panel if side == "Polska" else self.german_panel
+        position = snapshot(self.game, side, list(panel.tokens))
+        
+        # Żetony SI zablokowane dla gracza, dopóki SI nie wykona planu
+        self.ai_thinking = True
+        self.game.lock_nation(side)
+        self.sync_panel_locks()
+        self.turn_label.config(text=f"Tura: {self.current_turn_nation} (SI planuje...)")
+        print(f"[INFO] SI planuje turę {self.current_turn_nation} "
+              f"(limit {self.ai_player.time_limit:.0f} s, {self.ai_player.max_workers} procesów, "
+              f"głębokość {self.ai_player.depth})")
+        self.ai_player.start(self, position, on_progress=self.on_ai_progress, on_done=self.finish_ai_turn)
+
+    def on_ai_progress(self, playouts, value):
+        """Pokazuje postęp planowania tury przez SI."""
+        self.turn_label.config(
+            text=f"Tura: {self.current_turn_nation} (SI planuje... {playouts} rozgrywek, ocena {value:.2f})")
+
+    def finish_ai_turn(self, plan, error):
+        """Wykonuje plan SI na planszy i kończy jej turę (wywoływane w wątku Tk)."""
+        self.ai_thinking = False
+        self.game.update_locks()
+        if error is not None:
+            print(f"[BŁĄD] SI nie zaplanowała tury: {error}")
+            plan = []
+        
+        side = side_of(self.current_turn_nation)
+        panel = self.polish_panel if side == "Polska" else self.german_panel
+        reserve = list(panel.tokens)
+        applied = apply_plan(self.game, plan, reserve)
+        
+        # Kupione żetony - obraz na mapie i usunięcie z panelu (jednostka stoi już w silniku gry)
+        tokens = {token["name"]: token for token in reserve}
+        for kind, name, hex_id in applied:
+            if kind == "deploy":
+                self.show_deployed_token(hex_id, tokens[name])
+        self.sync_tokens_with_game()
+        self.refresh_fog_of_war()
+        stats = self.ai_player.last_stats
+        print(f"[INFO] SI wykonała {len(applied)} akcji ({stats.get('plans', 0)} planów, "
+              f"{stats.get('playouts', 0)} rozgrywek w {stats.get('seconds', 0):.1f} s)")
+        self.end_turn()
+
+    def on_map_hover(self, event):
+        """Pokazuje szanse ataku zaznaczonej jednostki na wrogą jednostkę pod kursorem."""
+        if self.current_dragging_token or self.current_dragging_map_token or not self.hex_picker:
+            return
+        canvas_x = self.canvas.canvasx(event.x)
+        canvas_y = self.canvas.canvasy(event.y)
+        hover_hex = self.hex_picker.pick(canvas_x / self.map_scale, canvas_y / self.map_scale,
+                                         max_distance=self.hex_size)
+        if hover_hex == self.odds_hover_hex:
+            return
+        self.odds_hover_hex = hover_hex
+        self.canvas.delete("odds_tip")
+
+        units = self.game.state.units
+        attacker = units.get(self.selected_hex)
+        defender = units.get(hover_hex)
+        if (attacker is None or defender is None or attacker.attack_value <= 0
+                or not self.is_turn_active(attacker.nation) or self.is_turn_active(defender.nation)):
+            return
+        distance = int(self.game.distance(self.selected_hex, hover_hex))
+        if distance > max(1, attacker.attack_range):
+            return
+        defense_mod = int(self.hex_grid.defense_mod[self.hex_grid.index_of(hover_hex)])
+        odds = self.combat_odds.for_units(attacker, defender, defense_mod, distance)
+        
+        center_x, center_y = self.hex_centers[hover_hex]
+        text_id = self.canvas.create_text(
+            center_x * self.map_scale, (center_y - self.hex_size) * self.map_scale,
+            text=odds.describe(), fill="white", anchor="s", font=("Arial", 9, "bold"), tags="odds_tip"
+        )
+        self.canvas.create_rectangle(self.canvas.bbox(text_id), fill="black", outline="yellow", tags="odds_tip")
+        self.canvas.tag_raise(text_id)
 
     def on_hex_press(self, event):
         """Zapamiętuje początkową pozycję kliknięcia na heksie"""
@@ -771,17 +989,11 @@ class GameInterface(tk.Tk):
         clicked_hex = None
         if self.hex_centers:
             # Znajdź najbliższy heks na podstawie odległości od środka
-            min_distance = float('inf')
-            for hex_id, (center_x, center_y) in self.hex_centers.items():
-                # Skaluj pozycje zgodnie z map_scale
-                scaled_x = center_x * self.map_scale
-                scaled_y = center_y * self.map_scale
-                
-                # Oblicz odległość od kliknięcia do środka heksu
-                distance = ((scaled_x - canvas_x) ** 2 + (scaled_y - canvas_y) ** 2) ** 0.5
-                if distance < min_distance:
-                    min_distance = distance
-                    clicked_hex = hex_id
+            clicked_hex, min_distance = self.hex_picker.nearest(
+                canvas_x / self.map_scale, canvas_y / self.map_scale,
+                max_distance=self.hex_size
+            )
+            min_distance *= self.map_scale
             
             # Wypisz informacje o znalezionym heksie
             if clicked_hex:
@@ -851,8 +1063,18 @@ class GameInterface(tk.Tk):
         # 2. Dane terenu i modyfikatory
         self.hex_info_text.insert(tk.END, "\nTeren:\n", "section")
         
+        # Dane terenu z modelu mapy (odczyt z tablic po indeksie heksu)
+        hex_idx = self.hex_grid.index_of(self.selected_hex) if self.hex_grid else -1
+        if hex_idx != -1 and self.hex_grid.valid[hex_idx]:
+            for key, value in self.hex_grid.hex_info(hex_idx).items():
+                if key == "move_mod":
+                    self.hex_info_text.insert(tk.END, f"Modyfikator ruchu: {value}\n")
+                elif key == "defense_mod":
+                    self.hex_info_text.insert(tk.END, f"Modyfikator obrony: {value}\n")
+                else:
+                    self.hex_info_text.insert(tk.END, f"{key}: {value}\n")
         # Sprawdź czy heks ma specjalne modyfikatory terenu
-        if "move_mod" in hex_info or "defense_mod" in hex_info:
+        elif "move_mod" in hex_info or "defense_mod" in hex_info:
             move_mod = hex_info.get("move_mod", self.hex_defaults.get("move_mod", 0))
             defense_mod = hex_info.get("defense_mod", self.hex_defaults.get("defense_mod", 0))
             self.hex_info_text.insert(tk.END, f"Modyfikator ruchu: {move_mod}\n")
@@ -961,79 +1183,105 @@ class GameInterface(tk.Tk):
             self.canvas.delete(self.selected_hex_highlight)
             self.selected_hex_highlight = None
 
-    def save_game(self):
-        """Zapisuje stan gry do pliku save_game.json wraz z kopiami obrazów żetonów"""
-        print("[INFO] Zapisywanie gry...")
-        save_folder = os.path.join(os.getcwd(), "saves")
-        if not os.path.exists(save_folder):
-            os.makedirs(save_folder)
-            print(f"Utworzono folder zapisu: {save_folder}")
-        
-        # Utwórz folder dla obrazów żetonów
-        images_folder = os.path.join(save_folder, "images")
-        if not os.path.exists(images_folder):
-            os.makedirs(images_folder)
-            print(f"[INFO] Utworzono folder dla obrazów żetonów: {images_folder}")
-        
-        # Utwórz kopię zapasową istniejącego pliku zapisu
-        save_file = os.path.join(save_folder, "save_game.json")
-        if os.path.exists(save_file):
-            backup_file = os.path.join(save_folder, "save_game_backup.json")
-            try:
-                shutil.copy2(save_file, backup_file)
-                print(f"[INFO] Utworzono kopię zapasową poprzedniego pliku zapisu: {backup_file}")
-            except Exception as e:
-                print(f"[UWAGA] Nie udało się utworzyć kopii zapasowej: {e}")
-        
-        # Zapisz tokeny z kopiami obrazów
+    def build_game_state(self, store_images=True):
+        """
+        Zwraca stan gry jako słownik (format save_game.json).
+
+        Przy store_images=True obrazy żetonów trafiają do magazynu saves/blobs od razu.
+        Przy store_images=False (autozapis) podawany jest tylko znany już skrót obrazu -
+        żeton bez niego ma puste pole "image", a obraz zapisuje do magazynu wątek autozapisu.
+        """
+        # Tokeny z odwołaniem do obrazu po skrócie (niezmieniony obraz nie jest kopiowany ani czytany)
         placed_tokens = {}
         for hex_id, token_info in self.placed_token_images.items():
             token_data = token_info["token_data"]
-            original_path = token_data["path"]
-            token_name = token_data["name"]
-            token_nation = token_data["nation"]
-            
-            # Utwórz unikalną nazwę dla kopii obrazu
-            image_filename = f"{token_nation}_{token_name}_{hex_id}.png".replace(" ", "_")
-            image_save_path = os.path.join(images_folder, image_filename)
-            
-            # Skopiuj obraz do folderu zapisu
-            try:
-                if os.path.exists(original_path):
-                    shutil.copy2(original_path, image_save_path)
-                    print(f"[INFO] Utworzono kopię obrazu dla tokena {token_name}: {image_save_path}")
-                else:
-                    print(f"[UWAGA] Nie znaleziono oryginału obrazu dla tokena {token_name}: {original_path}")
-            except Exception as e:
-                print(f"[BŁĄD] Podczas kopiowania obrazu tokena {token_name}: {e}")
-                image_save_path = original_path  # W przypadku błędu, użyj oryginalnej ścieżki
-            
-            # Zapisz dane tokena z nową ścieżką względną
-            rel_image_path = os.path.relpath(image_save_path, os.getcwd())
+            if store_images:
+                image_digest = self.store_token_image(token_data)
+            elif token_data.get("image_source") == token_data["path"]:
+                image_digest = token_data.get("image")
+            else:
+                image_digest = None
             placed_tokens[hex_id] = {
-                "name": token_name,
-                "nation": token_nation,
-                "path": rel_image_path,
-                "original_path": os.path.relpath(original_path, os.getcwd()) if os.path.exists(original_path) else ""
+                "name": token_data["name"],
+                "nation": token_data["nation"],
+                "image": image_digest or "",
+                "path": os.path.relpath(token_data["path"], os.getcwd()),
+                "original_path": token_data.get("original_path", "")
             }
         
-        game_state = {
+        return {
             "current_turn": self.current_turn,
             "placed_tokens": placed_tokens,
             "hex_data": self.hex_data
         }
+
+    def save_game(self):
+        """Zapisuje stan gry do binarnego pliku save_game.sav; obrazy żetonów trafiają do magazynu saves/blobs"""
+        if self.ai_thinking:
+            print("[UWAGA] SI planuje turę - zapis gry będzie możliwy po jej ruchu")
+            messagebox.showwarning("Zapis gry", "SI planuje turę - zapisz grę po jej ruchu.")
+            return
+        print("[INFO] Zapisywanie gry...")
+        save_folder = os.path.join(os.getcwd(), "saves")
+        if not os.path.exists(save_folder):
+            os.makedirs(save_folder)
+            print(f"Utworzono folder zapisu: {save_folder}")
+        
+        # Zapis atomowy - poprzedni plik zostaje nienaruszony, jeśli zapis się nie powiedzie
+        # (kopie zapasowe to pierścień autozapisów z końca kolejnych tur)
+        save_file = os.path.join(save_folder, "save_game.sav")
+        game_state = self.build_game_state()
+        try:
+            write_save(save_file, game_state)
+        except (OSError, ValueError) as e:
+            print(f"[BŁĄD] Podczas zapisywania gry: {e}")
+            messagebox.showerror("Błąd zapisu", f"Nie udało się zapisać gry:\n{e}")
+            return
         
-        with open(save_file, "w", encoding="utf-8") as f:
-            json.dump(game_state, f, indent=4, ensure_ascii=False)
+        # Usuń obrazy, do których nie odwołuje się ani zapis, ani żaden autozapis
+        removed = self.autosave.collect_garbage(
+            token["image"] for token in game_state["placed_tokens"].values() if token["image"])
+        if removed:
+            print(f"[INFO] Usunięto {removed} nieużywanych obrazów z magazynu zapisów")
         
         print(f"[INFO] Gra zapisana w pliku: {save_file}")
         messagebox.showinfo("Zapisywanie zakończone", f"Gra została zapisana w pliku: {save_file}")
 
+    def store_token_image(self, token_data):
+        """
+        Umieszcza obraz żetonu w magazynie zapisów i zapamiętuje jego skrót w token_data["image"].
+
+        Returns:
+            Skrót obrazu lub None, gdy obrazu nie da się odczytać
+        """
+        digest = token_data.get("image")
+        if digest and self.blob_store.contains(digest) and token_data.get("image_source") == token_data["path"]:
+            return digest
+        try:
+            digest = self.blob_store.put_file(token_data["path"])
+        except OSError as e:
+            print(f"[UWAGA] Nie udało się zapisać obrazu tokena {token_data['name']}: {e}")
+            return None
+        token_data["image"] = digest
+        token_data["image_source"] = token_data["path"]
+        return digest
+
     def load_game(self):
-        """Wczytuje stan gry z pliku save_game.json"""
+        """
+        Wczytuje stan gry z pliku save_game.sav (lub dawnego save_game.json).
+        Najpierw odtwarzana jest plansza, a żetony są wczytywane porcjami w kolejnych cyklach zdarzeń.
+        """
+        if self.ai_thinking:
+            # Wynik planowania SI dotyczyłby stanu sprzed wczytania
+            print("[UWAGA] SI planuje turę - wczytanie gry będzie możliwe po jej ruchu")
+            messagebox.showwarning("Wczytywanie gry", "SI planuje turę - wczytaj grę po jej ruchu.")
+            return
         print("[INFO] Wczytywanie gry...")
         save_folder = os.path.join(os.getcwd(), "saves")
-        save_file = os.path.join(save_folder, "save_game.json")
+        save_file = os.path.join(save_folder, "save_game.sav")
+        if not os.path.exists(save_file):
+            # Zapisy sprzed formatu binarnego
+            save_file = os.path.join(save_folder, "save_game.json")
         
         if not os.path.exists(save_file):
             messagebox.showerror(
@@ -1043,16 +1291,23 @@ class GameInterface(tk.Tk):
             return
         
         try:
-            # Wczytaj dane z pliku
-            with open(save_file, "r", encoding="utf-8") as f:
-                game_state = json.load(f)
+            # Wczytaj stan planszy; żetony będą czytane porcjami
+            if is_binary_save(save_file):
+                reader = SaveReader(save_file)
+                game_state = dict(reader.meta)
+                game_state["hex_data"] = reader.read_hex_data()
+                token_chunks = reader.iter_token_chunks()
+            else:
+                with open(save_file, "r", encoding="utf-8") as f:
+                    game_state = json.load(f)
+                items = list(game_state.get("placed_tokens", {}).items())
+                token_chunks = (items[i:i + TOKEN_CHUNK_SIZE] for i in range(0, len(items), TOKEN_CHUNK_SIZE))
             
             # Wyczyść istniejące dane i żetony z mapy
             self.clear_map()
             
             # Przywróć turę
             self.current_turn = game_state.get("current_turn", "Gracz 1")
-            self.current_turn_nation = self.get_current_turn_nation()
             
             # Aktualizuj etykietę tury
             self.turn_label.config(text=f"Tura: {self.current_turn_nation}")
@@ -1060,71 +1315,14 @@ class GameInterface(tk.Tk):
             # Przywróć dane heksów
             self.hex_data = game_state.get("hex_data", {})
             
-            # Przywróć żetony na mapę
-            placed_tokens = game_state.get("placed_tokens", {})
-            tokens_placed = 0
-            tokens_failed = 0
-            error_list = []
-            
-            # Przechowuj listę nazw żetonów do usunięcia z paneli
-            polish_tokens_to_remove = []
-            german_tokens_to_remove = []
-            
-            # Umieść żetony na mapie
-            for hex_id, token_data in placed_tokens.items():
-                success = self.place_token_on_hex_from_load(hex_id, token_data)
-                if success:
-                    tokens_placed += 1
-                    # Dodaj żeton do odpowiedniej listy do usunięcia
-                    if token_data["nation"] == "polskie":
-                        polish_tokens_to_remove.append(token_data["name"])
-                    elif token_data["nation"] == "niemieckie":
-                        german_tokens_to_remove.append(token_data["name"])
-                else:
-                    tokens_failed += 1
-                    error_list.append(f"Heks {hex_id}: {token_data['name']} ({token_data['path']})")
-            
-            # Usuń żetony z paneli bocznych
-            print("[INFO] Usuwanie żetonów z paneli bocznych, które są już na mapie...")
-            for token_name in polish_tokens_to_remove:
-                self.polish_panel.remove_token_by_name(token_name)
-                print(f"[INFO] Usunięto żeton {token_name} z polskiego panelu")
-                
-            for token_name in german_tokens_to_remove:
-                self.german_panel.remove_token_by_name(token_name)
-                print(f"[INFO] Usunięto żeton {token_name} z niemieckiego panelu")
-            
-            # Ustaw blokady żetonów zgodnie z aktualną turą
-            self.update_token_locks()
-            
-            # Aktualizuj informacje ekonomiczne
-            self.update_economic_info()
-            
-            # Pokaż szczegółową informację o wyniku wczytywania
-            message = f"Przywrócono grę z zapisu.\nPomyślnie wczytano {tokens_placed} żetonów."
-            if tokens_failed > 0:
-                message += f"\nNie udało się wczytać {tokens_failed} żetonów."
-                message += "\n\nSzczegóły błędów można znaleźć w konsoli."
-            
-            message += f"\n\nAktualna tura: {self.current_turn_nation}"
-            messagebox.showinfo("Wczytywanie zakończone", message)
-            
-            print(f"[INFO] Wczytano grę z pliku: {save_file}")
-            print(f"[INFO] Wczytano {tokens_placed} żetonów, nie udało się wczytać {tokens_failed} żetonów")
-            print(f"[INFO] Usunięto {len(polish_tokens_to_remove)} polskich i {len(german_tokens_to_remove)} niemieckich żetonów z paneli")
-            
-            if tokens_failed > 0 and tokens_placed > 0:
-                response = messagebox.askyesno(
-                    "Naprawić zapisy żetonów?",
-                    f"Nie udało się wczytać {tokens_failed} żetonów. Czy chcesz zaktualizować plik zapisu z poprawionymi ścieżkami wczytanych tokenów?\n"
-                    "UWAGA: Aktualny stan gry zostanie zapisany ponownie, nadpisując istniejący plik zapisu."
-                )
-                if response:
-                    self.save_game()
-                    messagebox.showinfo(
-                        "Plik zapisu zaktualizowany",
-                        "Plik zapisu został zaktualizowany z bieżącymi (poprawnymi) ścieżkami plików."
-                    )
+            self.pending_load = {
+                "save_file": save_file,
+                "placed": 0,
+                "failed": 0,
+                "errors": [],
+                "remove": {"polskie": [], "niemieckie": []},  # Nazwy żetonów do usunięcia z paneli
+            }
+            self.place_loaded_tokens(token_chunks, self.pending_load)
         
         except Exception as e:
             messagebox.showerror(
@@ -1134,6 +1332,85 @@ class GameInterface(tk.Tk):
             import traceback
             traceback.print_exc()
 
+    def place_loaded_tokens(self, token_chunks, load_state):
+        """Umieszcza na mapie kolejną porcję wczytanych żetonów i planuje następną"""
+        if self.pending_load is not load_state:
+            return  # W międzyczasie rozpoczęto inne wczytywanie
+        
+        try:
+            chunk = next(token_chunks, None)
+        except (OSError, SaveFormatError) as e:
+            print(f"[BŁĄD] Podczas wczytywania żetonów z zapisu: {e}")
+            chunk = None
+        
+        if chunk is None:
+            self.pending_load = None
+            self.finish_load_game(load_state)
+            return
+        
+        for hex_id, token_data in chunk:
+            if self.place_token_on_hex_from_load(hex_id, token_data):
+                load_state["placed"] += 1
+                if token_data["nation"] in load_state["remove"]:
+                    load_state["remove"][token_data["nation"]].append(token_data["name"])
+            else:
+                load_state["failed"] += 1
+                load_state["errors"].append(f"Heks {hex_id}: {token_data['name']} ({token_data['path']})")
+        
+        # Kolejna porcja po odrysowaniu planszy
+        self.after(1, self.place_loaded_tokens, token_chunks, load_state)
+
+    def finish_load_game(self, load_state):
+        """Kończy wczytywanie gry po umieszczeniu wszystkich żetonów"""
+        tokens_placed = load_state["placed"]
+        tokens_failed = load_state["failed"]
+        polish_tokens_to_remove = load_state["remove"]["polskie"]
+        german_tokens_to_remove = load_state["remove"]["niemieckie"]
+        
+        # Usuń żetony z paneli bocznych
+        print("[INFO] Usuwanie żetonów z paneli bocznych, które są już na mapie...")
+        removed = self.polish_panel.remove_tokens_by_name(polish_tokens_to_remove)
+        print(f"[INFO] Usunięto {removed} żetonów z polskiego panelu")
+        removed = self.german_panel.remove_tokens_by_name(german_tokens_to_remove)
+        print(f"[INFO] Usunięto {removed} żetonów z niemieckiego panelu")
+        
+        # Ustaw blokady żetonów zgodnie z aktualną turą
+        self.update_token_locks()
+        if self.is_ai_turn() and not self.ai_thinking:
+            self.start_ai_turn()
+        
+        # Aktualizuj informacje ekonomiczne
+        self.update_economic_info()
+        
+        for error in load_state["errors"]:
+            print(f"[BŁĄD] Nie wczytano żetonu - {error}")
+        
+        # Pokaż szczegółową informację o wyniku wczytywania
+        message = f"Przywrócono grę z zapisu.\nPomyślnie wczytano {tokens_placed} żetonów."
+        if tokens_failed > 0:
+            message += f"\nNie udało się wczytać {tokens_failed} żetonów."
+            message += "\n\nSzczegóły błędów można znaleźć w konsoli."
+        
+        message += f"\n\nAktualna tura: {self.current_turn_nation}"
+        messagebox.showinfo("Wczytywanie zakończone", message)
+        
+        print(f"[INFO] Wczytano grę z pliku: {load_state['save_file']}")
+        print(f"[INFO] Wczytano {tokens_placed} żetonów, nie udało się wczytać {tokens_failed} żetonów")
+        print(f"[INFO] Usunięto {len(polish_tokens_to_remove)} polskich i {len(german_tokens_to_remove)} niemieckich żetonów z paneli")
+        
+        if tokens_failed > 0 and tokens_placed > 0:
+            response = messagebox.askyesno(
+                "Naprawić zapisy żetonów?",
+                f"Nie udało się wczytać {tokens_failed} żetonów. Czy chcesz zaktualizować plik zapisu z poprawionymi ścieżkami wczytanych tokenów?\n"
+                "UWAGA: Aktualny stan gry zostanie zapisany ponownie, nadpisując istniejący plik zapisu."
+            )
+            if response:
+                self.save_game()
+                messagebox.showinfo(
+                    "Plik zapisu zaktualizowany",
+                    "Plik zapisu został zaktualizowany z bieżącymi (poprawnymi) ścieżkami plików."
+                )
+
     def place_token_on_hex_from_load(self, hex_id, token_data):
         """
         Umieszcza token na heksie podczas wczytywania gry.
@@ -1154,12 +1431,17 @@ class GameInterface(tk.Tk):
             image_path = token_data["path"]
             found_image = False
             
-            # 1. Najpierw spróbuj użyć kopii zapisanej w folderze zapisu
+            # 1. Najpierw spróbuj użyć obrazu z magazynu zapisów (po skrócie) lub kopii ze starszych zapisów
             save_images_folder = os.path.join(os.getcwd(), "saves", "images")
-            image_basename = os.path.basename(image_path)
+            image_basename = os.path.basename(image_path.replace("\\", "/"))
             saved_image_path = os.path.join(save_images_folder, image_basename)
+            image_digest = token_data.get("image")
             
-            if os.path.exists(saved_image_path):
+            if image_digest and self.blob_store.contains(image_digest):
+                image_path = self.blob_store.path_for(image_digest)
+                found_image = True
+                print(f"[INFO] Znaleziono obraz tokena w magazynie zapisów: {image_path}")
+            elif os.path.exists(saved_image_path):
                 image_path = saved_image_path
                 found_image = True
                 print(f"[INFO] Znaleziono kopię obrazu tokena w folderze zapisu: {image_path}")
@@ -1198,10 +1480,7 @@ class GameInterface(tk.Tk):
                 return False
                     
             # Wczytaj i przeskaluj obraz
-            img = Image.open(image_path)
-            token_size = self.hex_size * self.map_scale * 1.5
-            img = img.resize((int(token_size), int(token_size)), Image.LANCZOS)
-            token_img = ImageTk.PhotoImage(img)
+            token_img = self.get_token_photo(image_path)
             
             # Umieść token na mapie
             token_id = self.canvas.create_image(scaled_x, scaled_y, image=token_img, tags=f"token_{hex_id}")
@@ -1213,6 +1492,9 @@ class GameInterface(tk.Tk):
                 "nation": token_data["nation"],
                 "original_path": token_data.get("original_path", "")
             }
+            if image_digest and image_path == self.blob_store.path_for(image_digest):
+                token_obj["image"] = image_digest
+                token_obj["image_source"] = image_path
             
             # Zapisz referencję tokena
             self.placed_token_images[hex_id] = {
@@ -1222,15 +1504,12 @@ class GameInterface(tk.Tk):
                 "hex_id": hex_id
             }
             
+            self.track_token(hex_id, token_obj)
+            
             # Dodaj obsługę zdarzeń do tokena
             self.canvas.tag_bind(token_id, "<ButtonPress-1>", 
                                lambda e, hid=hex_id: self.start_drag_token_from_map(e, hid))
             
-            # Aktualizuj dane heksu
-            if hex_id not in self.hex_data:
-                self.hex_data[hex_id] = {}
-            self.hex_data[hex_id]["jednostki"] = token_data["name"]
-            
             print(f"[INFO] Umieszczono token {token_data['name']} na heksie {hex_id} z zapisu")
             return True
         
@@ -1261,25 +1540,37 @@ class GameInterface(tk.Tk):
         self.current_dragging_token = token
         print(f"Rozpoczęto umieszczanie tokena: {token['name']}")
 
+    def prefetch_token_images(self, tokens):
+        """Zleca wczytanie w tle miniatur paneli i obrazów żetonów w rozmiarze mapy."""
+        thumb_size = (self.polish_panel.token_size, self.polish_panel.token_size)
+        token_size = int(self.hex_size * self.map_scale * 1.5)
+        for token in tokens:
+            self.image_loader.prefetch(token["path"], thumb_size)
+            self.image_loader.prefetch(token["path"], (token_size, token_size))
+
+    def get_token_photo(self, path):
+        """Zwraca PhotoImage żetonu w rozmiarze mapy (z pamięci podręcznej obrazów)."""
+        token_size = int(self.hex_size * self.map_scale * 1.5)
+        return self.image_cache.get_photo(path, (token_size, token_size))
+
     def drag_place_token(self, event):
         """Obsługuje przeciąganie tokena po mapie"""
         if not self.current_dragging_token:
             return
         
-        # Pobierz współrzędne myszy względem canvasa
-        x = self.canvas.winfo_pointerx() - self.canvas.winfo_rootx()
-        y = self.canvas.winfo_pointery() - self.canvas.winfo_rooty()
-        
-        # Usuń poprzedni podgląd
-        if self.token_preview:
-            self.canvas.delete(self.token_preview)
-        
-        # Stwórz nowy podgląd tokena na mapie
-        if hasattr(self, 'token_preview_img'):
-            self.token_preview = self.canvas.create_image(x, y, image=self.token_preview_img, tags="token_preview")
+        # Podgląd jest tworzony przy pierwszym ruchu, a potem tylko przesuwany
+        if self.drag_controller.active:
+            self.drag_controller.move(event.x_root, event.y_root)
+            return
+        try:
+            token_img = self.get_token_photo(self.current_dragging_token["path"])
+        except OSError as e:
+            print(f"Błąd podczas tworzenia podglądu tokena: {e}")
+            return
+        self.drag_controller.start(token_img, event.x_root, event.y_root)
 
-    def show_hex_occupied_message(self, hex_id):
-        """Wyświetla migający czerwony komunikat nad zajętym heksem"""
+    def show_hex_occupied_message(self, hex_id, text="Żeton wraca do kontenera"):
+        """Wyświetla migający czerwony komunikat nad heksem (domyślnie: heks zajęty)"""
         if hex_id in self.hex_centers:
             center_x, center_y = self.hex_centers[hex_id]
             scaled_x = center_x * self.map_scale
@@ -1288,7 +1579,7 @@ class GameInterface(tk.Tk):
             # Stwórz komunikat nad żetonem
             message_id = self.canvas.create_text(
                 scaled_x, scaled_y - 30,  # Pozycja nad żetonem
-                text="Żeton wraca do kontenera",
+                text=text,
                 fill="red",
                 font=("Arial", 12, "bold"),
                 tags="warning_message"
@@ -1316,9 +1607,7 @@ class GameInterface(tk.Tk):
             return
         
         # Usuń podgląd
-        if self.token_preview:
-            self.canvas.delete(self.token_preview)
-            self.token_preview = None
+        self.drag_controller.stop()
         
         # Pobierz współrzędne myszy
         x = self.canvas.winfo_pointerx() - self.canvas.winfo_rootx()
@@ -1331,22 +1620,11 @@ class GameInterface(tk.Tk):
         # Znajdź heks pod kursorem
         clicked_hex = None
         if self.hex_centers:
-            min_distance = float('inf')
-            for hex_id, (center_x, center_y) in self.hex_centers.items():
-                # Skaluj pozycje zgodnie z map_scale
-                scaled_x = center_x * self.map_scale
-                scaled_y = center_y * self.map_scale
-                
-                # Oblicz odległość od kliknięcia do środka heksu
-                distance = ((scaled_x - canvas_x) ** 2 + (scaled_y - canvas_y) ** 2) ** 0.5
-                if distance < min_distance:
-                    min_distance = distance
-                    clicked_hex = hex_id
-            
-            # Sprawdź czy kliknięcie jest wystarczająco blisko środka heksu
-            max_valid_distance = self.hex_size * self.map_scale * 1.5
-            if min_distance > max_valid_distance:
-                clicked_hex = None
+            # Heks pod kursorem, o ile kursor jest wystarczająco blisko jego środka
+            clicked_hex = self.hex_picker.pick(
+                canvas_x / self.map_scale, canvas_y / self.map_scale,
+                max_distance=self.hex_size * 1.5
+            )
         
         # Jeśli znaleziono heks, umieść token
         if clicked_hex:
@@ -1380,10 +1658,7 @@ class GameInterface(tk.Tk):
             
             # Dodaj token na stałe do mapy
             try:
-                img = Image.open(self.current_dragging_token["path"])
-                token_size = self.hex_size * self.map_scale * 1.5
-                img = img.resize((int(token_size), int(token_size)), Image.LANCZOS)
-                token_img = ImageTk.PhotoImage(img)
+                token_img = self.get_token_photo(self.current_dragging_token["path"])
                         
                 # Zachowaj referencję do obrazka, aby uniknąć garbage collection
                 if not hasattr(self, 'placed_token_images'):
@@ -1401,16 +1676,13 @@ class GameInterface(tk.Tk):
                     "token_data": self.current_dragging_token,
                     "hex_id": clicked_hex  # Dodaj odnośnik do ID heksu
                 }
+                # Postaw jednostkę w silniku gry (aktualizuje też dane heksu)
+                self.track_token(clicked_hex, self.current_dragging_token)
                 
                 # Dodaj obsługę zdarzeń, aby można było podnosić token z mapy
                 self.canvas.tag_bind(token_id, "<ButtonPress-1>", 
                                     lambda e, hid=clicked_hex: self.start_drag_token_from_map(e, hid))
                 
-                # Aktualizuj dane heksu
-                if clicked_hex not in self.hex_data:
-                    self.hex_data[clicked_hex] = {}
-                self.hex_data[clicked_hex]["jednostki"] = self.current_dragging_token["name"]
-                
                 print(f"Umieszczono token {self.current_dragging_token['name']} na heksie {clicked_hex}")
                 
                 # Jeśli heks jest aktualnie wybrany, zaktualizuj informacje
@@ -1476,20 +1748,21 @@ class GameInterface(tk.Tk):
             
             # Utwórz podgląd tokenu podczas przeciągania
             try:
-                img = Image.open(token_info["token_data"]["path"])
-                token_size = self.hex_size * self.map_scale * 1.5
-                img = img.resize((int(token_size), int(token_size)), Image.LANCZOS)
-                self.token_preview_img = ImageTk.PhotoImage(img)
+                token_img = self.get_token_photo(token_info["token_data"]["path"])
                 
                 # Dodaj binding do przeciągania
                 self.canvas.bind("<B1-Motion>", self.drag_map_token)
                 self.canvas.bind("<ButtonRelease-1>", self.drop_map_token)
                 
                 # Zacznij od razu pokazywać podgląd
-                x, y = event.x, event.y
-                if self.token_preview:
-                    self.canvas.delete(self.token_preview)
-                self.token_preview = self.canvas.create_image(x, y, image=self.token_preview_img, tags="token_preview")
+                self.drag_controller.start(token_img, event.x_root, event.y_root)
+                
+                # Pokaż heksy, do których żeton może dojść w tej turze
+                self.movement_result = self.get_movement_result(hex_id)
+                if self.movement_result:
+                    self.show_movement_range(self.movement_result)
+                    self.canvas.tag_raise("drag_snap")
+                    self.canvas.tag_raise("token_preview")
                 
                 return "break"  # Zatrzymaj propagację zdarzenia
             except Exception as e:
@@ -1502,20 +1775,16 @@ class GameInterface(tk.Tk):
         """Obsługuje przeciąganie tokena z mapy"""
         if self.current_dragging_map_token:
             # Aktualizuj pozycję podglądu
-            x, y = event.x, event.y
-            if self.token_preview:
-                self.canvas.delete(self.token_preview)
-            self.token_preview = self.canvas.create_image(x, y, image=self.token_preview_img, tags="token_preview")
+            self.drag_controller.move(event.x_root, event.y_root)
 
     def drop_map_token(self, event):
         """Obsługuje upuszczenie tokena z mapy"""
         if not self.current_dragging_map_token:
             return
         
-        # Usuń podgląd
-        if self.token_preview:
-            self.canvas.delete(self.token_preview)
-            self.token_preview = None
+        # Usuń podgląd i zasięg ruchu
+        self.drag_controller.stop()
+        self.clear_movement_range()
         
         # Sprawdź, czy token został upuszczony nad którymkolwiek z kontenerów żetonów
         token_nation = self.current_dragging_map_token["nation"]
@@ -1592,20 +1861,12 @@ class GameInterface(tk.Tk):
         # Znajdź heks pod kursorem
         clicked_hex = None
         if self.hex_centers:
-            min_distance = float('inf')
-            for hex_id, (center_x, center_y) in self.hex_centers.items():
-                scaled_x = center_x * self.map_scale
-                scaled_y = center_y * self.map_scale
-                
-                # Oblicz odległość od kliknięcia do środka heksu
-                distance = ((scaled_x - canvas_x) ** 2 + (scaled_y - canvas_y) ** 2) ** 0.5
-                if distance < min_distance:
-                    min_distance = distance
-                    clicked_hex = hex_id
-            
-            # Sprawdź czy kliknięcie jest wystarczająco blisko środka heksu
-            max_valid_distance = self.hex_size * self.map_scale * 1.5
-            if min_distance <= max_valid_distance:
+            # Heks pod kursorem, o ile kursor jest wystarczająco blisko jego środka
+            clicked_hex = self.hex_picker.pick(
+                canvas_x / self.map_scale, canvas_y / self.map_scale,
+                max_distance=self.hex_size * 1.5
+            )
+            if clicked_hex:
                 # Jeśli to nowy hex, przesuń token (usuń ze starego, umieść na nowym)
                 old_hex_id = self.current_dragging_map_token["hex_id"]
                 if clicked_hex != old_hex_id:
@@ -1636,74 +1897,123 @@ class GameInterface(tk.Tk):
                         self.current_dragging_map_token = None
                         return
                     
-                    # Usuń token ze starego heksu
-                    self.remove_token_from_map(old_hex_id)
-                    
-                    # Umieść token na nowym heksie (używamy tokena jako current_dragging_token)
-                    self.current_dragging_token = {
-                        "name": self.current_dragging_map_token["name"],
-                        "path": self.current_dragging_map_token["path"],
-                        "nation": self.current_dragging_map_token["nation"],
-                        "data": self.current_dragging_map_token["data"]
-                    }
-                    
-                    # Pobierz pozycję nowego heksu
-                    center_x, center_y = self.hex_centers[clicked_hex]
-                    scaled_x = center_x * self.map_scale
-                    scaled_y = center_y * self.map_scale
-                    
-                    # Stwórz token na nowym heksie
-                    img = Image.open(self.current_dragging_token["path"])
-                    token_size = self.hex_size * self.map_scale * 1.5
-                    img = img.resize((int(token_size), int(token_size)), Image.LANCZOS)
-                    token_img = ImageTk.PhotoImage(img)
-                    
-                    # Umieść token na mapie
-                    token_id = self.canvas.create_image(scaled_x, scaled_y, image=token_img, tags=f"token_{clicked_hex}")
-                    self.placed_token_images[clicked_hex] = {
-                        "image": token_img,
-                        "image_id": token_id,
-                        "token_data": self.current_dragging_token,
-                        "hex_id": clicked_hex
-                    }
-                    
-                    # Dodaj obsługę zdarzeń, aby można było podnosić token z mapy
-                    self.canvas.tag_bind(token_id, "<ButtonPress-1>", 
-                                      lambda e, hid=clicked_hex: self.start_drag_token_from_map(e, hid))
-                    
-                    # Aktualizuj dane heksu
-                    if clicked_hex not in self.hex_data:
-                        self.hex_data[clicked_hex] = {}
-                    self.hex_data[clicked_hex]["jednostki"] = self.current_dragging_token["name"]
-                    print(f"Przeniesiono token {self.current_dragging_token['name']} na heks {clicked_hex}")
+                    # Ruch w silniku gry - blokady, zajętość heksu i pozostałe punkty ruchu w tej turze;
+                    # jednostka zachowuje siłę, więc na canvasie przesuwany jest tylko obraz żetonu
+                    try:
+                        self.game.move_unit(old_hex_id, clicked_hex)
+                    except GameRuleError as e:
+                        self.show_hex_occupied_message(clicked_hex, text="Ruch niedozwolony")
+                        print(f"[UWAGA] {e}")
+                        self.current_dragging_token = None
+                        self.current_dragging_map_token = None
+                        return
+                    self.sync_tokens_with_game()
+                    self.refresh_fog_of_war()
+                    print(f"Przeniesiono token {token_name} na heks {clicked_hex}")
                     
                     # Jeśli heks jest aktualnie wybrany, zaktualizuj informacje
                     if self.selected_hex == clicked_hex:
                         self.update_hex_info(self.hex_data[clicked_hex])
         
-        # Usuń podgląd
-        if self.token_preview:
-            self.canvas.delete(self.token_preview)
-            self.token_preview = None
-        
         # Wyczyść zmienne
         self.current_dragging_token = None
         self.current_dragging_map_token = None
 
+    def track_token(self, hex_id, token_data):
+        """Stawia w silniku gry jednostkę żetonu umieszczonego na heksie."""
+        try:
+            self.game.place_unit(hex_id, token_data)
+        except GameRuleError as e:
+            print(f"[UWAGA] {e}")
+        self.refresh_fog_of_war()
+
+    def show_deployed_token(self, hex_id, token):
+        """Rysuje na heksie żeton postawiony w silniku gry i usuwa go z panelu."""
+        center_x, center_y = self.hex_centers[hex_id]
+        token_img = self.get_token_photo(token["path"])
+        token_id = self.canvas.create_image(center_x * self.map_scale, center_y * self.map_scale,
+                                            image=token_img, tags=f"token_{hex_id}")
+        self.placed_token_images[hex_id] = {
+            "image": token_img,
+            "image_id": token_id,
+            "token_data": token,
+            "hex_id": hex_id
+        }
+        self.canvas.tag_bind(token_id, "<ButtonPress-1>",
+                             lambda e, hid=hex_id: self.start_drag_token_from_map(e, hid))
+        panel = self.polish_panel if token["nation"] == "polskie" else self.german_panel
+        panel.remove_token_by_name(token["name"])
+
+    def untrack_token(self, hex_id):
+        """Zdejmuje w silniku gry jednostkę z heksu."""
+        self.game.remove_unit(hex_id)
+        self.refresh_fog_of_war()
+
+    def sync_tokens_with_game(self):
+        """Przenosi na canvas zmiany planszy wykonane w silniku gry (straty i odwroty po walce)."""
+        positions = {unit.name: hex_id for hex_id, unit in self.game.state.units.items()}
+        moved = {}
+        for hex_id, token_info in list(self.placed_token_images.items()):
+            new_hex = positions.get(token_info["token_data"]["name"])
+            if new_hex == hex_id:
+                continue
+            del self.placed_token_images[hex_id]
+            if new_hex is None:
+                # Jednostka zniszczona
+                self.canvas.delete(token_info["image_id"])
+                print(f"[INFO] Żeton {token_info['token_data']['name']} został zniszczony na heksie {hex_id}")
+                continue
+            center_x, center_y = self.hex_centers[new_hex]
+            self.canvas.coords(token_info["image_id"], center_x * self.map_scale, center_y * self.map_scale)
+            self.canvas.itemconfig(token_info["image_id"], tags=f"token_{new_hex}")
+            self.canvas.tag_bind(token_info["image_id"], "<ButtonPress-1>",
+                                 lambda e, hid=new_hex: self.start_drag_token_from_map(e, hid))
+            token_info["hex_id"] = new_hex
+            moved[new_hex] = token_info
+        self.placed_token_images.update(moved)
+
+    def refresh_fog_of_war(self):
+        """Ukrywa żetony przeciwnika stojące na heksach, których aktywny gracz nie widzi."""
+        if not self.visibility:
+            return
+        viewers = [nation for nation in self.visibility.coverage if self.is_turn_active(nation)]
+        for hex_id, token_info in self.placed_token_images.items():
+            nation = token_info["token_data"]["nation"]
+            visible = self.is_turn_active(nation)
+            if not visible:
+                idx = self.hex_grid.index_of(hex_id)
+                visible = any(self.visibility.is_visible(viewer, idx) for viewer in viewers)
+            self.canvas.itemconfig(token_info["image_id"], state="normal" if visible else "hidden")
+
+    def get_movement_result(self, hex_id):
+        """Zwraca zasięg ruchu żetonu stojącego na heksie lub None, gdy żeton nie ma punktów ruchu."""
+        return self.game.reachable(hex_id)
+
+    def show_movement_range(self, movement_result):
+        """Obrysowuje heksy, na których żeton może zakończyć ruch."""
+        s = self.hex_size * self.map_scale
+        for idx in movement_result.reachable:
+            center_x, center_y = self.hex_grid.center(idx)
+            vertices = self.get_hex_vertices(center_x * self.map_scale, center_y * self.map_scale, s)
+            self.canvas.create_polygon(
+                [coord for point in vertices for coord in point],
+                outline="yellow", fill="", width=2, tags="move_range"
+            )
+
+    def clear_movement_range(self):
+        """Usuwa obrys zasięgu ruchu."""
+        self.canvas.delete("move_range")
+        self.movement_result = None
+
     def remove_token_from_map(self, hex_id):
         """Usuwa token z mapy i z danych heksu"""
         if hex_id in self.placed_token_images:
             # Usuń obiekt z canvasa
             self.canvas.delete(self.placed_token_images[hex_id]["image_id"])
             
-            # Usuń informację o jednostkach z danych heksu
-            if hex_id in self.hex_data and "jednostki" in self.hex_data[hex_id]:
-                del self.hex_data[hex_id]["jednostki"]
-                if not self.hex_data[hex_id]:
-                    del self.hex_data[hex_id]
-            
-            # Usuń token z listy umieszczonych
+            # Usuń token z listy umieszczonych i jednostkę z silnika gry (razem z danymi heksu)
             del self.placed_token_images[hex_id]
+            self.untrack_token(hex_id)
             
             # Jeśli heks jest aktualnie wybrany, zaktualizuj informacje
             if self.selected_hex == hex_id:
@@ -1734,6 +2044,11 @@ class GameInterface(tk.Tk):
             icon='question'
         )
         if response:
+            self.image_loader.shutdown()
+            self.turns.shutdown()
+            if self.ai_player is not None:
+                self.ai_player.shutdown()
+            self.autosave.stop()
             super().quit()
 
     def lock_nation_tokens(self, nation):
@@ -1741,79 +2056,32 @@ class GameInterface(tk.Tk):
         Blokuje możliwość operowania żetonami danej nacji.
         Zmodyfikowana wersja, która nie usuwa folderów z obrazami żetonów.
         """
-        if nation == "polskie":
-            self.polish_tokens_locked = True
-            print("Zablokowano żetony polskie")
-        elif nation == "niemieckie":
-            self.german_tokens_locked = True
-            print("Zablokowano żetony niemieckie")
-        
-        # Zamiast usuwać oryginalne foldery, najpierw zrobimy kopie obrazów do folderu zapisu
-        save_images_folder = os.path.join(os.getcwd(), "saves", "images")
-        if not os.path.exists(save_images_folder):
-            os.makedirs(save_images_folder, exist_ok=True)
-        
-        # Znajdź wszystkie tokeny danej nacji, które zostały umieszczone na mapie
-        for hex_id, token_info in self.placed_token_images.items():
+        if nation in ("polskie", "niemieckie"):
+            self.game.lock_nation(nation)
+            print(f"Zablokowano żetony {nation}")
+        
+        # Zamiast usuwać oryginalne foldery, zabezpiecz obrazy umieszczonych żetonów w magazynie zapisów
+        # (obraz już zapisany nie jest ponownie kopiowany)
+        for token_info in self.placed_token_images.values():
             token_data = token_info["token_data"]
             if token_data["nation"] == nation:
-                # Zamiast usuwać, zrób kopię obrazu
-                token_path = token_data["path"]
-                token_name = token_data["name"]
-                if os.path.exists(token_path):
-                    try:
-                        # Utwórz unikalną nazwę dla kopii obrazu
-                        image_filename = f"{nation}_{token_name}_{hex_id}.png".replace(" ", "_")
-                        image_save_path = os.path.join(save_images_folder, image_filename)
-                        
-                        # Skopiuj obraz do folderu zapisu
-                        shutil.copy2(token_path, image_save_path)
-                        print(f"[INFO] Utworzono kopię obrazu dla tokena {token_name}: {image_save_path}")
-                        
-                        # Zaktualizuj ścieżkę tokena do nowej kopii
-                        token_data["original_path"] = token_path
-                        token_data["path"] = image_save_path
-                    except Exception as e:
-                        print(f"[UWAGA] Nie udało się utworzyć kopii obrazu dla tokena {token_name}: {e}")
+                self.store_token_image(token_data)
 
     def unlock_nation_tokens(self, nation):
         """Odblokowuje możliwość operowania żetonami danej nacji."""
-        nation_lower = nation.lower()
-        
-        # Bardziej elastyczne sprawdzanie na podstawie części nazwy
-        if "pol" in nation_lower:
-            self.polish_tokens_locked = False
-            print("Odblokowano żetony polskie")
-        elif "niem" in nation_lower or "germ" in nation_lower:
-            self.german_tokens_locked = False
-            print("Odblokowano żetony niemieckie")
-        else:
+        if side_of(nation) is None:
             print(f"Nieznana nacja: {nation}")
+            return
+        self.game.unlock_nation(nation)
+        print(f"Odblokowano żetony {nation}")
 
     def is_nation_locked(self, nation):
         """Sprawdza czy żetony danej nacji są zablokowane."""
-        nation_lower = nation.lower()
-        
-        if "pol" in nation_lower:
-            return self.polish_tokens_locked
-        elif "niem" in nation_lower or "germ" in nation_lower:
-            return self.german_tokens_locked
-        
-        # Jeśli nie rozpoznano nacji, domyślnie zwracamy False
-        print(f"Nieznana nacja w sprawdzeniu blokady: {nation}")
-        return False
+        return self.game.is_nation_locked(nation)
 
     def is_turn_active(self, nation):
         """Sprawdza, czy obecny gracz ma aktywną turę."""
-        nation_lower = nation.lower()
-        current_nation_lower = self.current_turn_nation.lower()
-        
-        # Porównanie na podstawie części nazwy
-        if (("pol" in nation_lower and "pol" in current_nation_lower) or
-            (("niem" in nation_lower or "germ" in nation_lower) and 
-             ("niem" in current_nation_lower or "germ" in current_nation_lower))):
-            return True
-        return False
+        return self.game.is_turn_active(nation)
 
     def update_economic_info(self):
         """Aktualizuje panel informacji ekonomicznych na podstawie aktualnej nacji."""
@@ -1853,15 +2121,28 @@ class GameInterface(tk.Tk):
                     self.terrain_types = self.map_data["terrain_types"]
                     print(f"Wczytano {len(self.terrain_types)} typów terenu")
                 
-                # Wczytaj pozycje środków heksów
-                if "hex_centers" in self.map_data:
-                    self.hex_centers = {}
-                    for hex_id, coords in self.map_data["hex_centers"].items():
-                        if isinstance(coords, list) and len(coords) == 2:
-                            self.hex_centers[hex_id] = tuple(coords)
-                        elif isinstance(coords, list) and len(coords) == 1:
-                            print(f"[UWAGA] Nieprawidłowy format pozycji dla heksu {hex_id}")
-                    print(f"Wczytano pozycje dla {len(self.hex_centers)} heksów")
+                # Zbuduj tablicowy model mapy - zapytania o teren heksu to odczyt z tablic
+                self.hex_grid = HexGrid.from_map_data(self.map_data)
+                print(f"Zbudowano siatkę heksów: {self.hex_grid.grid_cols}x{self.hex_grid.grid_rows}")
+                
+                # Sąsiedzi heksów i przesunięcia dysków do maksymalnego zasięgu jednostek
+                catalog_data = [token["data"] for token in self.token_catalog.load()]
+                # Katalog pomija żetony bez obrazu PNG - wtedy zasięg z samych plików token_data.json
+                max_range = max_token_range(catalog_data) or load_max_token_range(TOKENS_PATH)
+                self.hex_neighbors = HexNeighborTable(self.hex_grid, max_range)
+                print(f"Zbudowano tablice sąsiedztwa heksów (maks. zasięg: {max_range})")
+                self.game.attach_map(self.hex_grid, self.hex_neighbors)
+                self.movement_engine = self.game.movement
+                self.visibility = self.game.visibility
+                
+                # Szanse ataku dla wszystkich par rodzajów jednostek i modyfikatorów obrony na mapie
+                defense_mods = set(self.hex_grid.defense_mod[self.hex_grid.valid].tolist())
+                count = self.combat_odds.precompute(catalog_data, defense_mods)
+                print(f"Wyliczono szanse ataku dla {count} kombinacji jednostek i terenu")
+                
+                # Pozycje środków heksów - wyliczone z konfiguracji i maski heksów w HexGrid
+                self.hex_centers = self.hex_grid.centers_dict()
+                print(f"Wyznaczono pozycje dla {len(self.hex_centers)} heksów")
                 
                 if not self.hex_centers:
                     print("[UWAGA] Brak informacji o pozycjach heksów w pliku danych. Generowanie pozycji...")
@@ -1879,6 +2160,10 @@ class GameInterface(tk.Tk):
                         self.hex_horiz_offset = 1.5 * self.hex_size
                         self.hex_vert_offset = self.hex_height
                         print(f"Ustawiono parametry heksów: size={self.hex_size}, width={self.hex_width}, height={self.hex_height}")
+                
+                # Zbuduj picker heksów (pixel -> heks w czasie stałym)
+                if self.hex_centers:
+                    self.hex_picker = HexPicker(self.hex_centers, self.hex_size)
         except Exception as e:
             print(f"[BŁD] Problem podczas wczytywania danych mapy: {e}")
             import traceback
@@ -1913,25 +2198,19 @@ class GameInterface(tk.Tk):
         print(f"Wygenerowano pozycje dla {len(self.hex_centers)} heksów")
 
     def draw_hex_grid(self):
-        """Rysuje siatkę heksów na mapie na podstawie danych JSON."""
+        """Rysuje siatkę heksów na mapie jako jedną warstwę obrazu (wyrenderowaną lub wczytaną z cache)."""
         print("Rysowanie siatki heksów z danych JSON...")
         
-        for hex_id, (center_x, center_y) in self.hex_centers.items():
-            x = center_x * self.map_scale
-            y = center_y * self.map_scale
-            
-            vertices = self.get_hex_vertices(x, y, self.hex_size * self.map_scale)
-            self.canvas.create_polygon(vertices, outline="red", fill="", width=2, tags=f"hex_{hex_id}")
-            
-            if self.debug_mode:
-                self.canvas.create_text(x, y, text=hex_id, fill="blue", font=("Arial", 8), tags=f"text_{hex_id}")
-            
-            if hex_id in self.hex_data:
-                terrain = self.hex_data[hex_id]
-                if "move_mod" in terrain and "defense_mod" in terrain:
-                    tekst = f"M:{terrain['move_mod']} D:{terrain['defense_mod']}"
-                    self.canvas.create_text(x, y + 15, text=tekst, fill="green", font=("Arial", 8), tags=f"info_{hex_id}")
-        print(f"Narysowano {len(self.hex_centers)} heksów")
+        if self.hex_overlay is None:
+            self.hex_overlay = HexGridOverlay(self.hex_grid, debug_mode=self.debug_mode)
+        layer = self.hex_overlay.get_layer(self.map_scale, (self.map_width, self.map_height))
+        self.tk_hex_overlay = ImageTk.PhotoImage(layer)
+        
+        self.canvas.delete("hex_overlay")
+        self.canvas.create_image(0, 0, anchor="nw", image=self.tk_hex_overlay, tags="hex_overlay")
+        self.canvas.tag_lower("hex_overlay")
+        self.canvas.tag_lower("map_tile")
+        print(f"Narysowano {len(self.hex_grid.valid_indices())} heksów")
 
     def get_hex_vertices(self, center_x, center_y, size):
         """Zwraca współrzędne wierzchołków heksagonu (flat-topped)."""
@@ -1958,6 +2237,9 @@ class GameInterface(tk.Tk):
             
             self.placed_token_images.clear()
         
+        self.game.clear_units()
+        self.clear_movement_range()
+        
         self.clear_highlight()
         self.selected_hex = None
         
@@ -1969,27 +2251,26 @@ class GameInterface(tk.Tk):
         if hasattr(self, 'current_dragging_map_token'):
             self.current_dragging_map_token = None
         
-        if hasattr(self, 'token_preview') and self.token_preview:
-            self.canvas.delete(self.token_preview)
-            self.token_preview = None
+        self.drag_controller.stop()
         self.clear_highlight()
         print("[INFO] Mapa została wyczyszczona")
 
     def update_token_locks(self):
         """Aktualizuje stan blokady żetonów na podstawie aktualnej tury"""
         print(f"[INFO] Aktualizacja blokad żetonów dla tury: {self.current_turn_nation}")
-        if self.current_turn_nation == "Polska":
-            self.polish_tokens_locked = False
-            self.german_tokens_locked = True
-            self.polish_panel.unlock_tokens()
-            self.german_panel.lock_tokens()
-            print("[INFO] Żetony polskie odblokowane, żetony niemieckie zablokowane")
-        else:
-            self.polish_tokens_locked = True
-            self.german_tokens_locked = False
-            self.polish_panel.lock_tokens()
-            self.german_panel.unlock_tokens()
-            print("[INFO] Żetony polskie zablokowane, żetony niemieckie odblokowane")
+        self.game.update_locks()
+        self.sync_panel_locks()
+
+    def sync_panel_locks(self):
+        """Ustawia blokady paneli żetonów zgodnie z blokadami w silniku gry"""
+        for panel, locked in ((self.polish_panel, self.polish_tokens_locked),
+                              (self.german_panel, self.german_tokens_locked)):
+            if locked:
+                panel.lock_tokens()
+            else:
+                panel.unlock_tokens()
+        print(f"[INFO] Żetony polskie {'zablokowane' if self.polish_tokens_locked else 'odblokowane'}, "
+              f"żetony niemieckie {'zablokowane' if self.german_tokens_locked else 'odblokowane'}")
 
     def load_tokens_from_folder(self):
         """Wczytuje żetony z folderu tokeny i jego podfolderów"""
@@ -2020,58 +2301,16 @@ class GameInterface(tk.Tk):
             polish_tokens = []
             german_tokens = []
             
-            print(f"[DEBUG] Skanowanie folderów żetonów, katalog główny: {TOKENS_PATH}")
-            for dirpath, dirnames, filenames in os.walk(TOKENS_PATH):
-                if dirpath == TOKENS_PATH:
-                    print(f"[DEBUG] Pomijam główny katalog: {dirpath}")
-                    continue
-                
-                png_files = [f for f in filenames if f.lower().endswith('.png')]
-                if not png_files:
-                    print(f"[DEBUG] Brak plików PNG w katalogu: {dirpath}")
-                    continue
-                
-                token_name = os.path.basename(dirpath)
-                token_path = os.path.join(dirpath, png_files[0])
-                print(f"[DEBUG] Znaleziono token: {token_name}, ścieżka: {token_path}")
-                
-                token_data_path = os.path.join(dirpath, "token_data.json")
-                token_data = {}
-                if os.path.exists(token_data_path):
-                    try:
-                        with open(token_data_path, 'r', encoding='utf-8') as f:
-                            token_data = json.load(f)
-                            print(f"[DEBUG] Wczytano dane tokena z: {token_data_path}")
-                    except Exception as e:
-                        print(f"[BŁĄD] Podczas wczytywania danych tokena {token_name}: {e}")
-                
-                nation = token_data.get("nation", "")
-                
-                token_obj = {
-                    "name": token_name,
-                    "path": token_path,
-                    "data": token_data
-                }
-                
-                if "Polska" in token_name or "polska" in token_name or nation == "Polska":
-                    token_obj["nation"] = "polskie"
+            # Manifest katalogu żetonów - skanowane są tylko foldery zmienione od ostatniego startu
+            catalog = self.token_catalog
+            for token_obj in catalog.tokens() or catalog.load():
+                if token_obj["nation"] == "polskie":
                     polish_tokens.append(token_obj)
-                    print(f"[INFO] Token {token_name} dodany jako polski")
-                elif "Niemcy" in token_name or "niemieck" in token_name or nation == "Niemcy":
-                    token_obj["nation"] = "niemieckie"
+                elif token_obj["nation"] == "niemieckie":
                     german_tokens.append(token_obj)
-                    print(f"[INFO] Token {token_name} dodany jako niemiecki")
                 else:
-                    if "polskie" in dirpath.lower():
-                        token_obj["nation"] = "polskie"
-                        polish_tokens.append(token_obj)
-                        print(f"[INFO] Token {token_name} dodany jako polski (na podstawie ścieżki)")
-                    elif "niemieckie" in dirpath.lower() or "niemcy" in dirpath.lower():
-                        token_obj["nation"] = "niemieckie"
-                        german_tokens.append(token_obj)
-                        print(f"[INFO] Token {token_name} dodany jako niemiecki (na podstawie ścieżki)")
-                    else:
-                        print(f"[UWAGA] Nie można ustalić nacji dla tokena {token_name}, token pominięty")
+                    print(f"[UWAGA] Nie można ustalić nacji dla tokena {token_obj['name']}, token pominięty")
+            print(f"[INFO] Katalog żetonów: {len(catalog.entries)} żetonów, przeskanowano {catalog.scanned} katalogów")
             
             if not polish_tokens and not german_tokens:
                 print("[UWAGA] Nie znaleziono żadnych żetonów!")
@@ -2084,11 +2323,9 @@ class GameInterface(tk.Tk):
                 )
                 return
                 
-            for token in polish_tokens:
-                self.polish_panel.add_token(token)
-            
-            for token in german_tokens:
-                self.german_panel.add_token(token)
+            self.polish_panel.add_tokens(polish_tokens)
+            self.german_panel.add_tokens(german_tokens)
+            self.prefetch_token_images(polish_tokens + german_tokens)
             
             print(f"[INFO] Wczytano {len(polish_tokens)} polskich żetonów i {len(german_tokens)} niemieckich żetonów")
             
@@ -0,0 +1,47 @@
+"""
+Wspólne elementy testów: katalog projektu w sys.path i mała mapa testowa.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.game_state import GameEngine, GameState  # noqa: E402
+from core.hex_neighbors import HexNeighborTable  # noqa: E402
+from core.map import HexGrid  # noqa: E402
+from engine.economy import EconomySystem  # noqa: E402
+
+
+def make_grid(cols=8, rows=8):
+    """Zwraca siatkę cols x rows z lasem, bagnem i heksem spoza mapy."""
+    grid = HexGrid(cols, rows)
+    grid.valid[:] = True
+    grid.set_terrain(grid.index_of("2_2"), "las", -2, 1)
+    grid.set_terrain(grid.index_of("2_3"), "las", -2, 1)
+    grid.set_terrain(grid.index_of("4_4"), "bagno", -3, 0)
+    grid.valid[grid.index_of("3_5")] = False
+    return grid
+
+
+@pytest.fixture
+def small_map():
+    """Mapa testowa: (HexGrid, HexNeighborTable)."""
+    grid = make_grid()
+    return grid, HexNeighborTable(grid, max_radius=3)
+
+
+@pytest.fixture
+def engine(small_map):
+    """Silnik gry na mapie testowej (bez jednostek, tura Polski)."""
+    grid, neighbor_table = small_map
+    return GameEngine(GameState(economy=EconomySystem(verbose=False)), grid, neighbor_table, seed=1)
+
+
+def token(name, nation, **stats):
+    """Zwraca dane żetonu w formacie paneli gry."""
+    data = {"movement_points": 3, "attack_value": 3, "combat_value": 4, "attack_range": 1, "sight_range": 2}
+    data.update(stats)
+    return {"name": name, "nation": nation, "path": "", "data": data}
@@ -0,0 +1,42 @@
+import os
+import threading
+
+from core.blob_store import BlobStore, file_digest
+
+
+def test_put_file_deduplicates_and_collects_garbage(tmp_path):
+    first = tmp_path / "a.png"
+    second = tmp_path / "b.png"
+    first.write_bytes(b"obraz" * 1000)
+    second.write_bytes(b"inny obraz")
+    store = BlobStore(str(tmp_path / "blobs"))
+
+    digest = store.put_file(str(first))
+    assert digest == file_digest(str(first))
+    assert store.put_file(str(first)) == digest
+    other = store.put_file(str(second))
+    assert store.contains(digest) and store.contains(other)
+
+    assert store.collect_garbage({digest}) == 1
+    assert store.contains(digest) and not store.contains(other)
+    assert not os.path.exists(store.path_for(other))
+    # Nowy obiekt magazynu odczytuje zawartość z dysku
+    assert BlobStore(str(tmp_path / "blobs")).contains(digest)
+
+
+def test_concurrent_put_file_stores_intact_blob(tmp_path):
+    source = tmp_path / "mapa.png"
+    source.write_bytes(os.urandom(2 * 1024 * 1024))
+    store = BlobStore(str(tmp_path / "blobs"))
+
+    digests = []
+    threads = [threading.Thread(target=lambda: digests.append(store.put_file(str(source)))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(digests)) == 1
+    blob_path = store.path_for(digests[0])
+    assert file_digest(blob_path) == digests[0]
+    assert os.listdir(os.path.dirname(blob_path)) == [os.path.basename(blob_path)]
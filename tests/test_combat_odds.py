@@ -0,0 +1,71 @@
+from fractions import Fraction
+from itertools import product
+
+import numpy as np
+import pytest
+
+from engine.combat import COUNTER_HIT_ROLL, resolve_batch
+from engine.combat_odds import CombatOdds, exact_odds
+
+
+def brute_force_odds(attack_value, strength, threshold, melee):
+    """Rozkład wyniku ataku z przejrzenia wszystkich rzutów kośćmi (dokładne ułamki)."""
+    outcome = 1 / Fraction(6) ** attack_value
+    loss_pmf = [Fraction(0)] * (strength + 1)
+    destroyed = retreat = attacker_loss = Fraction(0)
+    for dice in product(range(1, 7), repeat=attack_value):
+        loss = min(sum(1 for die in dice if die >= threshold), strength)
+        remaining = strength - loss
+        loss_pmf[loss] += outcome
+        if remaining <= 0:
+            destroyed += outcome
+        elif 2 * loss >= strength:
+            retreat += outcome
+        if melee and remaining:
+            counter = Fraction(0)
+            for counter_dice in product(range(1, 7), repeat=remaining):
+                counter += sum(1 for die in counter_dice if die >= COUNTER_HIT_ROLL)
+            attacker_loss += outcome * counter / 6 ** remaining
+    return destroyed, retreat, loss_pmf, attacker_loss
+
+
+@pytest.mark.parametrize("attack_value, strength, threshold, melee", [
+    (0, 3, 4, True),
+    (1, 1, 6, False),
+    (2, 3, 2, True),
+    (3, 2, 5, True),
+    (4, 4, 4, False),
+    (5, 3, 3, True),
+    (4, 0, 4, True),
+])
+def test_exact_odds_matches_enumeration(attack_value, strength, threshold, melee):
+    odds = exact_odds(attack_value, strength, threshold, melee)
+    destroyed, retreat, loss_pmf, attacker_loss = brute_force_odds(attack_value, strength, threshold, melee)
+    assert odds.destroyed == pytest.approx(float(destroyed))
+    assert odds.retreat == pytest.approx(float(retreat))
+    assert odds.loss_pmf == pytest.approx([float(p) for p in loss_pmf])
+    assert odds.defender_loss == pytest.approx(float(sum(k * p for k, p in enumerate(loss_pmf))))
+    assert odds.attacker_loss == pytest.approx(float(attacker_loss))
+    assert sum(odds.loss_pmf) == pytest.approx(1.0)
+
+
+def test_odds_cache_and_threshold_key():
+    odds = CombatOdds()
+    first = odds.odds(3, 4, defense_mod=1, distance=1)
+    assert odds.odds(3, 4, defense_mod=1, distance=1) is first
+    assert (odds.cache_hits, odds.cache_misses) == (1, 1)
+    # Ostrzał z odległości: próg o RANGED_PENALTY wyższy i bez ognia odpowiedzi
+    ranged = odds.odds(3, 4, defense_mod=1, distance=2)
+    assert ranged.defender_loss < first.defender_loss
+    assert ranged.attacker_loss == 0
+
+
+def test_resolve_batch_agrees_with_exact_odds():
+    rng = np.random.default_rng(5)
+    count = 20000
+    results = resolve_batch(rng, np.full(count, 4), np.full(count, 3), np.zeros(count), np.ones(count))
+    odds = exact_odds(4, 3, 4, True)
+    assert results["destroyed"].mean() == pytest.approx(odds.destroyed, abs=0.02)
+    assert results["retreat"].mean() == pytest.approx(odds.retreat, abs=0.02)
+    assert results["defender_loss"].mean() == pytest.approx(odds.defender_loss, abs=0.05)
+    assert results["attacker_loss"].mean() == pytest.approx(odds.attacker_loss, abs=0.05)
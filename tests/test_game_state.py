@@ -0,0 +1,26 @@
+import pytest
+
+from conftest import token
+from core.game_state import GameRuleError
+
+
+def test_moved_unit_keeps_damaged_strength(engine):
+    unit = engine.place_unit("0_0", token("Piechota", "polskie"))
+    unit.strength = 2
+    moved = engine.move_unit("0_0", "1_1")
+    assert moved is unit
+    assert engine.state.unit_at("1_1").strength == 2
+    assert engine.state.unit_at("0_0") is None
+    assert engine.state.hex_data["1_1"]["jednostki"] == "Piechota"
+    assert "0_0" not in engine.state.hex_data
+
+
+def test_move_rules(engine):
+    engine.place_unit("0_0", token("Piechota", "polskie"))
+    engine.place_unit("0_1", token("Czołg", "niemieckie"))
+    with pytest.raises(GameRuleError):
+        engine.move_unit("0_0", "0_1")  # heks zajęty
+    with pytest.raises(GameRuleError):
+        engine.move_unit("0_1", "1_1")  # żetony nacji bez tury są zablokowane
+    with pytest.raises(GameRuleError):
+        engine.place_unit("3_5", token("Saperzy", "polskie"))  # heks spoza mapy
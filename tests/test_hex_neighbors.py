@@ -0,0 +1,29 @@
+import json
+
+import numpy as np
+
+from core.hex_neighbors import HexNeighborTable, load_max_token_range, max_token_range
+
+
+def test_max_token_range_from_token_data_files(tmp_path):
+    for name, stats in (("a", {"sight_range": 4, "attack_range": 1}), ("b", {"attack_range": "7"}),
+                        ("c", {"sight_range": "brak"})):
+        token_dir = tmp_path / "polskie" / name
+        token_dir.mkdir(parents=True)
+        (token_dir / "token_data.json").write_text(json.dumps(stats), encoding="utf-8")
+    (tmp_path / "polskie" / "zepsuty").mkdir()
+    (tmp_path / "polskie" / "zepsuty" / "token_data.json").write_text("{", encoding="utf-8")
+
+    assert load_max_token_range(str(tmp_path)) == 7
+    assert load_max_token_range(str(tmp_path), keys=("sight_range",)) == 4
+    assert max_token_range([]) == 0
+
+
+def test_disk_matches_distance(small_map):
+    grid, neighbor_table = small_map
+    origin = grid.index_of("3_3")
+    for radius in range(4):
+        disk = set(neighbor_table.disk(origin, radius).tolist())
+        distances = neighbor_table.distance(np.full(grid.size, origin), np.arange(grid.size))
+        # Dysk pomija heksy spoza mapy
+        assert disk == set(np.flatnonzero((distances <= radius) & grid.valid).tolist())
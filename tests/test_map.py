@@ -0,0 +1,23 @@
+from core.map import HexGrid
+
+
+def test_from_map_data_skips_malformed_and_off_grid_centers(capsys):
+    grid = HexGrid.from_map_data({
+        "config": {"grid_cols": 4, "grid_rows": 3},
+        "hex_centers": {"abc": [1, 2], "1_x": [3, 4], "-1_2": [5, 6], "2_1": [7.5, 8.5]},
+    })
+    assert (grid.grid_cols, grid.grid_rows) == (4, 3)
+    assert grid.valid.sum() == 1
+    idx = grid.index_of("2_1")
+    assert grid.valid[idx]
+    assert grid.centers[idx].tolist() == [7.5, 8.5]
+    assert capsys.readouterr().out.count("[UWAGA]") == 3
+
+
+def test_from_map_data_grows_grid_to_saved_centers():
+    grid = HexGrid.from_map_data({
+        "config": {"grid_cols": 2, "grid_rows": 2},
+        "hex_centers": {"0_0": [1, 1], "5_3": [2, 2]},
+    })
+    assert (grid.grid_cols, grid.grid_rows) == (6, 4)
+    assert grid.contains("5_3") and not grid.contains("1_1")
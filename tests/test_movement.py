@@ -0,0 +1,93 @@
+import heapq
+
+import pytest
+
+from conftest import token
+from core.game_state import GameRuleError
+from core.map import NO_VALUE
+from engine.movement import MovementEngine, terrain_move_costs
+
+
+def plain_dijkstra(grid, neighbor_table, origin, movement_points, blocked):
+    """Dijkstra na kopcu - wzorzec dla kolejki kubełkowej MovementEngine.compute()."""
+    costs = terrain_move_costs(grid)
+    best = {origin: 0}
+    heap = [(0, origin)]
+    while heap:
+        cost, idx = heapq.heappop(heap)
+        if cost > best[idx]:
+            continue
+        for neighbor in neighbor_table.neighbors[idx]:
+            if neighbor == NO_VALUE or not grid.valid[neighbor] or neighbor in blocked:
+                continue
+            new_cost = cost + int(costs[neighbor])
+            if new_cost <= movement_points and new_cost < best.get(neighbor, movement_points + 1):
+                best[int(neighbor)] = new_cost
+                heapq.heappush(heap, (new_cost, int(neighbor)))
+    return best
+
+
+@pytest.mark.parametrize("origin, movement_points", [("0_0", 4), ("2_4", 3), ("3_3", 6), ("7_7", 5)])
+def test_costs_match_plain_dijkstra(small_map, origin, movement_points):
+    grid, neighbor_table = small_map
+    engine = MovementEngine(grid, neighbor_table)
+    origin_idx = grid.index_of(origin)
+    result = engine.compute(origin_idx, movement_points, "polskie")
+    assert result.costs == plain_dijkstra(grid, neighbor_table, origin_idx, movement_points, set())
+
+
+def test_enemy_units_block_and_friendly_units_are_passable(small_map):
+    grid, neighbor_table = small_map
+    engine = MovementEngine(grid, neighbor_table)
+    enemy = {grid.index_of("1_3"), grid.index_of("1_4")}
+    friend = grid.index_of("3_2")
+    for idx in enemy:
+        engine.occupy(idx, "niemieckie")
+    engine.occupy(friend, "polskie")
+
+    origin = grid.index_of("1_1")
+    result = engine.compute(origin, 5, "polskie")
+    assert result.costs == plain_dijkstra(grid, neighbor_table, origin, 5, enemy)
+    # Przez własną jednostkę można przejść, ale nie można na niej zakończyć ruchu
+    assert friend in result.costs and not result.can_reach(friend)
+    assert not enemy & set(result.costs)
+
+
+def test_path_cost_matches_result(small_map):
+    grid, neighbor_table = small_map
+    engine = MovementEngine(grid, neighbor_table)
+    costs = terrain_move_costs(grid)
+    origin = grid.index_of("0_2")
+    result = engine.compute(origin, 6, "polskie")
+    for idx in result.reachable:
+        path = result.path_to(idx)
+        assert path[0] == origin and path[-1] == idx
+        assert sum(int(costs[step]) for step in path[1:]) == result.costs[idx]
+
+
+def test_cache_key_includes_movement_points(small_map):
+    grid, neighbor_table = small_map
+    engine = MovementEngine(grid, neighbor_table)
+    origin = grid.index_of("0_0")
+    full = engine.reachable("Piechota", origin, 4, "polskie", turn=1)
+    assert engine.reachable("Piechota", origin, 4, "polskie", turn=1) is full
+    partial = engine.reachable("Piechota", origin, 1, "polskie", turn=1)
+    assert partial is not full
+    assert max(partial.costs.values()) <= 1
+
+
+def test_movement_points_are_spent_and_restored(engine):
+    unit = engine.place_unit("0_0", token("Piechota", "polskie", movement_points=3))
+    engine.move_unit("0_0", "0_1")
+    engine.move_unit("0_1", "0_2")
+    assert unit.movement_left == 1
+    with pytest.raises(GameRuleError):
+        engine.move_unit("0_2", "0_4")
+    engine.move_unit("0_2", "0_3")
+    assert unit.movement_left == 0
+    assert engine.reachable("0_3") is None
+
+    engine.advance_turn()
+    engine.advance_turn()
+    assert unit.movement_left == 3
+    engine.move_unit("0_3", "0_6")
@@ -0,0 +1,47 @@
+from core.save_format import SaveReader, read_save, write_save
+
+
+def sample_state():
+    return {
+        "current_turn": 3,
+        "placed_tokens": {
+            "1_1": {"name": "Piechota", "nation": "polskie", "image": "ab" * 32,
+                    "path": "tokeny/polskie/p/p.png", "original_path": "tokeny/polskie/p"},
+            "5_7": {"name": "Czołg", "nation": "niemieckie", "image": "",
+                    "path": "tokeny/niemieckie/c/c.png", "original_path": ""},
+        },
+        "hex_data": {
+            "1_1": {"terrain_key": "las", "move_mod": -2, "defense_mod": 1, "jednostki": "Piechota"},
+            "2_2": {"move_mod": -1, "zaopatrzenie": 0.5},
+            "3_3": {"punkt": {"typ": "miasto", "wartosc": 10}},
+        },
+    }
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "save_game.sav"
+    state = sample_state()
+    write_save(str(path), state)
+    assert read_save(str(path)) == state
+
+
+def test_reader_reads_sections_on_demand(tmp_path):
+    path = tmp_path / "save_game.sav"
+    state = sample_state()
+    write_save(str(path), state)
+
+    reader = SaveReader(str(path))
+    assert reader.meta == {"current_turn": 3}
+    assert reader.token_count == 2
+    assert dict(reader.iter_tokens()) == state["placed_tokens"]
+    chunks = list(reader.iter_token_chunks(chunk_size=1))
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+    assert reader.read_hex_data() == state["hex_data"]
+
+
+def test_overwrite_leaves_no_temp_files(tmp_path):
+    path = tmp_path / "save_game.sav"
+    write_save(str(path), sample_state())
+    write_save(str(path), {"current_turn": 1, "placed_tokens": {}, "hex_data": {}})
+    assert read_save(str(path)) == {"current_turn": 1, "placed_tokens": {}, "hex_data": {}}
+    assert [p.name for p in tmp_path.iterdir()] == ["save_game.sav"]